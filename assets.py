@@ -0,0 +1,166 @@
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+# Seconds between two writes of the index while adding files, the rest is written when the store is closed
+ASSET_INDEX_SAVE_INTERVAL = 1.0
+
+class AssetStore():
+    def __init__(self, store_dir = os.path.join(os.getcwd(), "output", "assets")):
+        self.store_dir = store_dir
+        self.blobs_dir = os.path.join(store_dir, "blobs")
+        self.partial_dir = os.path.join(store_dir, "partial")
+        self.index_path = os.path.join(store_dir, "index.json")
+
+        self.reused = 0
+        self.added = 0
+        self.url_locks = {}
+        self.lock = threading.Lock()
+        # Orders the index writes, held while writing so the crawls only wait on self.lock for the copy
+        self.save_lock = threading.Lock()
+        # URLs were added since the index was last written
+        self.dirty = False
+        self.last_save = 0
+
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+        # URL -> SHA-256 of the content
+        self.index = {}
+        try:
+            with open(self.index_path, "r", encoding="utf8") as file:
+                self.index = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+
+        # The URLs added since the last write are written at exit if the store was not closed
+        atexit.register(self.close)
+
+    def util_get_blob_path(self, digest: str):
+        """Return the path of the blob with the given hash, sharded by the first two characters."""
+        return os.path.join(self.blobs_dir, digest[:2], digest)
+
+    def util_save_index(self, throttle = False):
+        """Write the index to disk if it changed, at most once per ASSET_INDEX_SAVE_INTERVAL when throttled.
+        The lock must not be held by the caller."""
+        with self.save_lock:
+            # Copied under the lock, serialized outside of it
+            with self.lock:
+                if not self.dirty:
+                    return
+                if throttle and time.monotonic() - self.last_save < ASSET_INDEX_SAVE_INTERVAL:
+                    return
+                index = dict(self.index)
+                self.dirty = False
+
+            temp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf8") as file:
+                json.dump(index, file)
+            os.replace(temp_path, self.index_path)
+            self.last_save = time.monotonic()
+
+    def lookup(self, url: str):
+        """Return the hash of the blob already downloaded from the URL, None if there is none."""
+        with self.lock:
+            digest = self.index.get(url)
+
+        if digest == None or not os.path.isfile(self.util_get_blob_path(digest)):
+            return None
+
+        return digest
+
+    def add_file(self, url: str, file_path: str):
+        """Move the file downloaded from the URL into the store, return its hash."""
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                sha256.update(chunk)
+
+        digest = sha256.hexdigest()
+        blob_path = self.util_get_blob_path(digest)
+
+        with self.lock:
+            if os.path.isfile(blob_path):
+                os.remove(file_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(file_path, blob_path)
+                self.added += 1
+
+            self.index[url] = digest
+            self.dirty = True
+
+        # A URL missing from the index after a crash is downloaded again and finds its blob already stored
+        self.util_save_index(throttle=True)
+
+        return digest
+
+    def link(self, digest: str, dest_path: str):
+        """Make the blob appear at dest_path: hardlink if possible, then symlink, then a plain copy."""
+        blob_path = self.util_get_blob_path(digest)
+
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+
+        try:
+            os.link(blob_path, dest_path)
+            return
+        except OSError:
+            pass
+
+        try:
+            os.symlink(os.path.abspath(blob_path), dest_path)
+            return
+        except OSError:
+            pass
+
+        shutil.copyfile(blob_path, dest_path)
+
+    def get_url_lock(self, url: str):
+        """Return the lock that stops two crawls from downloading the same URL at the same time."""
+        with self.lock:
+            url_lock = self.url_locks.get(url)
+            if url_lock == None:
+                url_lock = threading.Lock()
+                self.url_locks[url] = url_lock
+        return url_lock
+
+    def fetch(self, url: str, dest_path: str, download):
+        """Place the content of the URL at dest_path, calling `download(url, file_path)` only if the blob is missing.
+
+        `download` writes the content to file_path and returns the status code, which is returned as is.
+        """
+        with self.get_url_lock(url):
+            digest = self.lookup(url)
+            if digest != None:
+                with self.lock:
+                    self.reused += 1
+                self.link(digest, dest_path)
+                return 200
+
+            # Partial downloads are kept per URL so an interrupted one can be resumed later
+            temp_path = os.path.join(self.partial_dir, hashlib.sha256(url.encode("utf8")).hexdigest())
+            status_code = download(url, temp_path)
+            if status_code != 200:
+                return status_code
+
+            self.link(self.add_file(url, temp_path), dest_path)
+            return status_code
+
+    def close(self):
+        """Write the URLs added since the last write of the index."""
+        self.util_save_index()
+
+    def stats(self):
+        """Return the number of indexed URLs, stored blobs, and the reuse counters."""
+        with self.lock:
+            return {
+                "urls": len(self.index),
+                "blobs": len(set(self.index.values())),
+                "added": self.added,
+                "reused": self.reused,
+            }
@@ -0,0 +1,278 @@
+import asyncio
+import os
+import random
+import time
+import traceback
+from urllib.parse import urlsplit
+from logger import Logger
+from converter import Crawler
+from assets import AssetStore
+from batch import BatchCrawler, QuietLogger, DEFAULT_BATCH_WORKERS, DEFAULT_BATCH_PER_SITE
+from network import (SessionPool, DeadlineExceeded, SESSION_POOL, RETRY_STATUS_CODES, RETRY_EXCEPTIONS,
+                     DEFAULT_POOL_MAXSIZE, DEFAULT_DOWNLOAD_PER_HOST, DEFAULT_CHUNK_SIZE, DEFAULT_MAX_RESUMES)
+
+# aiohttp is optional, without it the requests of the event loop are sent by worker threads through the SessionPool
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+class AsyncFetcher():
+    def __init__(self, session_pool: SessionPool = SESSION_POOL, limit = DEFAULT_POOL_MAXSIZE, limit_per_host = DEFAULT_DOWNLOAD_PER_HOST):
+        """Send the requests of the event loop, with the timeouts and retries of the given SessionPool.
+
+        aiohttp is only used when it is installed and the pool has no HTTP cache nor fixtures, so that
+        --cache-dir, --record and --replay keep working the same way with the asyncio engine.
+        """
+        self.session_pool = session_pool
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.use_aiohttp = aiohttp != None and session_pool.cache == None and session_pool.fixtures == None
+
+        self.session = None
+        if self.use_aiohttp:
+            self.retry_exceptions = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+    async def open(self):
+        """Open the aiohttp session, its connector keeps the connections alive and caps them in total and per host."""
+        if self.use_aiohttp and self.session == None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self.session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
+        if self.session != None:
+            await self.session.close()
+            self.session = None
+
+    def util_get_timeout(self, deadline: float):
+        """Return the aiohttp timeout of the next request, shortened to fit the deadline if any."""
+        connect_timeout, read_timeout = self.session_pool.util_get_timeout(deadline)
+        total = None if deadline == None else deadline - time.monotonic()
+        return aiohttp.ClientTimeout(total=total, sock_connect=connect_timeout, sock_read=read_timeout)
+
+    async def util_sleep_before_retry(self, url: str, attempt: int, deadline: float):
+        """Wait a random time up to backoff * 2^attempt seconds, like SessionPool.get."""
+        delay = random.uniform(0, self.session_pool.retry_backoff * (2 ** attempt))
+        if deadline != None and time.monotonic() + delay >= deadline:
+            raise DeadlineExceeded(f"No time left to retry {url}")
+
+        await asyncio.sleep(delay)
+
+    async def get(self, url: str, deadline: float = None):
+        """Send a GET request, return the status code and the text of the response."""
+        if not self.use_aiohttp:
+            response = await asyncio.to_thread(self.session_pool.get, url, deadline)
+            return response.status_code, response.text
+
+        await self.open()
+        attempt = 0
+        while True:
+            try:
+                async with self.session.get(url, timeout=self.util_get_timeout(deadline)) as response:
+                    if response.status not in RETRY_STATUS_CODES or attempt >= self.session_pool.retries:
+                        return response.status, await response.text()
+            except self.retry_exceptions:
+                if attempt >= self.session_pool.retries:
+                    raise
+
+            await self.util_sleep_before_retry(url, attempt, deadline)
+            attempt += 1
+
+    async def download(self, url: str, file_path: str, deadline: float = None,
+                       chunk_size = DEFAULT_CHUNK_SIZE, max_resumes = DEFAULT_MAX_RESUMES):
+        """Stream the URL to file_path through a ".part" file resumed with Range requests, like SessionPool.download."""
+        if not self.use_aiohttp:
+            return await asyncio.to_thread(self.session_pool.download, url, file_path, None, deadline, chunk_size, max_resumes)
+
+        await self.open()
+        part_path = file_path + ".part"
+        attempt = 0
+        resumes = 0
+
+        while True:
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {"Range": f"bytes={offset}-"} if offset > 0 else {}
+
+            try:
+                async with self.session.get(url, headers=headers, timeout=self.util_get_timeout(deadline)) as response:
+                    if response.status in RETRY_STATUS_CODES and attempt < self.session_pool.retries:
+                        await self.util_sleep_before_retry(url, attempt, deadline)
+                        attempt += 1
+                        continue
+
+                    if response.status == 416 and offset > 0:
+                        # The partial file does not match the remote file anymore, start over
+                        os.remove(part_path)
+                        continue
+
+                    if response.status == 206:
+                        mode = "ab"
+                    elif response.status == 200:
+                        # The server ignored the Range header, start over
+                        mode = "wb"
+                        offset = 0
+                    else:
+                        return response.status
+
+                    total = None if response.content_length == None else offset + response.content_length
+
+                    try:
+                        with open(part_path, mode) as file:
+                            async for chunk in response.content.iter_chunked(chunk_size):
+                                file.write(chunk)
+                                offset += len(chunk)
+                    except asyncio.CancelledError:
+                        # Only cancelled when the crawl failed, the partial file is not left behind
+                        os.remove(part_path)
+                        raise
+
+                    if total != None and offset < total:
+                        raise aiohttp.ClientPayloadError(f"Connection closed after {offset}/{total} bytes")
+
+                    os.replace(part_path, file_path)
+                    return 200
+
+            except self.retry_exceptions:
+                resumes += 1
+                if resumes > max_resumes:
+                    raise
+
+            # Timeouts and cut connections wait like the retries of a status code, and give up at the deadline
+            await self.util_sleep_before_retry(url, resumes - 1, deadline)
+
+class AsyncCrawler(Crawler):
+    def __init__(self, url: str, fetcher: AsyncFetcher, logger: Logger = Logger(),
+                 output_path_dir = os.path.join(os.getcwd(), "output", "crawler"),
+                 problem_site_type = None,
+                 asset_store: AssetStore = None,
+                 **kwargs):
+        """Crawler whose network stages run on the event loop, the parsing and converting stages are the ones of Crawler."""
+        super().__init__(url, logger, output_path_dir, problem_site_type, fetcher.session_pool, asset_store=asset_store, **kwargs)
+        self.fetcher = fetcher
+
+    async def util_download_file_async(self, job: tuple):
+        """Download a single file of a get_files job, return the job and its status code (None if unreachable)."""
+        tag, file, url, step = job
+        file_path = os.path.join(self.output_problem_path_dir, str(file).split("/")[-1])
+
+        # Kept from the last crawl only while the statement is unchanged, like Crawler.util_download_file
+        if self.incremental and not self.content_changed and os.path.exists(file_path):
+            return job, 200
+
+        try:
+            # The asset store dedups the URLs with thread locks, so its downloads stay on worker threads
+            if self.asset_store != None:
+                return job, await asyncio.to_thread(self.asset_store.fetch, url, file_path, self.util_download_to_file)
+
+            return job, await self.fetcher.download(url, file_path, self.deadline)
+        except RETRY_EXCEPTIONS + (self.fetcher.retry_exceptions if self.fetcher.use_aiohttp else ()):
+            return job, None
+
+    async def get_files_async(self):
+        """Download the files embedded in the problem content concurrently on the event loop."""
+        files, external_files, jobs = self.util_get_file_jobs()
+
+        tasks = [asyncio.create_task(self.util_download_file_async(job)) for job in jobs]
+        try:
+            for downloaded, task in enumerate(asyncio.as_completed(tasks)):
+                job, status_code = await task
+                self.util_report_file_result(job, status_code, downloaded + 1, len(jobs))
+        finally:
+            # A missing file fails the crawl, stop the other downloads and wait for them to close their responses
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.util_report_files_done(files, external_files)
+
+        return files
+
+    async def main_converter_async(self):
+        """Same stages as main_converter, awaiting the network ones."""
+
+        self.start_crawl()
+
+        # Fetch the page here, the parsers of the sites then only read self.html_response
+        self.util_normalize_url()
+        if self.html_response == str():
+            status_code, text = await self.fetcher.get(self.url, self.deadline)
+            if(status_code != 200):
+                self.logger.log_and_status(f"[{self.problem_site_type}] Không thể cào bài từ trang đã cho!", "err")
+                raise Exception(f"Failed to get problem from {self.problem_site_type} site")
+            self.html_response = text
+
+        self.get_base_problem()
+
+        if not self.prepare_problem_folder():
+            return self.util_reuse_previous_problem(self.previous_problem)
+
+        if self.content_changed and not self.offline:
+            self.logger.log_and_status(f"[{self.problem_site_type}] Đang lấy các tệp tin và ảnh...", "info", False)
+            await self.get_files_async()
+            # Only CSLOJ has test ZIPs, a single large file that is streamed by a worker thread
+            await asyncio.to_thread(self.get_zip_test_files)
+        else:
+            self.logger.step(step=25, force_update=False)
+        self.logger.step(step=5, force_update=False)
+
+        # Converting is CPU bound, keep the event loop free for the other crawls
+        return await asyncio.to_thread(self.convert_problem)
+
+class AsyncBatchCrawler(BatchCrawler):
+    """BatchCrawler running every crawl as a task of one event loop instead of one thread per crawl."""
+
+    def create_crawler(self, url: str):
+        logger = Logger() if self.verbose else QuietLogger()
+        return AsyncCrawler(url, self.fetcher, logger, self.output_path_dir, self.problem_site_type,
+                            asset_store=self.asset_store, **self.crawler_options)
+
+    def get_site_semaphore(self, url: str):
+        """Return the asyncio semaphore limiting the concurrent crawls of the site of the URL."""
+        site = urlsplit(url).netloc.lower()
+
+        semaphore = self.site_semaphores.get(site)
+        if semaphore == None:
+            semaphore = asyncio.Semaphore(self.per_site)
+            self.site_semaphores[site] = semaphore
+
+        return semaphore
+
+    async def crawl_one_async(self, url: str, workers_semaphore: asyncio.Semaphore):
+        """Crawl a single URL, never raise, return its result entry."""
+        result = self.util_new_result(url)
+
+        # The slot of the site first, a crawl waiting for its site does not hold a worker the other sites could use
+        async with self.get_site_semaphore(url), workers_semaphore:
+            start = time.perf_counter()
+            crawler = self.create_crawler(url)
+            error = None
+            try:
+                await crawler.main_converter_async()
+            except Exception as e:
+                error = e
+                if self.verbose:
+                    traceback.print_exc()
+            self.util_fill_result(result, crawler, error, start)
+
+        return result
+
+    async def run_async(self):
+        """Crawl every URL concurrently, return the results in the same order as the URLs."""
+        self.fetcher = AsyncFetcher(self.session_pool)
+        self.site_semaphores = {}
+        workers_semaphore = asyncio.Semaphore(max(1, self.workers))
+
+        try:
+            self.results = await asyncio.gather(*[self.crawl_one_async(url, workers_semaphore) for url in self.urls])
+        finally:
+            await self.fetcher.close()
+
+        return self.results
+
+    def run(self):
+        self.results = list(asyncio.run(self.run_async()))
+        return self.results
+
+def crawl_many_async(urls: list, workers = DEFAULT_BATCH_WORKERS, per_site = DEFAULT_BATCH_PER_SITE, **kwargs):
+    """Crawl many problems on one event loop, return a list of result entries like crawl_many."""
+    return AsyncBatchCrawler(urls, workers, per_site, **kwargs).run()
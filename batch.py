@@ -0,0 +1,541 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlsplit
+from logger import Logger
+from converter import Crawler, OUTPUT_FORMATS
+from assets import AssetStore
+from mathspan import get_equation_cache_stats
+from network import SessionPool, HttpCache, FixtureStore, DEFAULT_CACHE_MAX_SIZE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DEFAULT_RETRIES, SESSION_POOL
+
+# Number of problems crawled at the same time, in total and per site
+DEFAULT_BATCH_WORKERS = 4
+DEFAULT_BATCH_PER_SITE = 2
+
+# Files of a saved pages directory that are converted
+SAVED_PAGE_EXTENSIONS = (".html", ".htm")
+
+# Where the URL of a saved page is found: the comment written by "Save page as", the canonical link, the og:url meta
+SAVED_PAGE_URL_PATTERNS = [
+    r'<!-- saved from url=\(\d+\)(\S+?) -->',
+    r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"',
+    r'<meta[^>]+property="og:url"[^>]+content="([^"]+)"',
+]
+
+class QuietLogger(Logger):
+    """Logger that keeps the log in memory instead of printing it, so parallel crawls do not interleave."""
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def log(self, log_text: str):
+        self.lines.append(log_text)
+
+    def clear_log(self):
+        self.lines = []
+
+    def status(self, status_text: str, type="info", force_update=True, resolve_queue=False):
+        pass
+
+    def set_total_steps(self, total_steps: int):
+        self.total_steps = total_steps
+        self.current_done_step = 0
+
+    def step(self, step = 1, force_update=True, resolve_queue=False, completed=False):
+        pass
+
+class BatchCrawler():
+    def __init__(self, urls: list, workers = DEFAULT_BATCH_WORKERS, per_site = DEFAULT_BATCH_PER_SITE,
+                 output_path_dir = os.path.join(os.getcwd(), "output", "crawler"),
+                 problem_site_type = None,
+                 verbose = False,
+                 session_pool: SessionPool = SESSION_POOL,
+                 asset_store: AssetStore = None,
+                 crawler_options: dict = None):
+
+        self.urls = [url.strip() for url in urls if url.strip() != ""]
+        self.workers = workers
+        self.per_site = per_site
+        self.output_path_dir = output_path_dir
+        self.problem_site_type = problem_site_type
+        self.verbose = verbose
+        self.session_pool = session_pool
+        self.asset_store = asset_store
+        self.crawler_options = crawler_options if crawler_options != None else {}
+
+        # site -> number of crawls submitted to the workers, and the crawls waiting for one of them to finish
+        self.site_active = {}
+        self.site_queues = {}
+        self.lock = threading.Lock()
+        self.results = []
+
+    def util_schedule(self, executor: ThreadPoolExecutor, url: str, future: Future):
+        """Submit the crawl if its site has a free slot, otherwise queue it behind the crawls of the site.
+        A worker only ever runs a crawl that holds a slot, so the other sites are never waiting on a busy one."""
+        site = urlsplit(url).netloc.lower()
+
+        with self.lock:
+            active = self.site_active.get(site, 0)
+            if active >= self.per_site:
+                self.site_queues.setdefault(site, deque()).append((url, future))
+                return
+            self.site_active[site] = active + 1
+
+        executor.submit(self.util_run_crawl, executor, site, url, future)
+
+    def util_run_crawl(self, executor: ThreadPoolExecutor, site: str, url: str, future: Future):
+        """Crawl a URL in the slot of its site, then hand the slot to the next crawl of the site."""
+        try:
+            future.set_result(self.crawl_one(url))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                queue = self.site_queues.get(site)
+                if not queue:
+                    self.site_active[site] -= 1
+                    return
+                url, future = queue.popleft()
+
+            # Submitted behind the crawls of the other sites that are already waiting for a worker
+            executor.submit(self.util_run_crawl, executor, site, url, future)
+
+    def create_crawler(self, url: str):
+        """Create the Crawler of a single URL of the batch."""
+        logger = Logger() if self.verbose else QuietLogger()
+        return Crawler(url, logger, self.output_path_dir, self.problem_site_type, self.session_pool,
+                       asset_store=self.asset_store, **self.crawler_options)
+
+    def util_new_result(self, url: str):
+        """Return the empty result entry of a URL."""
+        return {
+            "url": url,
+            "ok": False,
+            "problem_site_type": None,
+            "problem_code": None,
+            "problem_title": None,
+            "problem_folder": None,
+            "unchanged": False,
+            "seconds": 0.0,
+            "error": None,
+        }
+
+    def util_fill_result(self, result: dict, crawler: Crawler, error: Exception, start: float):
+        """Fill the result entry of a finished crawl."""
+        if error == None:
+            result["ok"] = True
+            result["unchanged"] = crawler.problem_unchanged
+            result["problem_folder"] = crawler.output_problem_path_dir
+        else:
+            result["error"] = f"{type(error).__name__}: {error}"
+        result["problem_site_type"] = crawler.problem_site_type
+        result["problem_code"] = crawler.problem.get("problem_code")
+        result["problem_title"] = crawler.problem.get("problem_title")
+        result["seconds"] = time.perf_counter() - start
+
+        return result
+
+    def crawl_one(self, url: str):
+        """Crawl a single URL, never raise, return its result entry."""
+        result = self.util_new_result(url)
+
+        start = time.perf_counter()
+        crawler = self.create_crawler(url)
+        error = None
+        try:
+            # The manual fallback of Crawler.crawl needs a person, batch jobs only report the failure
+            crawler.main_converter()
+        except Exception as e:
+            error = e
+            if self.verbose:
+                traceback.print_exc()
+        self.util_fill_result(result, crawler, error, start)
+
+        return result
+
+    def run(self):
+        """Crawl every URL in parallel, at most per_site at a time on each site, return the results in the same order
+        as the URLs."""
+        self.site_active = {}
+        self.site_queues = {}
+        futures = [Future() for _ in self.urls]
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="crawl") as executor:
+            for url, future in zip(self.urls, futures):
+                self.util_schedule(executor, url, future)
+            self.results = [future.result() for future in futures]
+
+        return self.results
+
+    def summary(self):
+        """Return a human readable report of the last run."""
+        succeeded = [result for result in self.results if result["ok"]]
+        failed = [result for result in self.results if not result["ok"]]
+
+        report = "===== TỔNG KẾT =====\n"
+        for result in self.results:
+            state = "OK " if result["ok"] else "ERR"
+            report += f"[{state}] {result['seconds']:7.2f}s  {result['url']}"
+            if result["ok"]:
+                report += f"  ->  {result['problem_folder']}{' (không thay đổi)' if result['unchanged'] else ''}\n"
+            else:
+                report += f"  ->  {result['error']}\n"
+
+        total_seconds = sum(result["seconds"] for result in self.results)
+        report += f"Thành công: {len(succeeded)}/{len(self.results)}; Thất bại: {len(failed)}/{len(self.results)}"
+        report += f"; Không thay đổi: {sum(result['unchanged'] for result in self.results)}\n"
+        if len(self.results) > 0:
+            report += f"Thời gian trung bình mỗi bài: {total_seconds / len(self.results):.2f}s\n"
+
+        # The formula memo is per process, it is only filled when the problems are converted in this process
+        equation_cache = get_equation_cache_stats()
+        if equation_cache["hits"] + equation_cache["misses"] > 0:
+            report += f"Bộ nhớ đệm công thức: {equation_cache['hit_rate']:.0%} trúng ({equation_cache['hits']}/{equation_cache['hits'] + equation_cache['misses']})\n"
+
+        return report
+
+class CodeforcesContestCrawler():
+    def __init__(self, url: str, workers = DEFAULT_BATCH_WORKERS,
+                 output_path_dir = os.path.join(os.getcwd(), "output", "crawler"),
+                 verbose = False,
+                 session_pool: SessionPool = SESSION_POOL,
+                 asset_store: AssetStore = None,
+                 logger: Logger = Logger(),
+                 crawler_options: dict = None,
+                 batch_crawler_class = None):
+
+        self.url = url.strip()
+        self.workers = workers
+        self.output_path_dir = output_path_dir
+        self.verbose = verbose
+        self.session_pool = session_pool
+        self.asset_store = asset_store
+        self.logger = logger
+        self.crawler_options = crawler_options if crawler_options != None else {}
+        self.batch_crawler_class = batch_crawler_class if batch_crawler_class != None else BatchCrawler
+
+        self.contest = dict()
+        self.results = []
+
+    def get_contest(self):
+        """Fetch the contest page, return the contest metadata and the URLs of all of its problems."""
+
+        # Accept the contest page, its problem list, or any problem of the contest
+        # https://codeforces.com/contest/1234/problem/A -> https://codeforces.com, /contest/1234, contest, 1234
+        match = re.match(r'(https?:\/\/[^\/]+)(\/(?:group\/[^\/]+\/)?(contest|gym)\/(\d+))', self.url)
+        if match == None:
+            self.logger.log_and_status("[Codeforces] Đường dẫn không phải là một cuộc thi Codeforces!", "err")
+            raise Exception("Not a Codeforces contest URL")
+
+        contest_root, contest_path, codeforces_url_type, problem_contest_id = match.groups()
+        contest_url = contest_root + contest_path
+
+        response = self.session_pool.get(contest_url)
+        if(response.status_code != 200):
+            self.logger.log_and_status("[Codeforces] Không thể tải trang cuộc thi!", "err")
+            raise Exception("Failed to get the contest page from Codeforces site")
+        html = response.text
+
+        # The problem table links every problem as <contest path>/problem/<index>
+        problem_order_ids = re.findall(re.escape(contest_path) + r'\/problem\/([A-Za-z0-9]+)"', html)
+        problem_order_ids = list(dict.fromkeys(problem_order_ids))
+
+        if len(problem_order_ids) == 0:
+            self.logger.log_and_status("[Codeforces] Không tìm thấy bài nào trong cuộc thi!", "err")
+            raise Exception("No problem found in the contest page")
+
+        problem_contest_name = Crawler(contest_url).util_get_codeforces_contest_name(html, "gym" if codeforces_url_type == "gym" else "contest")
+
+        self.contest = {
+            "problem_contest_url": contest_url,
+            "problem_contest_type": codeforces_url_type,
+            "problem_contest_id": problem_contest_id,
+            "problem_contest_name": problem_contest_name,
+            "problem_order_ids": problem_order_ids,
+            "problem_urls": [f"{contest_url}/problem/{problem_order_id}" for problem_order_id in problem_order_ids],
+        }
+
+        self.logger.log(f"[Codeforces] Cuộc thi {problem_contest_id} ({problem_contest_name}): {len(problem_order_ids)} bài {problem_order_ids}")
+
+        return self.contest
+
+    def run(self):
+        """Crawl every problem of the contest in parallel, then write the contest index."""
+        if len(self.contest) == 0:
+            self.get_contest()
+
+        # One folder for the contest, one sub-folder per problem
+        contest_folder_name = urlsplit(self.contest["problem_contest_url"]).netloc + "+" + self.contest["problem_contest_type"] + self.contest["problem_contest_id"]
+        contest_path_dir = os.path.join(self.output_path_dir, contest_folder_name)
+        os.makedirs(contest_path_dir, exist_ok=True)
+
+        contest_info = {
+            "problem_contest_id": self.contest["problem_contest_id"],
+            "problem_contest_name": self.contest["problem_contest_name"],
+        }
+
+        # Every problem is on the same site, so the site limit is the worker limit
+        batch = self.batch_crawler_class(self.contest["problem_urls"], self.workers, self.workers, contest_path_dir, "Codeforces",
+                             self.verbose, self.session_pool, self.asset_store, {**self.crawler_options, "contest_info": contest_info})
+        self.results = batch.run()
+
+        index = dict(self.contest)
+        index["problems"] = [{
+            "problem_order_id": problem_order_id,
+            "problem_url": result["url"],
+            "problem_code": result["problem_code"],
+            "problem_title": result["problem_title"],
+            "problem_folder": None if result["problem_folder"] == None else os.path.basename(result["problem_folder"]),
+            "ok": result["ok"],
+            "error": result["error"],
+        } for problem_order_id, result in zip(self.contest["problem_order_ids"], self.results)]
+
+        with open(os.path.join(contest_path_dir, "contest.json"), "w", encoding="utf8") as file:
+            json.dump(index, file, indent=4, ensure_ascii=False)
+
+        succeeded = sum(result["ok"] for result in self.results)
+        self.logger.log_and_status(f"[Codeforces] Đã cào {succeeded}/{len(self.results)} bài của cuộc thi vào thư mục '{contest_folder_name}'!",
+                                   "ok" if succeeded == len(self.results) else "err")
+
+        return batch
+
+class OfflineConverter(BatchCrawler):
+    """BatchCrawler converting saved problem pages instead of URLs, one page per worker process."""
+
+    def __init__(self, paths: list, workers = os.cpu_count(),
+                 output_path_dir = os.path.join(os.getcwd(), "output", "crawler"),
+                 problem_site_type = None,
+                 verbose = False,
+                 crawler_options: dict = None):
+        super().__init__(paths, workers, workers, output_path_dir, problem_site_type, verbose, crawler_options=crawler_options)
+
+    def create_crawler(self, path: str):
+        """Create the offline Crawler of a saved page, its URL is filled in by crawl_one."""
+        logger = Logger() if self.verbose else QuietLogger()
+        return Crawler("", logger, self.output_path_dir, self.problem_site_type, self.session_pool, offline=True, **self.crawler_options)
+
+    def crawl_one(self, path: str):
+        """Convert a single saved page, never raise, return its result entry."""
+        result = self.util_new_result(path)
+
+        start = time.perf_counter()
+        crawler = self.create_crawler(path)
+        error = None
+        try:
+            html, meta = read_saved_page(path)
+            crawler.url = meta.get("url", "")
+            if meta.get("problem_site_type") != None:
+                crawler.problem_site_type = meta["problem_site_type"]
+            if crawler.url == "":
+                raise Exception(f"No URL found in the saved page, add it to {os.path.splitext(path)[0]}.json")
+
+            # The parsers only fetch the page when html_response is empty
+            crawler.html_response = html
+            crawler.main_converter()
+        except Exception as e:
+            error = e
+            if self.verbose:
+                traceback.print_exc()
+        self.util_fill_result(result, crawler, error, start)
+        result["problem_url"] = crawler.url
+
+        return result
+
+    def run(self):
+        """Convert every saved page on all CPU cores, return the results in the same order as the paths."""
+        jobs = [(path, self.output_path_dir, self.problem_site_type, self.verbose, self.crawler_options) for path in self.urls]
+        workers = max(1, self.workers)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            self.results = list(executor.map(convert_saved_page, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+        return self.results
+
+def convert_saved_page(job: tuple):
+    """Convert one saved page inside a worker process, the converter is created there as locks cannot be pickled."""
+    path, output_path_dir, problem_site_type, verbose, crawler_options = job
+    return OfflineConverter([path], 1, output_path_dir, problem_site_type, verbose, crawler_options).crawl_one(path)
+
+def read_saved_page(path: str):
+    """Read a saved problem page, return its HTML and its metadata (url, problem_site_type).
+
+    The metadata is read from a "<name>.json" file next to the page if there is one, a missing URL is
+    then looked up in the page itself.
+    """
+    with open(path, "r", encoding="utf8", errors="replace") as file:
+        html = file.read()
+
+    meta = {}
+    meta_path = os.path.splitext(path)[0] + ".json"
+    if os.path.isfile(meta_path):
+        with open(meta_path, "r", encoding="utf8") as file:
+            meta = json.load(file)
+
+    if meta.get("url", "") == "":
+        for pattern in SAVED_PAGE_URL_PATTERNS:
+            match = re.search(pattern, html)
+            if match != None:
+                meta["url"] = match.group(1).strip()
+                break
+
+    return html, meta
+
+def list_saved_pages(path: str):
+    """Return the saved pages of a directory and its sub-directories, or the path itself if it is a file."""
+    if os.path.isfile(path):
+        return [path]
+
+    paths = []
+    for dir_path, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(SAVED_PAGE_EXTENSIONS):
+                paths.append(os.path.join(dir_path, file_name))
+
+    return paths
+
+def convert_saved_pages(paths: list, workers = os.cpu_count(), **kwargs):
+    """Convert saved problem pages without network access on a process pool, return a list of result entries."""
+    return OfflineConverter(paths, workers, **kwargs).run()
+
+def crawl_contest(url: str, workers = DEFAULT_BATCH_WORKERS, **kwargs):
+    """Crawl every problem of a Codeforces contest or gym, return the result entries of the problems."""
+    contest_crawler = CodeforcesContestCrawler(url, workers, **kwargs)
+    contest_crawler.run()
+    return contest_crawler.results
+
+def crawl_many(urls: list, workers = DEFAULT_BATCH_WORKERS, per_site = DEFAULT_BATCH_PER_SITE, **kwargs):
+    """Crawl many problems in parallel, return a list of result entries (url, ok, seconds, error, ...)."""
+    return BatchCrawler(urls, workers, per_site, **kwargs).run()
+
+def read_url_file(path: str):
+    """Read the URLs from a file (one per line, '#' starts a comment), '-' reads from stdin."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf8") as file:
+            lines = file.read().splitlines()
+
+    return [line.split("#")[0].strip() for line in lines if line.split("#")[0].strip() != ""]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Cào nhiều bài cùng lúc, không cần giao diện.")
+    parser.add_argument("urls", nargs="*", help="Đường dẫn các bài cần cào")
+    parser.add_argument("-i", "--input", action="append", default=[], help="File chứa danh sách đường dẫn (mỗi dòng một bài, '-' để đọc từ stdin)")
+    parser.add_argument("-c", "--contest", action="append", default=[], help="Đường dẫn cuộc thi/gym Codeforces, cào toàn bộ bài trong cuộc thi")
+    parser.add_argument("--html-dir", action="append", default=[], help="Thư mục (hoặc file) chứa các trang đề đã lưu, chuyển đổi không cần mạng trên mọi nhân CPU")
+    parser.add_argument("-o", "--output", default=os.path.join(os.getcwd(), "output", "crawler"), help="Thư mục lưu đầu ra")
+    parser.add_argument("-w", "--workers", type=int, default=None, help=f"Số bài được cào cùng lúc (mặc định: {DEFAULT_BATCH_WORKERS}, số nhân CPU với --html-dir)")
+    parser.add_argument("--per-site", type=int, default=DEFAULT_BATCH_PER_SITE, help="Số bài được cào cùng lúc trên cùng một trang")
+    parser.add_argument("-t", "--site-type", default=None, choices=["DMOJ", "LQDOJ", "Codeforces", "CSLOJ"], help="Loại trang (mặc định: tự nhận diện)")
+    parser.add_argument("--cache-dir", default=None, help="Thư mục lưu bộ nhớ đệm HTTP (mặc định: không dùng bộ nhớ đệm)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_MAX_SIZE // 1024 // 1024, help="Dung lượng tối đa của bộ nhớ đệm HTTP (MB)")
+    parser.add_argument("--asset-store", default=None, help="Thư mục lưu chung ảnh/tệp tin giữa các bài, tránh tải trùng (mặc định: không dùng)")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Thời gian chờ kết nối tối đa mỗi yêu cầu (giây)")
+    parser.add_argument("--read-timeout", type=float, default=DEFAULT_READ_TIMEOUT, help="Thời gian chờ dữ liệu tối đa mỗi yêu cầu (giây)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Số lần thử lại khi yêu cầu thất bại")
+    parser.add_argument("--deadline", type=float, default=None, help="Thời gian tối đa cho mỗi bài (giây, mặc định: không giới hạn)")
+    parser.add_argument("--record", default=None, help="Ghi lại mọi yêu cầu HTTP vào thư mục này để chạy lại khi không có mạng")
+    parser.add_argument("--replay", default=None, help="Chạy lại từ thư mục đã ghi bằng --record, không truy cập mạng")
+    parser.add_argument("--incremental", action="store_true", help="Không xóa thư mục cũ, bỏ qua những bài có đề không thay đổi")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Cào bằng asyncio trong một luồng thay vì mỗi bài một luồng (nhanh hơn nếu có aiohttp)")
+    parser.add_argument("--engine", default="markdown", choices=["markdown", "tree"], help="Cách chuyển đổi đề: qua Markdown (mặc định) hoặc dựng cây tài liệu một lần rồi xuất mọi định dạng từ đó")
+    parser.add_argument("--formats", nargs="+", default=None, choices=list(OUTPUT_FORMATS), help="Chỉ xuất những định dạng này (mặc định: tất cả)")
+    parser.add_argument("--render-workers", type=int, default=1, help="Số định dạng của một bài được xuất cùng lúc (mặc định: 1, lần lượt từng định dạng)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="In toàn bộ nhật ký của từng bài")
+    args = parser.parse_args(argv)
+
+    urls = list(args.urls)
+    for path in args.input:
+        urls += read_url_file(path)
+
+    saved_pages = []
+    for path in args.html_dir:
+        saved_pages += list_saved_pages(path)
+
+    if len(urls) == 0 and len(args.contest) == 0 and len(saved_pages) == 0:
+        parser.error("Chưa có đường dẫn nào để cào.")
+
+    workers = args.workers if args.workers != None else DEFAULT_BATCH_WORKERS
+
+    cache = None
+    if args.cache_dir != None:
+        cache = HttpCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.record != None and args.replay != None:
+        parser.error("Không thể dùng --record và --replay cùng lúc.")
+
+    fixtures = None
+    if args.record != None:
+        fixtures = FixtureStore(args.record, "record")
+    elif args.replay != None:
+        fixtures = FixtureStore(args.replay, "replay")
+
+    session_pool = SessionPool(cache=cache, connect_timeout=args.connect_timeout, read_timeout=args.read_timeout, retries=args.retries,
+                               fixtures=fixtures)
+
+    asset_store = None
+    if args.asset_store != None:
+        asset_store = AssetStore(args.asset_store)
+
+    crawler_options = {"incremental": args.incremental, "deadline_seconds": args.deadline, "engine": args.engine, "formats": args.formats,
+                       "render_workers": args.render_workers}
+
+    batch_crawler_class = BatchCrawler
+    if args.use_async:
+        from async_engine import AsyncBatchCrawler
+        batch_crawler_class = AsyncBatchCrawler
+
+    results = []
+    for contest_url in args.contest:
+        contest_crawler = CodeforcesContestCrawler(contest_url, workers, args.output, args.verbose, session_pool, asset_store,
+                                                   crawler_options=crawler_options, batch_crawler_class=batch_crawler_class)
+        try:
+            batch = contest_crawler.run()
+        except Exception as e:
+            print(f"Không thể cào cuộc thi {contest_url}: {e}")
+            results.append({"url": contest_url, "ok": False})
+            continue
+        print(batch.summary())
+        results += batch.results
+
+    if len(urls) > 0:
+        batch = batch_crawler_class(urls, workers, args.per_site, args.output, args.site_type, args.verbose, session_pool, asset_store,
+                                    crawler_options)
+        batch.run()
+        print(batch.summary())
+        results += batch.results
+
+    if len(saved_pages) > 0:
+        batch = OfflineConverter(saved_pages, args.workers if args.workers != None else os.cpu_count(), args.output, args.site_type, args.verbose,
+                                 {"incremental": args.incremental, "engine": args.engine, "formats": args.formats,
+                                  "render_workers": args.render_workers})
+        batch.run()
+        print(batch.summary())
+        results += batch.results
+
+    if session_pool.cache != None:
+        session_pool.cache.close()
+        cache_stats = session_pool.cache.stats()
+        print(f"Bộ nhớ đệm HTTP: {cache_stats['hits']} lần dùng lại, {cache_stats['stored']} lần lưu mới, {cache_stats['entries']} mục ({round(cache_stats['size'] / 1024 / 1024, 3)} MB)")
+
+    if fixtures != None:
+        fixtures.close()
+    if fixtures != None and len(fixtures.missing) > 0:
+        print(f"Không tìm thấy {len(fixtures.missing)} yêu cầu trong thư mục đã ghi: {fixtures.missing}")
+
+    if asset_store != None:
+        asset_store.close()
+        asset_stats = asset_store.stats()
+        print(f"Kho tệp tin dùng chung: {asset_stats['reused']} lần dùng lại, {asset_stats['added']} tệp mới, {asset_stats['blobs']} tệp ({asset_stats['urls']} đường dẫn)")
+
+    return 0 if all(result["ok"] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,436 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from converter import Crawler
+from batch import QuietLogger, list_saved_pages, read_saved_page
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from network import HttpCache, SessionPool
+from mdlatex import create_latex_converter, markdown_to_latex
+from mathspan import MARKDOWN_MATH_PATTERN, CODEFORCES_MATH_PATTERN, rewrite_math_spans, process_equation, get_equation_cache_stats
+
+# Trimmed saved pages of every site family (DMOJ, LQDOJ, Codeforces, CSLOJ), checked when no page is given
+BENCHMARK_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark-pages")
+
+# Modules imported by the servers and the batch workers, they must not load the GUI libraries
+HEADLESS_MODULES = ["logger", "converter", "formatter", "batch", "async_engine"]
+GUI_MODULES = ["tkinter", "tkinterdnd2", "customtkinter", "PIL"]
+
+# Formulas of the generated statements, the small ones repeat many times like in real statements
+MATH_FORMULAS = ["n", "1 \\le n \\le 10^5", "a_i", "10^9 + 7", "x * y", "1 ≤ a_i ≤ 10^9", "\\sum_{i=1}^{n} a_i", "n - 1", "k", "(u, v)"]
+
+def util_time(function, repeat: int):
+    """Return the best time of the function over the runs, in milliseconds, and its last result."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best == None else min(best, elapsed)
+    return best, result
+
+def util_create_crawler(url: str, html: str, problem_site_type = None, **kwargs):
+    """Create a Crawler that works on a saved page instead of fetching it."""
+    crawler = Crawler(url, QuietLogger(), problem_site_type=problem_site_type, offline=True, **kwargs)
+    crawler.html_response = html
+    if crawler.problem_site_type == None:
+        crawler.detect_problem_site()
+    if crawler.problem_site_type == None:
+        crawler.problem_site_type = "DMOJ"
+    return crawler
+
+def util_normalize_markdown(markdown: str):
+    """Drop the trailing spaces and the extra blank lines, the engines do not put the same blank lines around the blocks."""
+    markdown = "\n".join(line.rstrip() for line in markdown.split("\n"))
+    return re.sub(r'\n{3,}', '\n\n', markdown).strip()
+
+def benchmark_engine(paths: list, repeat: int):
+    """Compare converting saved pages to every format with the document tree and through Markdown: speed and Markdown outputs."""
+    print(f"{'Trang':40} {'markdown (ms)':>14} {'tree (ms)':>11} {'x':>6}  Kết quả")
+
+    output_path_dir = tempfile.mkdtemp()
+    total_markdown = 0
+    total_tree = 0
+    mismatches = 0
+    for path in paths:
+        html, meta = read_saved_page(path)
+        if meta.get("url", "") == "":
+            print(f"{path:40} bỏ qua: không tìm thấy đường dẫn của bài")
+            continue
+
+        def convert(engine: str):
+            crawler = util_create_crawler(meta["url"], html, meta.get("problem_site_type"), engine=engine,
+                                          output_path_dir=output_path_dir)
+            crawler.get_base_problem()
+            crawler.prepare_problem_folder()
+            crawler.convert_problem()
+            results = []
+            for file_name in ["dmoj.md", "general.md"]:
+                with open(f"{crawler.output_problem_path_dir}/{file_name}", "r", encoding="utf8") as file:
+                    results.append(file.read())
+            return results
+
+        try:
+            markdown_ms, markdown_result = util_time(lambda: convert("markdown"), repeat)
+            tree_ms, tree_result = util_time(lambda: convert("tree"), repeat)
+        except Exception as e:
+            print(f"{path[-40:]:40} lỗi: {type(e).__name__}: {e}")
+            mismatches += 1
+            continue
+        total_markdown += markdown_ms
+        total_tree += tree_ms
+
+        different = [name for name, markdown_output, tree_output in zip(["dmoj.md", "general.md"], markdown_result, tree_result)
+                     if util_normalize_markdown(markdown_output) != util_normalize_markdown(tree_output)]
+        mismatches += len(different) > 0
+        state = "giống nhau" if len(different) == 0 else f"KHÁC: {different}"
+        print(f"{path[-40:]:40} {markdown_ms:14.3f} {tree_ms:11.3f} {markdown_ms / tree_ms:6.2f}  {state}")
+
+    shutil.rmtree(output_path_dir, ignore_errors=True)
+
+    if total_tree > 0:
+        print(f"Tổng: markdown {total_markdown:.3f} ms, tree {total_tree:.3f} ms, nhanh hơn {total_markdown / total_tree:.2f} lần; {mismatches} trang khác kết quả")
+
+    return mismatches
+
+def benchmark_markdown(paths: list, repeat: int):
+    """Compare the built-in HTML to Markdown converter with markdownify on saved pages: speed and identical Markdown."""
+    print(f"{'Trang':40} {'markdownify (ms)':>17} {'builtin (ms)':>13} {'x':>6}  Kết quả")
+
+    total_markdownify = 0
+    total_builtin = 0
+    mismatches = 0
+    for path in paths:
+        html, meta = read_saved_page(path)
+        if meta.get("url", "") == "":
+            print(f"{path:40} bỏ qua: không tìm thấy đường dẫn của bài")
+            continue
+
+        try:
+            crawlers = {}
+            for markdown_converter in ["markdownify", "builtin"]:
+                crawlers[markdown_converter] = util_create_crawler(meta["url"], html, meta.get("problem_site_type"),
+                                                                   markdown_converter=markdown_converter)
+                crawlers[markdown_converter].get_base_problem()
+            markdownify_ms, markdownify_result = util_time(crawlers["markdownify"].convert_html_to_markdown, repeat)
+            builtin_ms, builtin_result = util_time(crawlers["builtin"].convert_html_to_markdown, repeat)
+        except Exception as e:
+            print(f"{path[-40:]:40} lỗi: {type(e).__name__}: {e}")
+            mismatches += 1
+            continue
+        total_markdownify += markdownify_ms
+        total_builtin += builtin_ms
+
+        # The Markdown is compared as it is, the next stages read it line by line
+        state = "giống nhau"
+        if markdownify_result != builtin_result:
+            mismatches += 1
+            markdownify_lines = markdownify_result.split("\n")
+            builtin_lines = builtin_result.split("\n")
+            line = next((index for index, (a, b) in enumerate(zip(markdownify_lines, builtin_lines)) if a != b),
+                        min(len(markdownify_lines), len(builtin_lines)))
+            state = f"KHÁC từ dòng {line + 1}"
+        print(f"{path[-40:]:40} {markdownify_ms:17.3f} {builtin_ms:13.3f} {markdownify_ms / builtin_ms:6.2f}  {state}")
+
+    if total_builtin > 0:
+        print(f"Tổng: markdownify {total_markdownify:.3f} ms, builtin {total_builtin:.3f} ms, nhanh hơn {total_markdownify / total_builtin:.2f} lần; {mismatches} trang khác kết quả")
+
+    return mismatches
+
+def util_create_math_statements(count: int):
+    """Return a Codeforces HTML statement, a Markdown statement and its LaTeX conversion with count formulas each."""
+    html = []
+    markdown = []
+    for i in range(count):
+        formula = MATH_FORMULAS[i % len(MATH_FORMULAS)]
+        delimiter = "$$" if i % 7 == 0 else "$"
+        html.append(f"<p>Cho $$$<i>{formula}</i><sub class=\"lower-index\">{i % 10}</sub>$$$ và ${formula}$.</p>")
+        markdown.append(f"Cho {delimiter}{formula}{delimiter} với mọi phần tử thứ {i}.")
+
+    markdown = "\n\n".join(markdown)
+
+    # The LaTeX extension of Markdown writes the math as \(...\) and \[...\]
+    def to_latex(index: int, match: re.Match):
+        delimiter, formula = match.groups()
+        return f"\\({formula}\\)" if delimiter == "$" else f"\\[{formula}\\]"
+
+    latex = rewrite_math_spans(markdown, to_latex, MARKDOWN_MATH_PATTERN)
+
+    return "".join(html), markdown, latex
+
+def legacy_clean_codeforces_math(html: str):
+    """The replace-per-span loop used before mathspan.py, kept as the reference of the benchmark."""
+    for math_func_need in CODEFORCES_MATH_PATTERN.findall(html):
+        math_func_need_str = math_func_need[0] + math_func_need[1] + math_func_need[0]
+        math_func_str = math_func_need_str.replace('<i>', '').replace('</i>', '')
+        math_func_str = math_func_str.replace('<sup class="upper-index">', '^{').replace('</sup>', '}')
+        math_func_str = math_func_str.replace('<sub class="upper-index">', '^{').replace('</sub>', '}')
+        math_func_str = math_func_str.replace('<sup class="lower-index">', '_{').replace('</sup>', '}')
+        math_func_str = math_func_str.replace('<sub class="lower-index">', '_{').replace('</sub>', '}')
+        html = html.replace(math_func_need_str, math_func_str, 1)
+    return html
+
+def legacy_restore_latex_math(crawler: Crawler, markdown_content: str, result: str):
+    math_functions = re.findall(r'(\${1,2})((?:(?!\1)[\s\S])*)\1', markdown_content, re.DOTALL)
+    math_functions_need_replace = re.findall(r'(\\[\(|\[]((?:.|\n)*?)\\[\)|\]])', result, re.DOTALL)
+    for i, math_func_need in enumerate(math_functions_need_replace):
+        math_func_str = math_functions[i][0] + crawler.util_process_equation(math_functions[i][1]) + math_functions[i][0]
+        result = result.replace(math_func_need[0], math_func_str, 1)
+    return result
+
+def legacy_process_math_functions(crawler: Crawler, result: str):
+    for math_func_need in re.findall(r'(\${1,2})((?:(?!\1)[\s\S])*)\1', result, re.DOTALL):
+        math_func_need_str = math_func_need[0] + math_func_need[1] + math_func_need[0]
+        math_func_str = math_func_need[0] + crawler.util_process_equation(math_func_need[1]) + math_func_need[0]
+        result = result.replace(math_func_need_str, math_func_str, 1)
+    return result
+
+def benchmark_math(counts: list, repeat: int):
+    """Compare the math span rewriter with the replace-per-span loops on statements with more and more formulas."""
+    crawler = util_create_crawler("https://codeforces.com/contest/1/problem/A", "")
+    print(f"{'Công thức':>10} {'Bước':12} {'cũ (ms)':>11} {'mới (ms)':>11} {'x':>8}  Kết quả")
+
+    mismatches = 0
+    for count in counts:
+        html, markdown, latex = util_create_math_statements(count)
+        paths = [
+            ("codeforces", lambda: legacy_clean_codeforces_math(html), lambda: crawler.util_clean_codeforces_math(html)),
+            ("latex", lambda: legacy_restore_latex_math(crawler, markdown, latex), lambda: crawler.util_restore_latex_math(markdown, latex)),
+            ("markdown", lambda: legacy_process_math_functions(crawler, markdown), lambda: crawler.util_process_math_functions(markdown)),
+        ]
+        for name, legacy, rewriter in paths:
+            legacy_ms, legacy_result = util_time(legacy, repeat)
+            rewriter_ms, rewriter_result = util_time(rewriter, repeat)
+            mismatches += legacy_result != rewriter_result
+            state = "giống nhau" if legacy_result == rewriter_result else "KHÁC"
+            print(f"{count:>10} {name:12} {legacy_ms:11.3f} {rewriter_ms:11.3f} {legacy_ms / rewriter_ms:8.2f}  {state}")
+
+    equation_cache = get_equation_cache_stats()
+    print(f"Bộ nhớ đệm công thức: {equation_cache['hit_rate']:.1%} trúng, {equation_cache['size']}/{equation_cache['max_size']} công thức")
+
+    return mismatches
+
+def benchmark_equation(repeat: int):
+    """Compare converting the formulas of a statement with and without the memo of process_equation."""
+    formulas = [MATH_FORMULAS[i % len(MATH_FORMULAS)] + ("" if i % 3 else f" + {i}") for i in range(10000)]
+
+    def convert(function):
+        return [function(formula) for formula in formulas]
+
+    process_equation.cache_clear()
+    uncached_ms, uncached_result = util_time(lambda: convert(process_equation.__wrapped__), repeat)
+    cached_ms, cached_result = util_time(lambda: convert(process_equation), repeat)
+
+    equation_cache = get_equation_cache_stats()
+    state = "giống nhau" if uncached_result == cached_result else "KHÁC"
+    print(f"{len(formulas)} công thức: không nhớ {uncached_ms:.3f} ms, có nhớ {cached_ms:.3f} ms, nhanh hơn {uncached_ms / cached_ms:.2f} lần; {state}")
+    print(f"Bộ nhớ đệm công thức: {equation_cache['hit_rate']:.1%} trúng ({equation_cache['hits']}/{equation_cache['hits'] + equation_cache['misses']}), {equation_cache['size']}/{equation_cache['max_size']} công thức")
+
+    return uncached_result != cached_result
+
+def util_create_latex_documents(count: int):
+    """Return count Markdown statements of different sizes, some with references and raw HTML that a converter keeps."""
+    documents = []
+    for i in range(count):
+        _, markdown, _ = util_create_math_statements([10, 50, 200][i % 3])
+        if i % 2 == 0:
+            markdown += f"\n\nXem [đề gốc][goc] và <b>{i}</b>.\n\n[goc]: https://codeforces.com/problemset/problem/{i}/A"
+        else:
+            # Uses the reference of the previous statement, it must not be found
+            markdown += f"\n\nXem [đề gốc][goc] và <i>{i}</i>."
+        documents.append(markdown)
+    return documents
+
+def benchmark_latex(count: int, repeat: int):
+    """Compare a new Markdown to LaTeX converter per statement with the converter of the thread reset between them."""
+    documents = util_create_latex_documents(count)
+
+    startup_ms, _ = util_time(create_latex_converter, repeat)
+    fresh_ms, fresh_result = util_time(lambda: [create_latex_converter().convert(document) for document in documents], repeat)
+    pooled_ms, pooled_result = util_time(lambda: [markdown_to_latex(document) for document in documents], repeat)
+
+    # Every worker thread has its own converter
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        threaded_result = list(executor.map(markdown_to_latex, documents))
+
+    different = (fresh_result != pooled_result) + (fresh_result != threaded_result)
+    state = "giống nhau" if different == 0 else "KHÁC"
+    print(f"Tạo bộ chuyển đổi: {startup_ms:.3f} ms")
+    print(f"{count} đề: tạo mới mỗi đề {fresh_ms:.3f} ms ({fresh_ms / count:.3f} ms/đề), dùng lại {pooled_ms:.3f} ms "
+          f"({pooled_ms / count:.3f} ms/đề), nhanh hơn {fresh_ms / pooled_ms:.2f} lần; {state}")
+
+    return different
+
+def util_time_import(module: str):
+    """Import the module in a new interpreter, return its import time in milliseconds and the GUI modules it loaded."""
+    code = ("import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            f"import {module}\n"
+            "elapsed = (time.perf_counter() - start) * 1000\n"
+            f"print(json.dumps([elapsed, [name for name in {GUI_MODULES!r} if name in sys.modules]]))")
+    process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    if process.returncode != 0:
+        raise Exception(process.stderr.strip().splitlines()[-1])
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+def benchmark_imports(repeat: int):
+    """Time the import of the headless modules in new interpreters and check that none of them loads the GUI."""
+    print(f"{'Mô-đun':15} {'nhập (ms)':>11}  Thư viện giao diện")
+
+    failures = 0
+    # The GUI is the reference, it is allowed to load its libraries but may not be importable without them
+    for module in HEADLESS_MODULES + ["gui"]:
+        try:
+            results = [util_time_import(module) for _ in range(repeat)]
+        except Exception as e:
+            print(f"{module:15} {'-':>11}  lỗi: {e}")
+            failures += module != "gui"
+            continue
+
+        best_ms = min(elapsed for elapsed, _ in results)
+        loaded = results[-1][1]
+        failures += module != "gui" and len(loaded) > 0
+        print(f"{module:15} {best_ms:11.1f}  {', '.join(loaded) if len(loaded) > 0 else 'không'}")
+
+    return failures
+
+class CachedAssetHandler(BaseHTTPRequestHandler):
+    """Serve /<number> with an ETag, answer 304 to a matching If-None-Match."""
+
+    def do_GET(self):
+        body = f"asset {self.path}\n".encode("utf8") * 64
+        etag = '"' + self.path.strip("/") + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def benchmark_cache(count: int, repeat: int):
+    """Download assets from a local server through the HTTP cache, revalidate them, then download them again once
+    their cached bodies are deleted: the 304 of a missing body must fall back to a full download."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CachedAssetHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    cache_dir = tempfile.mkdtemp()
+    output_dir = tempfile.mkdtemp()
+    cache = HttpCache(cache_dir)
+    session_pool = SessionPool(cache=cache)
+    urls = [f"{base_url}/{index}" for index in range(count)]
+
+    def download_all():
+        return [session_pool.download(url, os.path.join(output_dir, str(index))) for index, url in enumerate(urls)]
+
+    failures = 0
+    try:
+        store_ms, _ = util_time(download_all, 1)
+        revalidate_ms, statuses = util_time(download_all, repeat)
+        failures += sum(status != 200 for status in statuses)
+        print(f"{count} tệp: tải lần đầu {store_ms:.3f} ms, kiểm tra lại (304) {revalidate_ms:.3f} ms "
+              f"({revalidate_ms / count:.3f} ms/tệp)")
+
+        # The bodies are gone but the index still has their validators, like after an eviction by another thread
+        for url in urls:
+            os.remove(os.path.join(cache_dir, cache.util_get_key(url)))
+        statuses = download_all()
+        missing = sum(status != 200 for status in statuses)
+        missing += sum(not os.path.exists(os.path.join(cache_dir, cache.util_get_key(url))) for url in urls)
+        failures += missing
+        print(f"Tải lại sau khi xóa nội dung trong bộ nhớ đệm: {'đúng' if missing == 0 else f'{missing} tệp lỗi'}")
+
+        # The last uses kept in memory are written when the cache is closed
+        cache.close()
+        reopened = HttpCache(cache_dir)
+        lost = sum(reopened.entries.get(key, {}).get("last_used") != entry["last_used"] for key, entry in cache.entries.items())
+        failures += lost
+        print(f"Chỉ mục sau khi đóng bộ nhớ đệm: {'đúng' if lost == 0 else f'{lost} mục không khớp'}")
+        reopened.close()
+    finally:
+        server.shutdown()
+        session_pool.close()
+        cache.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return failures
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Đo tốc độ các bước xử lý trên các trang đề đã lưu.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    math_parser = subparsers.add_parser("math", help="So sánh bộ viết lại công thức một lượt với cách thay thế từng công thức cũ")
+    math_parser.add_argument("-n", "--counts", type=int, nargs="+", default=[10, 100, 1000, 5000], help="Số công thức của các đề được tạo")
+    math_parser.add_argument("-r", "--repeat", type=int, default=3, help="Số lần chạy mỗi đề, lấy lần nhanh nhất")
+
+    engine_parser = subparsers.add_parser("engine", help="So sánh chuyển đổi qua cây tài liệu (tree) với chuyển đổi qua Markdown")
+    engine_parser.add_argument("paths", nargs="*", default=[BENCHMARK_PAGES_DIR], help="Các trang đã lưu hoặc thư mục chứa chúng (xem batch.py --html-dir), mặc định là các trang mẫu trong benchmark-pages")
+    engine_parser.add_argument("-r", "--repeat", type=int, default=5, help="Số lần chạy mỗi trang, lấy lần nhanh nhất")
+
+    markdown_parser = subparsers.add_parser("markdown", help="So sánh bộ chuyển đổi HTML sang Markdown có sẵn với markdownify")
+    markdown_parser.add_argument("paths", nargs="*", default=[BENCHMARK_PAGES_DIR], help="Các trang đã lưu hoặc thư mục chứa chúng (xem batch.py --html-dir), mặc định là các trang mẫu trong benchmark-pages")
+    markdown_parser.add_argument("-r", "--repeat", type=int, default=10, help="Số lần chạy mỗi trang, lấy lần nhanh nhất")
+
+    equation_parser = subparsers.add_parser("equation", help="So sánh xử lý công thức có và không có bộ nhớ đệm")
+    equation_parser.add_argument("-r", "--repeat", type=int, default=5, help="Số lần chạy, lấy lần nhanh nhất")
+
+    latex_parser = subparsers.add_parser("latex", help="So sánh tạo mới bộ chuyển đổi Markdown sang LaTeX mỗi đề với dùng lại bộ chuyển đổi của luồng")
+    latex_parser.add_argument("-n", "--count", type=int, default=200, help="Số đề được tạo")
+    latex_parser.add_argument("-r", "--repeat", type=int, default=3, help="Số lần chạy, lấy lần nhanh nhất")
+
+    cache_parser = subparsers.add_parser("cache", help="Kiểm tra tải tệp qua bộ nhớ đệm HTTP trên máy chủ cục bộ, kể cả khi nội dung đã lưu bị xóa")
+    cache_parser.add_argument("-n", "--count", type=int, default=200, help="Số tệp được tải")
+    cache_parser.add_argument("-r", "--repeat", type=int, default=3, help="Số lần kiểm tra lại, lấy lần nhanh nhất")
+
+    imports_parser = subparsers.add_parser("imports", help="Đo thời gian nhập các mô-đun không giao diện trong tiến trình mới, kiểm tra chúng không nạp thư viện giao diện")
+    imports_parser.add_argument("-r", "--repeat", type=int, default=5, help="Số lần chạy mỗi mô-đun, lấy lần nhanh nhất")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "engine":
+        paths = []
+        for path in args.paths:
+            paths += list_saved_pages(path)
+        return 1 if benchmark_engine(paths, args.repeat) > 0 else 0
+
+    if args.command == "markdown":
+        paths = []
+        for path in args.paths:
+            paths += list_saved_pages(path)
+        return 1 if benchmark_markdown(paths, args.repeat) > 0 else 0
+
+    if args.command == "math":
+        return 1 if benchmark_math(args.counts, args.repeat) > 0 else 0
+
+    if args.command == "equation":
+        return 1 if benchmark_equation(args.repeat) else 0
+
+    if args.command == "latex":
+        return 1 if benchmark_latex(args.count, args.repeat) > 0 else 0
+
+    if args.command == "cache":
+        return 1 if benchmark_cache(args.count, args.repeat) > 0 else 0
+
+    if args.command == "imports":
+        return 1 if benchmark_imports(args.repeat) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,21 @@
+import hashlib
+import io
 import json
 import os
 import re
+import threading
+import time
 import traceback
-import requests
-import markdown
-import markdownify
-import markdown2latex.mdx_latex as MDXLatex
 import warnings
-import unicodedata
-from gui import Logger
+from logger import Logger
+from network import SessionPool, DownloadPool, DeadlineExceeded, SESSION_POOL, DOWNLOAD_POOL, RETRY_EXCEPTIONS
+from assets import AssetStore
+from profiles import get_site_profile
+from router import route_url, get_site_type
+from mathspan import (MARKDOWN_MATH_PATTERN, CODEFORCES_MATH_PATTERN, LATEX_MATH_PATTERN, find_math_spans, rewrite_math_spans,
+                      process_equation)
+from renderer import OutputWriter, post_convert, render_spliced, get_render_pool
+from document import build_document, LatexEmitter, MarkdownEmitter
 
 SPECIAL_CHAR_BULLET = "―"
 LATEX_HEADER = """
@@ -38,36 +45,23 @@ LATEX_HEADER = """
 
 TESTCASE_INDICATOR_LIST = ["Sample", "Example", "Test", "Testcase", "Case", "Input", "Ví dụ", "Dữ liệu vào"]
 
-DMOJ_INDICATOR_LIST = """
-dmoj.ca
-cyboj.ddns.net
-oj.qnoi.info
-oj.vnoi.info
-tinhoctre.vn
-coder.husc.edu.vn
-oj.chuyenhalong.edu.vn
-dmoj.ctu.edu.vn
-hnoj.edu.vn
-chvoj.edu.vn
-oj.giftedbat.edu.vn
-claoj.edu.vn
-laptrinhonline.club
-ptnkoj.com
-laptrinh.ictu.edu.vn
-oj.lequydon.net
-oj.thptchuyenhatinh.edu.vn
-sqrtoj.edu.vn
-oj.vku.udn.vn
-oj.eiu.edu.vn
-"""
+# Output formats of a problem and their names in the logs, in the order they are converted
+OUTPUT_FORMATS = {
+    "latex_general": "LaTeX chung",
+    "latex_polygon": "LaTeX Polygon",
+    "latex_template": "LaTeX theo mẫu",
+    "md_general": "Markdown chung",
+    "md_dmoj": "Markdown DMOJ",
+}
 
-LQDOJ_INDICATOR_LIST = """
-lqdoj.edu.vn
-tleoj.edu.vn
-nbk.homes
-ltoj.edu.vn
-quangtrioj.edu.vn
-"""
+# Files of the Markdown formats, they do not show the metadata of the problem
+MARKDOWN_OUTPUT_FILES = {
+    "md_general": "general.md",
+    "md_dmoj": "dmoj.md",
+}
+
+# Quick copies of the GUI, computed on first use
+QUICK_COPIES = ["md_dmoj", "latex_polygon", "example_text", "example_md"]
 
 INSTRUCT_USING_MANUAL_VI = """
 Không thể chuyển đổi bài toán. Tuy nhiên có thể thử sử dụng phương pháp Thủ công:
@@ -82,26 +76,72 @@ Không thể chuyển đổi bài toán. Tuy nhiên có thể thử sử dụng
 class Crawler():
     def __init__(self, url: str, logger: Logger = Logger(), 
                  output_path_dir = os.path.join(os.getcwd(), "output", "crawler"),
-                 problem_site_type = None):
+                 problem_site_type = None,
+                 session_pool: SessionPool = SESSION_POOL,
+                 download_pool: DownloadPool = DOWNLOAD_POOL,
+                 asset_store: AssetStore = None,
+                 contest_info: dict = None,
+                 incremental = False,
+                 deadline_seconds: float = None,
+                 offline = False,
+                 markdown_converter = "builtin",
+                 engine = "markdown",
+                 formats: list = None,
+                 render_workers = 1):
         
         self.url = url
         self.logger = logger
         self.output_path_dir = output_path_dir
         self.problem_site_type = problem_site_type
+        self.session_pool = session_pool
+        self.download_pool = download_pool
+        self.asset_store = asset_store
+        self.contest_info = contest_info
+        self.incremental = incremental
+        self.deadline_seconds = deadline_seconds
+        self.deadline = None
+
+        # Offline conversion of a saved page: the embedded files and test ZIPs are not downloaded
+        self.offline = offline
+
+        # "builtin" converts the statement to Markdown in one walk of the page (htmlmarkdown.py), "markdownify" is the
+        # older markdownify conversion followed by the rewrites of the whole content
+        self.markdown_converter = markdown_converter
+
+        # "markdown" converts the statement to Markdown, then to LaTeX with the LaTeX extension of Markdown, "tree" builds
+        # a document tree once (document.py) and emits every format from it
+        self.engine = engine
+
+        # Output formats written by the conversion (OUTPUT_FORMATS), None writes every format
+        if formats == None:
+            formats = list(OUTPUT_FORMATS)
+        unknown_formats = [name for name in formats if name not in OUTPUT_FORMATS]
+        if len(unknown_formats) > 0:
+            raise Exception(f"Unknown output formats: {', '.join(unknown_formats)}")
+        self.formats = set(formats)
+
+        # The selected formats are rendered one after another, or concurrently on a shared pool of this many workers
+        self.render_workers = render_workers
 
         self.output_problem_path_dir = str()
         self.html_response = str()
         self.problem = dict()
         self.problem_folder_name = str()
-        self.result_latex_general = ""
-        self.result_latex_polygon = ""
-        self.result_latex_template = ""
-        self.result_md_dmoj = ""
-        self.result_md_general = ""
-        self.result_quick_copy_md_dmoj = ""
-        self.result_quick_copy_latex_polygon = ""
-        self.result_quick_copy_example_text = ""
-        self.result_quick_copy_example_md = ""
+        # Compiled rules of the site (profiles.py), selected once the problem site is known
+        self.site_profile = None
+        # Offsets of the old testcases in the base LaTeX content (util_find_example_region)
+        self.example_region = None
+        # Document tree of the statement, built by the "tree" engine
+        self.document = None
+        # The outputs are streamed to their files, the quick copies are computed on first use (get_quick_copy)
+        self.problem_converted = False
+        self.quick_copies = dict()
+
+        # Incremental re-crawl: outputs whose inputs did not change since the last crawl are not rewritten
+        self.problem_unchanged = False
+        self.previous_problem = None
+        self.content_changed = True
+        self.unchanged_outputs = set()
 
 
     def os_create_folder(self, folder_dir: str):
@@ -112,21 +152,20 @@ class Crawler():
         except FileExistsError:
             return False
 
+    def http_get(self, url: str):
+        """Send a GET request using the shared keep-alive session of the host, within the deadline of the crawl."""
+        return self.session_pool.get(url, self.deadline)
+
     def get_base_problem_dmoj(self):
         """Return and extract the raw problem content from a DMOJ-themed site."""
 
-        # Problem code is the part after the '/problem/' in the URL
-        problem_code = self.url.split("/problem/")[1]
-
-        # Remove the query string from the problem code
-        problem_code = re.sub(r'\/|\?.*', '', problem_code)
-
-        # Problem site is the part before the '/problem/' in the URL
-        problem_site = self.url.split("/problem/")[0]
-        problem_site = problem_site.split("://")[1]
+        # Problem code is the part after the '/problem/' in the URL, the site is the part before it
+        route = self.util_get_route()
+        problem_code = route.problem_code
+        problem_site = route.problem_site
 
         if self.html_response == str():
-            response = requests.get(self.url)
+            response = self.http_get(self.url)
             if(response.status_code != 200):
                 self.logger.log_and_status("[DMOJ] Không thể cào bài từ trang đã cho!", "err")
                 raise Exception("Failed to get problem from DMOJ-themed site")
@@ -136,15 +175,15 @@ class Crawler():
         
         # SPECIAL CASE: claoj.edu.vn
         if "claoj.edu.vn" in problem_site:
-            self.html_response = self.html_response.split('<div id="content-left" class="split-common-content">')
+            html_response = self.html_response.split('<div id="content-left" class="split-common-content">')
         else:
-            self.html_response = self.html_response.split('<iframe name="raw_problem" id="raw_problem"></iframe>')
+            html_response = self.html_response.split('<iframe name="raw_problem" id="raw_problem"></iframe>')
         
-        if len(self.html_response) == 1:
+        if len(html_response) == 1:
             self.logger.log("[DMOJ] Không thể phân chia rõ ràng nội dung đã cào, sẽ sử dụng toàn bộ nội dung.")
             
         # First half is the problem details
-        html_problem_details = self.html_response[0]
+        html_problem_details = html_response[0]
 
         # Extract the problem title, info entries, types, allowed langs, and content
         problem_title = html_problem_details.split('<h2 ')[1].split('</h2>')[0].split('>')[1].strip()
@@ -191,10 +230,10 @@ class Crawler():
             pass
 
         # Second half is the problem content using the last part of the split
-        html_problem_content = self.html_response[-1].split('src="/static/mathjax_config.js"></script>')[0]
+        html_problem_content = html_response[-1].split('src="/static/mathjax_config.js"></script>')[0]
         
         # Alternative method to extract the problem content
-        if len(self.html_response) == 1:
+        if len(html_response) == 1:
             html_problem_content = '<div id="' + html_problem_content.split('<div id="')[-2].strip().strip("\n")
         else:
             html_problem_content = html_problem_content.split('<hr>\n')[0].strip().strip("\n")
@@ -230,18 +269,13 @@ class Crawler():
     def get_base_problem_lqdoj(self):
         """Return and extract the raw problem content from LQDOJ - a strange af DMOJ-themed site"""
 
-        # Problem code is the part after the '/problem/' in the URL
-        problem_code = self.url.split("/problem/")[1]
-
-        # Remove the query string from the problem code
-        problem_code = re.sub(r'\/|\?.*', '', problem_code)
-
-        # Problem site is the part before the '/problem/' in the URL
-        problem_site = self.url.split("/problem/")[0]
-        problem_site = problem_site.split("://")[1]
+        # Problem code is the part after the '/problem/' in the URL, the site is the part before it
+        route = self.util_get_route()
+        problem_code = route.problem_code
+        problem_site = route.problem_site
 
         if self.html_response == str():
-            response = requests.get(self.url)
+            response = self.http_get(self.url)
             if(response.status_code != 200):
                 self.logger.log_and_status("[LQDOJ] Không thể cào bài từ trang đã cho!", "err")
                 raise Exception("Failed to get problem from LQDOJ")
@@ -250,12 +284,12 @@ class Crawler():
         # Extract the problem content from the response
         # SPECIAL CASE: nbk.homes
         if "nbk.homes" in problem_site:
-            self.html_response = self.html_response.split('<div id="content-left" class="split-common-content">')
+            html_response = self.html_response.split('<div id="content-left" class="split-common-content">')
         else:
-            self.html_response = self.html_response.split('<div class="md-typeset')
+            html_response = self.html_response.split('<div class="md-typeset')
         
         # First half is the problem details
-        html_problem_details = self.html_response[0]
+        html_problem_details = html_response[0]
 
         # Extract the problem title, info entries, types, allowed langs, and content
         problem_title = html_problem_details.split('<h2 ')[1].split('</h2>')[0].split('>')[1].strip()
@@ -283,10 +317,10 @@ class Crawler():
         problem_types = [problem_type.strip() for problem_type in problem_types]
 
         # Second half is the problem content
-        if(len(self.html_response) == 1):
-            html_problem_content = self.html_response[-1]
+        if(len(html_response) == 1):
+            html_problem_content = html_response[-1]
         else:
-            html_problem_content = self.html_response[1]
+            html_problem_content = html_response[1]
         html_problem_content = html_problem_content.split('<div id="comment-section">')[0]
         html_problem_content = "<div>\n" + html_problem_content.split('<hr>\n')[0].split('">',1)[-1].strip().strip("\n")
 
@@ -328,28 +362,23 @@ class Crawler():
     def get_base_problem_csloj(self):
         """Return and extract the raw problem content from CSLOJ."""
 
-        # Problem code is the part after the '/problem/' in the URL
-        problem_code = self.url.split("/problem/")[1]
-
-        # Remove the query string from the problem code
-        problem_code = re.sub(r'\/|\?.*', '', problem_code)
-
-        # Problem site is the part before the '/problem/' in the URL
-        problem_site = self.url.split("/problem/")[0]
-        problem_site = problem_site.split("://")[1]
+        # Problem code is the part after the '/problem/' in the URL, the site is the part before it
+        route = self.util_get_route()
+        problem_code = route.problem_code
+        problem_site = route.problem_site
 
         if self.html_response == str():
-            response = requests.get(self.url)
+            response = self.http_get(self.url)
             if(response.status_code != 200):
                 self.logger.log_and_status("[CSLOJ] Không thể cào bài từ trang đã cho!", "err")
                 raise Exception("Failed to get problem from CSLOJ")
             self.html_response = response.text
 
         # Extract the problem content from the response
-        self.html_response = self.html_response.split('<div class="ui grid">')
+        html_response = self.html_response.split('<div class="ui grid">')
 
         # First half is the problem details
-        html_problem_details = self.html_response[0]
+        html_problem_details = html_response[0]
 
         # Extract the problem title, info entries, types, allowed langs, and content
         problem_title = html_problem_details.split('<h1 ')[1].split('</h1>')[0].split('>')[1].strip()
@@ -371,11 +400,15 @@ class Crawler():
             entry_value = re.sub(r'<[^>]*>', '', entry_value).strip("\n")
             problem_info_entries[entry_name] = entry_value
 
-        html_problem_types = self.html_response[1].split('<h3 class="ui top attached block header">Đề bài</h3>')[1].split('<div class="row">')[1]
+        html_problem_types = html_response[1].split('<h3 class="ui top attached block header">Đề bài</h3>')[1].split('<div class="row">')[1]
         html_problem_types = html_problem_types.split(' label">')[1:]
 
         problem_types = [problem_type.split("</a>")[0].strip().strip('\n') for problem_type in html_problem_types]
 
+        # Second half is the problem content
+        html_problem_content = html_response[1].split('<h3 class="ui top attached block header">Đề bài</h3>')[1]
+        html_problem_content = html_problem_content.split('<div class="row">')[0].strip().strip("\n")
+
         # Special tag: ***** one that indicate the difficulty of the problem
         for prob_type in problem_types:
             rating = prob_type.count("⭐")
@@ -383,10 +416,6 @@ class Crawler():
                 problem_types.remove(prob_type)
                 problem_info_entries["độ khó"] = str(rating) + "/5 sao"
         
-        # Second half is the problem content
-        html_problem_content = self.html_response[1].split('<h3 class="ui top attached block header">Đề bài</h3>')[1]
-        html_problem_content = html_problem_content.split('<div class="row">')[0].strip().strip("\n")
-
         # Nuke the mathjax script preview
         html_problem_content = re.sub(r'<span class="mjpage"><svg xmlns((.|\n)+?)<title id="MathJax(.+?)">(.+?)</title>((.|\n)+?)</svg></span>', r'\(\4\)', html_problem_content, count = 0, flags=re.MULTILINE | re.DOTALL)
 
@@ -416,53 +445,9 @@ class Crawler():
 
         return self.problem
 
-    def get_base_problem_codeforces(self):
-        """Return and extract the raw problem content from a Codeforces site."""
-
-        # Convert problemset type URL to contest type URL using regex
-        # https://codeforces.com/problemset/problem/75/C -> https://codeforces.com/contest/75/problem/C
-        if "/problemset/problem/" in self.url:
-            self.url = re.sub(r'\/problemset\/problem\/(\d+)(\/[A-Z0-9]+)', r'/contest/\1/problem\2', self.url)
-
-        problem_site_type = "Codeforces"
-
-        # URL type classification
-        if ".contest.codeforces.com" in self.url:
-            codeforces_url_type = "contest"
-            problem_site_type = "CodeforcesCD"
-        elif "/gym/" in self.url:
-            codeforces_url_type = "gym"
-        else:
-            codeforces_url_type = "contest"
-        
-        # Problem code is the part after the '/problem/' in the URL
-        if codeforces_url_type == "gym":
-            problem_contest_id = self.url.split("/gym/")[1].split("/problem/")[0]
-        elif codeforces_url_type == "contest":
-            problem_contest_id = self.url.split("/contest/")[1].split("/problem/")[0]
-
-        # Problem order id is the part after the '/problem/' in the URL
-        problem_order_id = self.url.split("/problem/")[1]
-
-        # Problem code = Contest ID + Problem Order ID
-        problem_code = problem_contest_id + problem_order_id
-
-        # Remove the query string from the problem code
-        problem_code = re.sub(r'\/|\?.*', '', problem_code)
-
-        # Problem site is the part from the ".com" back to the first "/"
-        problem_site = self.url.split(".com")[0] + ".com"
-        problem_site = problem_site.split("://")[1]
-
-        if self.html_response == str():
-            response = requests.get(self.url)
-            if(response.status_code != 200):
-                self.logger.log_and_status("[Codeforces] Không thể cào bài từ trang đã cho!", "err")
-                raise Exception("Failed to get problem from Codeforces site")
-            self.html_response = response.text
-
-        # Extract contest name
-        html_sideboxes = self.html_response.split('<div class="roundbox sidebox borderTopRound " style="">')[1:]
+    def util_get_codeforces_contest_name(self, html: str, codeforces_url_type: str):
+        """Extract the contest name from the sideboxes of a Codeforces page."""
+        html_sideboxes = html.split('<div class="roundbox sidebox borderTopRound " style="">')[1:]
         problem_contest_name = ""
 
         for sidebox in html_sideboxes:
@@ -482,6 +467,48 @@ class Crawler():
             except:
                 continue
 
+        return problem_contest_name
+
+    def util_get_route(self):
+        """Return the parsed URL of the problem, the router parses each URL once per site type."""
+        return route_url(self.url, self.problem_site_type)
+
+    def util_normalize_url(self):
+        """Rewrite the URL to the form the parser of the site expects, before the page is fetched."""
+
+        # Convert problemset type URL to contest type URL
+        # https://codeforces.com/problemset/problem/75/C -> https://codeforces.com/contest/75/problem/C
+        if self.problem_site_type == "Codeforces":
+            self.url = self.util_get_route().url
+
+        return self.url
+
+    def get_base_problem_codeforces(self):
+        """Return and extract the raw problem content from a Codeforces site."""
+
+        self.util_normalize_url()
+
+        # Contest ID, problem order ID and URL type (contest or gym) are parsed from the URL
+        route = self.util_get_route()
+        problem_site_type = route.problem_site_type
+        codeforces_url_type = route.url_type
+        problem_contest_id = route.contest_id
+        problem_order_id = route.order_id
+        problem_code = route.problem_code
+        problem_site = route.problem_site
+
+        if self.html_response == str():
+            response = self.http_get(self.url)
+            if(response.status_code != 200):
+                self.logger.log_and_status("[Codeforces] Không thể cào bài từ trang đã cho!", "err")
+                raise Exception("Failed to get problem from Codeforces site")
+            self.html_response = response.text
+
+        if self.contest_info != None and self.contest_info.get("problem_contest_name", "") != "":
+            problem_contest_name = self.contest_info["problem_contest_name"]
+        else:
+            problem_contest_name = self.util_get_codeforces_contest_name(self.html_response, codeforces_url_type)
+
         # Extract the problem tags from the response
         problem_types = []
         try:
@@ -497,19 +524,19 @@ class Crawler():
             pass
 
         # Cut the response to the part that starts the problem
-        self.html_response = self.html_response.split('<div class="problem-statement">')[1]
+        html_response = self.html_response.split('<div class="problem-statement">')[1]
 
         # Extract the problem content from the response
-        self.html_response = self.html_response.split('</div></div><div>', 1)
+        html_response = html_response.split('</div></div><div>', 1)
         
         # Alternative method to extract the problem content
-        if len(self.html_response) == 1:
-            self.html_response = self.html_response[0].split('<div class="output-file output-standard">')
-            self.html_response[0] += self.html_response[1].split('<div>',1)[0]
-            self.html_response[1] = self.html_response[1].split('<div>',1)[1]
+        if len(html_response) == 1:
+            html_response = html_response[0].split('<div class="output-file output-standard">')
+            html_response[0] += html_response[1].split('<div>',1)[0]
+            html_response[1] = html_response[1].split('<div>',1)[1]
 
         # First half is the problem details
-        html_problem_details = self.html_response[0]
+        html_problem_details = html_response[0]
 
         # Extract the problem title, info entries, types, allowed langs, and content
         problem_title = html_problem_details.split('<div class="title">')[1].split('</div>')[0].strip()
@@ -526,7 +553,7 @@ class Crawler():
             problem_info_entries[entry_name] = entry_value
 
         # Second half is the problem content
-        html_problem_content = self.html_response[1].split('<script')[0]
+        html_problem_content = html_response[1].split('<script')[0]
         html_problem_content = "<div>" + html_problem_content.strip().strip("\n")
 
         # Uses <h4> tag instead of <div class=\"section-title\">, and </h4> instead of </div> using regex
@@ -536,18 +563,8 @@ class Crawler():
         html_problem_content = re.sub(r'<span class="tex-span">(.+?)</span>', r'$$$\1$$$', html_problem_content)
 
         # Try to replace as much old tex-inline style with the new format as possible
-        # First group is the number of dollar signs, second group is the content
-        math_functions = re.findall(r'(\${1,3})((?:(?!\1)[\s\S])*)\1', html_problem_content, re.DOTALL)
-        
-        for i, math_func_need in enumerate(math_functions):
-            math_func_need_str = str(math_func_need[0]) + str(math_func_need[1]) + str(math_func_need[0]) # The entire math function
-            math_func_str = math_func_need_str.replace('<i>', '').replace('</i>', '') # The math function without <i> tags
-            math_func_str = math_func_str.replace('<sup class="upper-index">', '^{').replace('</sup>', '}') # Replace upper index
-            math_func_str = math_func_str.replace('<sub class="upper-index">', '^{').replace('</sub>', '}') # Replace upper index
-            math_func_str = math_func_str.replace('<sup class="lower-index">', '_{').replace('</sup>', '}') # Replace lower index
-            math_func_str = math_func_str.replace('<sub class="lower-index">', '_{').replace('</sub>', '}') # Replace lower index
-            html_problem_content = html_problem_content.replace(math_func_need_str, math_func_str, 1)
-        
+        html_problem_content = self.util_clean_codeforces_math(html_problem_content)
+
 
         self.logger.status("[Codeforces] Đã cào nội dung đề bài thành công!", "info", False)
 
@@ -581,119 +598,111 @@ class Crawler():
 
         return self.problem
 
-    def get_files(self):
-        """Return the list of files embedded in the problem content."""
+    def util_get_file_jobs(self):
+        """Return the site files, the Imgur files, and the download jobs of the files embedded in the problem content."""
 
-        problem_content = str(self.problem["problem_content_raw"])
-        problem_site = self.problem["problem_site"]
-        
-        # Extract the files from the problem content
-        files = []
-        if self.problem_site_type == "DMOJ":
-            files = re.findall(r'\/martor(.+?)"', problem_content)
-        elif self.problem_site_type == "LQDOJ":
-            files = re.findall(r'\/media/pagedown-uploads(.+?)"', problem_content)
-        elif self.problem_site_type == "Codeforces":
-            files = re.findall(r'\/espresso.codeforces.com(.+?)"', problem_content)
-        elif self.problem_site_type == "CodeforcesCD":
-            files = re.findall(r'\/espresso(.+?)"', problem_content)
-        elif self.problem_site_type == "CSLOJ":
-            files = re.findall(r'\/images/problems(.+?)"', problem_content)
-
-        # Remove the duplicates
-        files = list(set(files))
-
-        # Remove empty strings
-        files = [file for file in files if file != ""]
-
-        # Download the files
-        for i, file in enumerate(files):
-            self.logger.status(f"[{self.problem_site_type}] Đang tải tệp tin {file}... ({i + 1}/{len(files)})", "info", False)
-            
-            response = None
-            # SPECIAL CASE: oj.lequydon.net
-            if "oj.lequydon.net" in problem_site:
-                response = requests.get(f"https://{problem_site}/media/martor/{file}")
-            elif self.problem_site_type == "DMOJ":
-                response = requests.get(f"https://{problem_site}/martor/{file}")
-            elif self.problem_site_type == "LQDOJ":
-                response = requests.get(f"https://{problem_site}/media/pagedown-uploads/{file}")
-            elif self.problem_site_type == "CodeforcesCD":
-                response = requests.get(f"https://{problem_site}/espresso/{file}")
-            elif self.problem_site_type == "Codeforces":
-                response = requests.get(f"https://espresso.codeforces.com/{file}")
-            elif self.problem_site_type == "CSLOJ":
-                response = requests.get(f"http://{problem_site}/images/problems/{file}")
-            
-            if(response.status_code != 200):
-                self.logger.log_and_status(f"[{self.problem_site_type}] Không thể tải tệp tin {file} do bị chặn. Vui lòng tải tệp này thủ công.", "err", False)
-                if (response.status_code > 400):
-                    continue
-                else:
-                    raise Exception(f"[{self.problem_site_type}] Failed to get file {file} from the site!")
-
-            # Save the file
-            with open(os.path.join(self.output_problem_path_dir, str(file).split("/")[-1]), "wb") as f:
-                f.write(response.content)
-            
-            self.logger.step(step=20/len(files), force_update=False)
+        # Extract the site files and the Imgur files from the problem content
+        files, external_files = self.site_profile.find_assets(str(self.problem["problem_content_raw"]))
+
+        # Each job is (tag, file, url, progress step)
+        jobs = []
+        for file in files:
+            jobs.append((self.problem_site_type, file, self.site_profile.get_asset_url(file), 20/len(files)))
 
+        for file in external_files:
+            jobs.append(("External-Imgur", file, self.site_profile.get_external_asset_url(file), 5/len(external_files)))
+
+        return files, external_files, jobs
+
+    def util_report_file_result(self, job: tuple, status_code: int, downloaded: int, total: int):
+        """Report a finished download, skip the file if it is blocked or unreachable, raise otherwise."""
+        tag, file, url, step = job
+        self.logger.status(f"[{tag}] Đã tải tệp tin {file}... ({downloaded}/{total})", "info", False)
+
+        if(status_code != 200):
+            self.logger.log_and_status(f"[{tag}] Không thể tải tệp tin {file} do bị chặn. Vui lòng tải tệp này thủ công.", "err", False)
+            if (status_code == None or status_code > 400):
+                return
+            else:
+                raise Exception(f"[{tag}] Failed to get file {file} from the site!")
+
+        self.logger.step(step=step, force_update=False)
+
+    def util_report_files_done(self, files: list, external_files: list):
+        """Report the number of downloaded files of each source."""
         if len(files) > 0:
             self.logger.log_and_status(f"[{self.problem_site_type}] Đã tải về {len(files)} file!", "info")
         else:
             self.logger.step(step=20, force_update=False)
 
-        # Imgur files
-        external_files = re.findall(r'\/i.imgur.com(.+?)"', problem_content)
-        external_files = list(set(external_files))
-        external_files = [file for file in external_files if file != ""]
-
-        for i, file in enumerate(external_files):
-            self.logger.status(f"[External-Imgur] Đang tải tệp tin đính ngoài {file}... ({i + 1}/{len(external_files)})", "info", False)
-
-            response = requests.get(f"https://i.imgur.com{file}")
-            if(response.status_code != 200):
-                self.logger.log_and_status(f"[External-Imgur] Không thể tải tệp tin {file} do bị chặn. Vui lòng tải tệp này thủ công.", "err", False)
-                if (response.status_code > 400):
-                    continue
-                else:
-                    raise Exception("[External-Imgur] Failed to get file {file} from the site!")
-
-            # Save the file
-            with open(os.path.join(self.output_problem_path_dir, str(file).split("/")[-1]), "wb") as f:
-                f.write(response.content)
-            
-            self.logger.step(step=5/len(files), force_update=False)
-
         if len(external_files) > 0:
             self.logger.log_and_status(f"[External-Imgur] Đã tải về {len(external_files)} file!", "info")
         else:
             self.logger.step(step=5, force_update=False)
 
+    def get_files(self):
+        """Return the list of files embedded in the problem content."""
+        files, external_files, jobs = self.util_get_file_jobs()
+
+        # Download the files concurrently, the progress is reported from this thread as they finish
+        for downloaded, (job, status_code) in enumerate(self.download_pool.run(jobs, self.util_download_file, lambda job: job[2])):
+            self.util_report_file_result(job, status_code, downloaded + 1, len(jobs))
+
+        self.util_report_files_done(files, external_files)
+
         return files
 
+    def util_download_file(self, job: tuple):
+        """Download a single file of a get_files job into the problem folder, return the status code (None if unreachable)."""
+        tag, file, url, step = job
+        file_path = os.path.join(self.output_problem_path_dir, str(file).split("/")[-1])
+
+        # Files kept from the last crawl are not downloaded again while the statement is unchanged, once it changed
+        # they may have changed too: they are fetched again, revalidated by the HTTP cache if any
+        if self.incremental and not self.content_changed and os.path.exists(file_path):
+            return 200
+
+        # Shared diagrams are stored once and linked into every problem folder
+        try:
+            if self.asset_store != None:
+                return self.asset_store.fetch(url, file_path, self.util_download_to_file)
+
+            return self.util_download_to_file(url, file_path)
+        except RETRY_EXCEPTIONS:
+            # Still failing after every retry, the file is skipped like a blocked one
+            return None
+
+    def util_download_to_file(self, url: str, file_path: str, on_progress = None):
+        """Stream the URL to a file in chunks, resuming it if a previous attempt was interrupted."""
+        return self.session_pool.download(url, file_path, on_progress, self.deadline)
+
     def get_zip_test_files(self):
         """ Get the test files from the server (if any). """
         if not self.problem_site_type == "CSLOJ": # Only CSLOJ has the test file download feature
             return
 
-        # Problem code is the part after the '/problem/' in the URL
-        problem_code = self.url.split("/problem/")[1]
-
-        # Remove the query string from the problem code
-        problem_code = re.sub(r'\/|\?.*', '', problem_code)
+        problem_code = self.util_get_route().problem_code
 
         self.logger.status(f"[{self.problem_site_type}] Đang tải file ZIP chứa test 'testcases-{problem_code}.zip'...", "info", False)
-        response = requests.get(f"http://csloj.ddns.net/problem/{problem_code}/testdata/download")
-        
-        if(response.status_code != 200):
+
+        def on_progress(done_bytes: int, total_bytes: int):
+            done_mb = round(done_bytes / 1024 / 1024, 1)
+            total_mb = "?" if total_bytes == None else round(total_bytes / 1024 / 1024, 1)
+            self.logger.status(f"[{self.problem_site_type}] Đang tải file ZIP chứa test 'testcases-{problem_code}.zip'... ({done_mb}/{total_mb} MB)", "info", False)
+
+        zip_file_path = os.path.join(self.output_problem_path_dir, f"testcases-{problem_code}.zip")
+        # The tests may have changed with the statement, the ZIP is then fetched again
+        if self.incremental and not self.content_changed and os.path.exists(zip_file_path):
+            self.logger.log(f"[{self.problem_site_type}] Giữ lại file ZIP chứa test 'testcases-{problem_code}.zip' từ lần cào trước.")
+            return
+
+        # Test ZIPs can be hundreds of MB, stream them to disk instead of holding them in memory
+        status_code = self.util_download_to_file(f"http://csloj.ddns.net/problem/{problem_code}/testdata/download", zip_file_path, on_progress)
+
+        if(status_code != 200):
             self.logger.log_and_status(f"[{self.problem_site_type}] Không thể tải file ZIP chứa test!", "err")
             return
 
-        # Save the file
-        with open(os.path.join(self.output_problem_path_dir, f"testcases-{problem_code}.zip"), "wb") as f:
-            f.write(response.content)
-        
         self.logger.log_and_status(f"[{self.problem_site_type}] Đã tải file ZIP chứa test 'testcases-{problem_code}.zip'!", "info", False)
 
     def get_testcases(self):
@@ -711,30 +720,8 @@ class Crawler():
         else:
             self.logger.log(f"[{self.problem_site_type}] Không tìm thấy chỉ báo test trong nội dung đề bài. Vui lòng kiểm tra lại nội dung đề bài.")
 
-        # Replace to make the content easier to parse
-        if self.problem_site_type == "DMOJ" or self.problem_site_type == "LQDOJ" or self.problem_site_type == "CSLOJ":
-            problem_content = problem_content.replace('<code>', '||begin||').replace('</code></pre>', '||end||')
-
-            # Remove the content after the last testcase
-            problem_content = problem_content[:problem_content.rfind('||end||') + len('||end||')]
-
-            # Remove all HTML tags
-            problem_content = re.sub(r'<[^>]*>', '\n', problem_content)
-        elif self.problem_site_type == "Codeforces" or self.problem_site_type == "CodeforcesCD":
-            problem_content = problem_content.replace('</div><pre>', '||begin||').replace('</pre></div>', '||end||')
-
-            # Remove the content after the last testcase
-            problem_content = problem_content[:problem_content.rfind('||end||') + len('||end||')]
-
-            # Codeforces uses <div> to differentiate the smaller testcases in a bigger one, 
-            # so we need to only replace the end tag with a newline, the begin tag will just be deleted
-            problem_content = re.sub(r'</[^>]*>', '\n', problem_content)
-
-            # some old problems uses <br /> instead of <div>
-            problem_content = re.sub(r'<br />', '\n', problem_content)
-
-            # remove other tags
-            problem_content = re.sub(r'<[^>]*>', '', problem_content)
+        # Mark the samples with "||begin||" and "||end||" and remove the HTML tags, in one pass
+        problem_content = self.site_profile.mark_samples(problem_content)
 
         # Extract the testcases from "||begin||" to "||end||"
         testcases = re.findall(r'\|\|begin\|\|(.+?)\|\|end\|\|', problem_content, re.DOTALL)
@@ -765,88 +752,98 @@ class Crawler():
 
         return testcases_separated
 
-    def generate_testcase_table(self, testcases: list, input_name: str, output_name: str):
-        """Generate a LaTeX table for the testcases."""
-        testcase_table = """
+    def render_testcase_table(self, testcases: list, input_name: str, output_name: str):
+        """Yield a LaTeX table for the testcases, chunk by chunk."""
+        yield """
 
 \\ttfamily
 \\begin{center}
 \\begin{tabularx}{1\\textwidth}{| >{\\raggedright\\arraybackslash}X | >{\\raggedright\\arraybackslash}X |}
 \\hline
 """
-        testcase_table += f"{input_name} & {output_name} \\\\ \n"
+        yield f"{input_name} & {output_name} \\\\ \n"
 
         for testcase in testcases:
-            testcase_table += f"\\hline\n{str(testcase[0]).replace("\n", "\\par ")} & {str(testcase[1]).replace("\n", "\\par ")} \\\\ \n"
+            yield f"\\hline\n{str(testcase[0]).replace("\n", "\\par ")} & {str(testcase[1]).replace("\n", "\\par ")} \\\\ \n"
 
-        testcase_table += "\\hline\n\\end{tabularx}\n\\end{center}\n\\rmfamily\n"
+        yield "\\hline\n\\end{tabularx}\n\\end{center}\n\\rmfamily\n"
 
-        return testcase_table
+    def render_testcase_list(self, testcases: list, input_name: str, output_name: str):
+        """Yield a list of testcases for the LaTeX content, chunk by chunk."""
+        yield "\n\n"
 
-    def generate_testcase_list(self, testcases: list, input_name: str, output_name: str):
-        """Generate a list of testcases for the LaTeX content."""
-        testcase_list = "\n\n"
-
-        testcase_list += f"\\textbf{{Input}}: {input_name} \n\n"
-        testcase_list += f"\\textbf{{Output}}: {output_name} \n\n"
+        yield f"\\textbf{{Input}}: {input_name} \n\n"
+        yield f"\\textbf{{Output}}: {output_name} \n\n"
 
         for i, testcase in enumerate(testcases):
-            testcase_list += f"\\textbf{{Testcase {i + 1}}} \\\\ \n"
-            testcase_list += "\\ttfamily\nInput:\n\\begin{lstlisting}"
-            testcase_list += f"\n{testcase[0]}\n"
-            testcase_list += f"\\end{{lstlisting}}\n"
-            testcase_list += "Output:\n\\begin{lstlisting}"
-            testcase_list += f"\n{testcase[1]}\n"
-            testcase_list += f"\\end{{lstlisting}}\n\\rmfamily\n\n"
+            yield f"\\textbf{{Testcase {i + 1}}} \\\\ \n"
+            yield "\\ttfamily\nInput:\n\\begin{lstlisting}"
+            yield f"\n{testcase[0]}\n"
+            yield f"\\end{{lstlisting}}\n"
+            yield "Output:\n\\begin{lstlisting}"
+            yield f"\n{testcase[1]}\n"
+            yield f"\\end{{lstlisting}}\n\\rmfamily\n\n"
 
-        return testcase_list
+    def render_testcase_text(self, testcases: list, input_name: str, output_name: str):
+        """Yield a list of testcases for the general content, chunk by chunk."""
+        yield "\n\n"
 
-    def generate_testcase_text(self, testcases: list, input_name: str, output_name: str):
-        """Generate a list of testcases for the general content."""
-        testcase_text = "\n\n"
+        yield f"Input: {input_name} \n"
+        yield f"Output: {output_name} \n"
+
+        for i, testcase in enumerate(testcases):
+            yield f"\nTestcase {i + 1}: \n"
+            yield f"\n{testcase[0]}\n"
+            yield f"\n====="
+            yield f"\n{testcase[1]}\n"
+
+    def render_testcase_md(self, testcases: list, input_name: str, output_name: str):
+        """Yield a list of testcases for the markdown content, chunk by chunk."""
+        yield "\n\n### Ví dụ\n\n"
 
-        testcase_text += f"Input: {input_name} \n"
-        testcase_text += f"Output: {output_name} \n"
+        yield f"- Input: {input_name}\n"
+        yield f"- Output: {output_name}\n\n"
 
         for i, testcase in enumerate(testcases):
-            testcase_text += f"\nTestcase {i + 1}: \n"
-            testcase_text += f"\n{testcase[0]}\n"
-            testcase_text += f"\n====="
-            testcase_text += f"\n{testcase[1]}\n"
+            yield f"#### Sample Input {i + 1} \n\n"
+            yield f"```\n{testcase[0]}\n```\n\n"
+            yield f"#### Sample Output {i + 1} \n\n"
+            yield f"```\n{testcase[1]}\n```\n\n"
 
-        return testcase_text
-    
-    def generate_testcase_md(self, testcases: list, input_name: str, output_name: str):
-        """Generate a list of testcases for the markdown content."""
-        testcase_text = "\n\n### Ví dụ\n\n"
-        
-        testcase_text += f"- Input: {input_name}\n"
-        testcase_text += f"- Output: {output_name}\n\n"
+    def render_testcase_exmp(self, testcases: list, input_name: str, output_name: str):
+        """Yield a list of testcases for the LaTeX content, chunk by chunk."""
+        yield "\n\n"
+
+        yield "\\begin{example}%\n"
 
         for i, testcase in enumerate(testcases):
-            testcase_text += f"#### Sample Input {i + 1} \n\n"
-            testcase_text += f"```\n{testcase[0]}\n```\n\n"
-            testcase_text += f"#### Sample Output {i + 1} \n\n"
-            testcase_text += f"```\n{testcase[1]}\n```\n\n"
+            yield "\\exmp{\n"
+            yield f"{testcase[0]}\n"
+            yield "}{\n"
+            yield f"{testcase[1]}\n"
+            yield "}%\n"
 
-        return testcase_text
+        yield "\\end{example}\n"
 
-    def generate_testcase_exmp(self, testcases: list, input_name: str, output_name: str):
-        """Generate a list of testcases for the LaTeX content."""
-        testcase_list = "\n\n"
+    def generate_testcase_table(self, testcases: list, input_name: str, output_name: str):
+        """Generate a LaTeX table for the testcases."""
+        return "".join(self.render_testcase_table(testcases, input_name, output_name))
 
-        testcase_list += "\\begin{example}%\n"
+    def generate_testcase_list(self, testcases: list, input_name: str, output_name: str):
+        """Generate a list of testcases for the LaTeX content."""
+        return "".join(self.render_testcase_list(testcases, input_name, output_name))
 
-        for i, testcase in enumerate(testcases):
-            testcase_list += "\\exmp{\n"
-            testcase_list += f"{testcase[0]}\n"
-            testcase_list += "}{\n"
-            testcase_list += f"{testcase[1]}\n"
-            testcase_list += "}%\n"
+    def generate_testcase_text(self, testcases: list, input_name: str, output_name: str):
+        """Generate a list of testcases for the general content."""
+        return "".join(self.render_testcase_text(testcases, input_name, output_name))
 
-        testcase_list += "\\end{example}\n"
+    def generate_testcase_md(self, testcases: list, input_name: str, output_name: str):
+        """Generate a list of testcases for the markdown content."""
+        return "".join(self.render_testcase_md(testcases, input_name, output_name))
 
-        return testcase_list
+    def generate_testcase_exmp(self, testcases: list, input_name: str, output_name: str):
+        """Generate a list of testcases for the LaTeX content."""
+        return "".join(self.render_testcase_exmp(testcases, input_name, output_name))
 
     def generate_problem_info(self):
         """Generate the problem information section for the LaTeX content."""
@@ -908,78 +905,135 @@ class Crawler():
 
         return problem_info
 
-    def util_replace_testcase(self, problem_content_latex: str, testcase_str: str, safe_replace = True):
-        """Replace the old testcases in the problem with the new testcases being generated."""
+    def util_find_example_region(self, problem_content_latex: str):
+        """Locate the examples of the LaTeX content once, from the line of the first testcase indicator to the last
+        listing. Return the start and end offsets and the text between them without the listings, None if not found."""
 
-        problem_testcase_content = problem_content_latex
-        # Remove the content before the first testcase, if not found, raise a warning
+        # Find the first testcase indicator, if not found, raise a warning
         for(indicator) in TESTCASE_INDICATOR_LIST:
-            ind = problem_testcase_content.find(indicator)
+            ind = problem_content_latex.find(indicator)
             if ind != -1:
-                # Find the last '\n' before the indicator
-                ind = problem_testcase_content.rfind('\n', 0, ind)
-
-                # Remove the content before the indicator
-                problem_testcase_content = problem_testcase_content[ind:]
+                # Start at the last '\n' before the indicator, or at the indicator on the first line
+                start = problem_content_latex.rfind('\n', 0, ind)
+                if start == -1:
+                    start = ind
                 break
         else:
             self.logger.log(f"[{self.problem_site_type}] Không tìm thấy chỉ báo test trong nội dung đề bài. Vui lòng kiểm tra lại nội dung đề bài.")
-            return problem_content_latex
-        
-        # Remove the content after the last testcase
-        problem_testcase_content = problem_testcase_content[:problem_testcase_content.rfind('\\end{lstlisting}') + len('\\end{lstlisting}')]
+            return None
+
+        # End after the last testcase, the region is empty if there is no listing after the indicator
+        end = problem_content_latex.rfind('\\end{lstlisting}', start)
+        end = start if end == -1 else end + len('\\end{lstlisting}')
+
+        # Remove every lstlisting block using regex
+        examples_without_listings = re.sub(r'\\begin{lstlisting}((.|\n)*?)\\end{lstlisting}', '', string=problem_content_latex[start:end], flags=(re.DOTALL | re.MULTILINE))
+
+        return start, end, examples_without_listings
+
+    def util_render_examples(self, testcase_chunks, safe_replace = True):
+        """Yield the new testcases replacing the old ones located by util_find_example_region."""
+        yield "\n\n\\subsubsection*{Example}\n\n"
+        yield from testcase_chunks
 
         if safe_replace:
-            problem_testcase_content_new = problem_testcase_content
-            # Remove every lstlisting block using regex
-            problem_testcase_content_new = re.sub(r'\\begin{lstlisting}((.|\n)*?)\\end{lstlisting}', '', string=problem_testcase_content_new, flags=(re.DOTALL | re.MULTILINE))
-            return problem_content_latex.replace(problem_testcase_content, "\n\n\\subsubsection*{Example}\n\n" + testcase_str + "\n\n" + problem_testcase_content_new)
-        else:
-            return problem_content_latex.replace(problem_testcase_content, "\n\n\\subsubsection*{Example}\n\n" + testcase_str)
+            # Keep the text around the old testcases
+            yield "\n\n" + self.example_region[2]
+
+    def util_clean_codeforces_math(self, html: str):
+        """Turn the HTML tags inside the math functions of a Codeforces statement into LaTeX."""
+
+        def clean(index: int, match: re.Match):
+            math_func_str = match.group().replace('<i>', '').replace('</i>', '') # The math function without <i> tags
+            math_func_str = math_func_str.replace('<sup class="upper-index">', '^{').replace('</sup>', '}') # Replace upper index
+            math_func_str = math_func_str.replace('<sub class="upper-index">', '^{').replace('</sub>', '}') # Replace upper index
+            math_func_str = math_func_str.replace('<sup class="lower-index">', '_{').replace('</sup>', '}') # Replace lower index
+            math_func_str = math_func_str.replace('<sub class="lower-index">', '_{').replace('</sub>', '}') # Replace lower index
+            return math_func_str
+
+        return rewrite_math_spans(html, clean, CODEFORCES_MATH_PATTERN)
+
+    def util_restore_latex_math(self, markdown_content: str, latex: str):
+        """Replace the math functions of the LaTeX content with the processed ones of the Markdown content.
+
+        The LaTeX extension of Markdown mangles the formulas, the n-th math function of the LaTeX content
+        is the n-th one of the Markdown content.
+        """
+        math_functions = find_math_spans(markdown_content, MARKDOWN_MATH_PATTERN)
+
+        def restore(index: int, match: re.Match):
+            delimiter, func_str = math_functions[index]
+            return delimiter + self.util_process_equation(func_str) + delimiter
+
+        return rewrite_math_spans(latex, restore, LATEX_MATH_PATTERN)
+
+    def util_process_math_functions(self, markdown_content: str):
+        """Process every math function of the Markdown content, keeping its delimiters."""
+
+        def process(index: int, match: re.Match):
+            delimiter, func_str = match.groups()
+            return delimiter + self.util_process_equation(func_str) + delimiter
+
+        return rewrite_math_spans(markdown_content, process, MARKDOWN_MATH_PATTERN)
 
     def util_process_equation(self, func_str: str):
         """Process the math functions to be converted to LaTeX format."""
-        
-        # Re-escape some special characters
-        func_str = func_str.replace("\\%", "%")
-        func_str = func_str.replace("%", "\\%")
-
-        # Fix some special characters cases:
-        func_str = func_str.replace("\\*", "\\times ")
-        func_str = func_str.replace("*", "\\times ")
-        func_str = func_str.replace("×", "\\times ")
-        func_str = func_str.replace("...", "\\dots ")
-        func_str = func_str.replace("…", "\\dots ")
-        func_str = func_str.replace("≤", "\\le ")
-        func_str = func_str.replace("≥", "\\ge ")
-        func_str = func_str.replace("−", "-")
-        func_str = func_str.replace(" ", "")
-        func_str = func_str.replace("’", "'")
-        func_str = func_str.replace("⇔", "\\Leftrightarrow ")
-        func_str = func_str.replace("≠", "\\neq ")
-        func_str = func_str.replace("δ", "\\delta ")
-        func_str = func_str.replace("Δ", "\\Delta ")
-        func_str = func_str.replace("∑", "\\sum ")
-        func_str = func_str.replace("∏", "\\prod ")
-        func_str = func_str.replace("√", "\\sqrt ")
-        func_str = func_str.replace("∈", "\\in ")
-        func_str = func_str.replace("∉", "\\notin ")
-        func_str = func_str.replace("∞", "\\infty ")
-        func_str = func_str.replace("∀", "\\forall ")
+        # Symbol table and memo of the formulas are in mathspan.py
+        return process_equation(func_str)
 
-        # Replace dollar sign 
-        func_str = func_str.replace("!!Dollar!!", "\\$")
+    def util_write_output(self, file_name: str, content: str):
+        """Write an output file into the problem folder, unless its inputs did not change since the last crawl."""
+        if file_name in self.unchanged_outputs:
+            return
 
-        return func_str
+        with open(os.path.join(self.output_problem_path_dir, file_name), "w", encoding="utf8") as file:
+            file.write(content)
+
+    def util_render_output(self, file_name: str, render):
+        """Stream an output file into the problem folder, unless its inputs did not change since the last crawl.
+        render(writer) writes the chunks of the file, they are post-converted on the way."""
+        if file_name in self.unchanged_outputs:
+            return
+
+        # Rendered next to the output and renamed over it once complete, a failed render keeps the last good file
+        path = os.path.join(self.output_problem_path_dir, file_name)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf8") as file:
+                writer = OutputWriter(file)
+                render(writer)
+                writer.close()
+            os.replace(temp_path, path)
+        except BaseException:
+            # Do not leave a truncated output behind
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def util_render_text(self, render):
+        """Return the post-converted text written by render(writer)."""
+        text = io.StringIO()
+        writer = OutputWriter(text)
+        render(writer)
+        writer.close()
+        return text.getvalue()
+
+    def util_hash_text(self, text: str):
+        """Return the SHA-256 of the text, used to detect changes between two crawls."""
+        return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+    def util_load_previous_problem(self):
+        """Return the problem saved by the last crawl of the same problem, None if there is none."""
+        try:
+            with open(os.path.join(self.output_problem_path_dir, "problem.json"), "r", encoding="utf8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
 
     def util_process_post_convert(self, problem_content: str):
         """Replace special characters and other modifications after the conversion."""
-        problem_content = problem_content.replace(" ", " ")
-        problem_content = problem_content.replace("—", "--")
-        problem_content = problem_content.replace("–", "--")
-
-        # Normalize the Unicode characters
-        return unicodedata.normalize("NFC", problem_content)
+        # The replacements are in renderer.py, the streamed outputs apply them chunk by chunk
+        return post_convert(problem_content)
 
     def convert_md_table_to_latex(self, md_table: str):
         """Convert a Markdown table to LaTeX format."""
@@ -1009,65 +1063,30 @@ class Crawler():
         result_str +=('\\end{center}')
         return result_str
 
+    def convert_to_document(self):
+        """Build the document tree of the problem content, every format is then emitted from it."""
+        self.document = build_document(self.problem["problem_content_raw"], self.site_profile, TESTCASE_INDICATOR_LIST)
+        return self.document
+
     def convert_html_to_markdown(self):
         """Convert HTML content to Markdown content."""
 
         html = self.problem["problem_content_raw"]
 
+        if self.markdown_converter != "markdownify":
+            # The rewrites of the site, the images and the code blocks are converted with the tags
+            from htmlmarkdown import html_to_markdown
+            result = html_to_markdown(html, self.site_profile)
+            self.problem["problem_content_md"] = result
+            return result
+
+        # Imported on first use, the "tree" engine and the headless imports of the crawler do not load BeautifulSoup
+        import markdownify
         result = markdownify.markdownify(html, heading_style="ATX", bullets="*")
 
-        # Replace dollar sign to prevent the math functions from being replaced
-        result = result.replace("\\$", "!!Dollar!!")
-
-        # Change the latex math delimiters
-        if (self.problem_site_type == "Codeforces"):
-            result = result.replace("$$$", "$")
-
-        # SPECIAL CASE: laptrinhonline.club and laptrinh.ictu.edu.vn
-        elif (self.problem_site_type == "LQDOJ" 
-            or self.problem_site_type == "CSLOJ"
-            or "laptrinhonline.club" in self.problem["problem_site"]
-            or "laptrinh.ictu.edu.vn" in self.problem["problem_site"]):
-            result = result.replace('\\(', '$')
-            result = result.replace('\\)', '$')
-            result = result.replace('\\[', '$$')
-            result = result.replace('\\]', '$$')
-        elif (self.problem_site_type == "DMOJ"):
-            result = result.replace("~", "$")
-
-        # Replace some special cases
-        result = result.replace("\\left(", "\\ (")
-        result = result.replace("\\right)", ")")
-        result = result.replace("\\left[", "\\ [")
-        result = result.replace("\\right]", "]")
-        result = result.replace("\\left{", "\\ {")
-        result = result.replace("\\right}", "}")
-        result = result.replace("\\left|", "|")
-        result = result.replace("\\right|", "|")
-
-        # Remove domain from image links
-
-        if (self.problem_site_type == "Codeforces"):
-            # Remove "https://codeforces.com/espresso/" from the image links
-            result = result.replace(f"https://{self.problem["problem_site"]}/espresso/", "")
-            
-        # SPECIAL CASE: oj.lequydon.net
-        elif ("oj.lequydon.net" in self.problem["problem_site"]):
-            # Remove "/media/martor/" from the image links
-            result = result.replace("/media/martor/", "")
-        # SPECIAL CASE: lqdoj.edu.vn
-        elif ("lqdoj.edu.vn" in self.problem["problem_site"]):
-            # Remove "https://cdn.lqdoj.edu.vn/media/pagedown-uploads/" from the image links
-            result = result.replace( "https://cdn.lqdoj.edu.vn/media/pagedown-uploads/", "")
-        elif (self.problem["problem_site_type"] == "DMOJ"):
-            # Remove "/martor/" from the image links
-            result = result.replace("/martor/", "")
-        elif (self.problem["problem_site_type"] == "LQDOJ"):
-            # Remove "/media/pagedown-uploads/" from the image links
-            result = result.replace("/media/pagedown-uploads/", "")
-        elif (self.problem["problem_site_type"] == "CSLOJ"):
-            # Remove "/images/problems/" from the image links
-            result = re.sub(r'/images/problems/(.+?)/', r'', result, flags=re.DOTALL)
+        # Protect the escaped dollar signs, change the latex math delimiters, replace some special cases
+        # and remove the domain from the image links, in one pass with the rewrites of the site
+        result = self.site_profile.rewrite_markdown(result)
         
         # Remove the mathoid link
         result = re.sub(r'!\[(.*?)\]\((.*?mathoid.*?)\)', '', result, flags=re.DOTALL)
@@ -1091,26 +1110,12 @@ class Crawler():
         """Base function to convert the problem content to LaTeX format."""
         markdown_content = self.problem["problem_content_md"]
 
-        md = markdown.Markdown()
-        latex_mdx = MDXLatex.LaTeXExtension()
-        latex_mdx.extendMarkdown(md)
-
-        # Convert the Markdown content to LaTeX
-        result = md.convert(markdown_content)
-
-        # Extract all math functions
-        
-        # First group is the number of dollar signs, second group is the content
-        math_functions = re.findall(r'(\${1,2})((?:(?!\1)[\s\S])*)\1', markdown_content, re.DOTALL)
-        
-        # First group is the entire math function, second group is the content
-        math_functions_need_replace = re.findall(r'(\\[\(|\[]((?:.|\n)*?)\\[\)|\]])', result, re.DOTALL)
+        # Convert the Markdown content to LaTeX, the converter of the thread is reused between problems
+        from mdlatex import markdown_to_latex
+        result = markdown_to_latex(markdown_content)
 
         # Replace the math functions in the latex content with the original math_function from markdown (the converter sucks)
-        for i, math_func_need in enumerate(math_functions_need_replace):
-            math_func_need_str = str(math_func_need[0]) # The entire math function
-            math_func_str = str(math_functions[i][0]) + self.util_process_equation(str(math_functions[i][1])) + str(math_functions[i][0]) # The original math function
-            result = result.replace(math_func_need_str, math_func_str, 1)
+        result = self.util_restore_latex_math(markdown_content, result)
 
         # Detect and convert the Markdown tables to LaTeX format
 
@@ -1141,74 +1146,70 @@ class Crawler():
         result = result.replace("!!EndCodeblock!!", "\n\\end{lstlisting}")
 
         self.problem["problem_content_latex_base"] = result
-        return result
 
-    def convert_to_latex_general(self):
-        """Convert the problem content to LaTeX format."""
-        result = self.problem["problem_content_latex_base"]
-
-        # Insert a table with the testcases
+        # Locate the old testcases once for every LaTeX format
+        self.example_region = None
         if len(self.problem.get("problem_testcases", [])) > 0:
-            testcase_str = self.generate_testcase_table(self.problem.get("problem_testcases", []), 
-                                                self.problem.get("problem_info_entries").get("input", "Input"), 
-                                                self.problem.get("problem_info_entries").get("output", "Output"))
+            self.example_region = self.util_find_example_region(result)
 
-            # Replace the old testcases format with the new testcases being generated
-            result = self.util_replace_testcase(result, testcase_str, (self.problem_site_type != "Codeforces"))
+        return result
 
-        # Replace only the first occurrence of "<root>" and last occurrence of "</root>" with the LaTeX header and footer
-        problem_info = self.generate_problem_info()
-        result = result.replace("<root>", LATEX_HEADER + problem_info, 1)
-        result = result[::-1].replace("</root>"[::-1], "\\end{document}"[::-1], 1)[::-1]
+    def render_latex(self, writer, header: str, footer: str, testcase_chunks = None, safe_replace = True):
+        """Write the base LaTeX content with its first "<root>" replaced by the header, its last "</root>" by the
+        footer and its old testcases by the testcase chunks, without building the document in memory."""
+        if self.document != None:
+            # The "tree" engine emits the LaTeX content from the document tree, its samples are the old testcases
+            if len(self.problem.get("problem_testcases", [])) == 0:
+                testcase_chunks = None
+            writer.write(header)
+            LatexEmitter(testcase_chunks, safe_replace).emit(self.document, writer)
+            writer.write(footer)
+            return
 
-        self.result_latex_general = self.util_process_post_convert(result)
-        with open(os.path.join(self.output_problem_path_dir, "general.tex"), "w", encoding="utf8") as file:
-            file.write(self.result_latex_general)
+        content = self.problem["problem_content_latex_base"]
+        edits = []
 
-    def convert_to_latex_polygon(self):
-        """Convert the problem content to LaTeX format for Polygon."""
-        result = self.problem["problem_content_latex_base"]
+        root_start = content.find("<root>")
+        if root_start != -1:
+            edits.append((root_start, root_start + len("<root>"), [header]))
 
-        # Make another version for quick copy
-        result_quick_copy = result
+        if testcase_chunks != None and self.example_region != None:
+            start, end, _ = self.example_region
+            edits.append((start, end, self.util_render_examples(testcase_chunks, safe_replace)))
 
-        # Insert a list with the testcases
-        if len(self.problem.get("problem_testcases", [])) > 0:
-            testcase_str = self.generate_testcase_list(self.problem.get("problem_testcases", []), 
-                                                self.problem.get("problem_info_entries").get("input", "Input"), 
-                                                self.problem.get("problem_info_entries").get("output", "Output"))
-            result = self.util_replace_testcase(result, testcase_str, (self.problem_site_type != "Codeforces"))
+        root_end = content.rfind("</root>")
+        if root_end != -1:
+            edits.append((root_end, root_end + len("</root>"), [footer]))
 
-            testcase_str = self.generate_testcase_text(self.problem.get("problem_testcases", []),
-                                                self.problem.get("problem_info_entries").get("input", "Input"), 
-                                                self.problem.get("problem_info_entries").get("output", "Output"))
+        render_spliced(writer, content, edits)
 
-            result_quick_copy = self.util_replace_testcase(result_quick_copy, testcase_str, (self.problem_site_type != "Codeforces"))
+    def util_get_testcase_args(self):
+        """Return the testcases and the input and output names given to the testcase renderers."""
+        return (self.problem.get("problem_testcases", []),
+                self.problem.get("problem_info_entries").get("input", "Input"),
+                self.problem.get("problem_info_entries").get("output", "Output"))
 
-        # Replace only the first occurrence of "<root>" and last occurrence of "</root>" with the LaTeX header and footer
+    def convert_to_latex_general(self):
+        """Convert the problem content to LaTeX format."""
+        safe_replace = (self.problem_site_type != "Codeforces")
         problem_info = self.generate_problem_info()
-        result = result.replace("<root>", LATEX_HEADER + problem_info, 1)
-        result = result[::-1].replace("</root>"[::-1], "\\end{document}"[::-1], 1)[::-1]
 
-        result_quick_copy = result_quick_copy.replace("<root>", problem_info, 1)
-        result_quick_copy = result_quick_copy[::-1].replace("</root>"[::-1], "", 1)[::-1]
+        # Insert a table with the testcases in place of the old ones, the file is written chunk by chunk
+        self.util_render_output("general.tex", lambda writer: self.render_latex(writer, LATEX_HEADER + problem_info, "\\end{document}",
+                                                                                self.render_testcase_table(*self.util_get_testcase_args()), safe_replace))
 
-        self.result_quick_copy_latex_polygon = self.util_process_post_convert(result_quick_copy)
-        
-        self.result_latex_polygon = self.util_process_post_convert(result)
-        with open(os.path.join(self.output_problem_path_dir, "polygon.tex"), "w", encoding="utf8") as file:
-            file.write(self.result_latex_polygon)
+    def convert_to_latex_polygon(self):
+        """Convert the problem content to LaTeX format for Polygon."""
+        safe_replace = (self.problem_site_type != "Codeforces")
+        problem_info = self.generate_problem_info()
+
+        # Insert a list with the testcases
+        self.util_render_output("polygon.tex", lambda writer: self.render_latex(writer, LATEX_HEADER + problem_info, "\\end{document}",
+                                                                                self.render_testcase_list(*self.util_get_testcase_args()), safe_replace))
 
     def convert_to_latex_template(self):
         """Convert the problem content to LaTeX format for Templates."""
-        result = self.problem["problem_content_latex_base"]
-
-        # Insert a table with the testcases
-        if len(self.problem.get("problem_testcases", [])) > 0:
-            testcase_str = self.generate_testcase_exmp(self.problem.get("problem_testcases", []), 
-                                                self.problem.get("problem_info_entries").get("input", "Input"), 
-                                                self.problem.get("problem_info_entries").get("output", "Output"))
-            result = self.util_replace_testcase(result, testcase_str, (self.problem_site_type != "Codeforces"))
+        safe_replace = (self.problem_site_type != "Codeforces")
 
         problem_info = "\\begin{statement}" + "[" + self.problem["problem_title"] + "]{" + self.problem["problem_code"] + "}{"
         problem_info += self.problem.get("problem_info_entries").get("input", "Input") + "}{" 
@@ -1217,26 +1218,23 @@ class Crawler():
         problem_info += self.generate_problem_info()
 
         problem_info += "\n\\InputFile\n\\OutputFile\n\\begin{scoring}\n\n\\end{scoring}\n"
-        result = result.replace("<root>", problem_info, 1)
-        result = result[::-1].replace("</root>"[::-1], "\\end{statement}"[::-1], 1)[::-1]
 
-        self.result_latex_template = self.util_process_post_convert(result)
-        with open(os.path.join(self.output_problem_path_dir, f"{self.problem["problem_code"]}.tex"), "w", encoding="utf8") as file:
-            file.write(self.result_latex_template)
+        # Insert the testcases as examples
+        self.util_render_output(f"{self.problem["problem_code"]}.tex", lambda writer: self.render_latex(writer, problem_info, "\\end{statement}",
+                                                                                self.render_testcase_exmp(*self.util_get_testcase_args()), safe_replace))
+
+    def render_md(self, writer, math_delimiter = "~"):
+        """Write the Markdown content with its math between the math delimiters: "~" for DMOJ, "$" for the others."""
+        if self.document != None:
+            # The "tree" engine emits the Markdown content from the document tree
+            MarkdownEmitter(math_delimiter).emit(self.document, writer)
+            return
 
-    def convert_to_md_dmoj(self, math_delimiter = "~"):
-        """Convert the problem content to Markdown format for DMOJ."""
         result = self.problem["problem_content_md"]
 
-        # First group is the number of dollar signs, second group is the content
-        math_functions = re.findall(r'(\${1,2})((?:(?!\1)[\s\S])*)\1', result, re.DOTALL)
+        # Process the math functions in place
+        result = self.util_process_math_functions(result)
 
-        # Replace the math functions in the latex content with the original math_function from markdown (the converter sucks)
-        for i, math_func_need in enumerate(math_functions):
-            math_func_need_str = str(math_func_need[0]) + str(math_func_need[1]) + str(math_func_need[0]) # The entire math function
-            math_func_str = str(math_functions[i][0]) + self.util_process_equation(str(math_functions[i][1])) + str(math_functions[i][0]) # Processed math function
-            result = result.replace(math_func_need_str, math_func_str, 1)
-        
         # Change back the math delimiters
         result = result.replace("$", math_delimiter)
 
@@ -1251,48 +1249,107 @@ class Crawler():
         # Replace dollar sign
         result = result.replace("!!Dollar!!", "\\$")
 
+        writer.write(result)
+
+    def convert_to_md_dmoj(self, math_delimiter = "~"):
+        """Convert the problem content to Markdown format for DMOJ."""
         if math_delimiter == "~":
-            self.result_md_dmoj = self.util_process_post_convert(result)
-            with open(os.path.join(self.output_problem_path_dir, "dmoj.md"), "w", encoding="utf8") as file:
-                file.write(self.result_md_dmoj)
+            self.util_render_output("dmoj.md", lambda writer: self.render_md(writer, "~"))
         elif math_delimiter == "$":
-            self.result_md_general = self.util_process_post_convert(result)
-            with open(os.path.join(self.output_problem_path_dir, "general.md"), "w", encoding="utf8") as file:
-                file.write(self.result_md_general)
+            self.util_render_output("general.md", lambda writer: self.render_md(writer, "$"))
+
+    def util_prepare_content(self, latex = False):
+        """Convert the problem content needed by a format that was not converted with the problem, like a quick copy."""
+        if self.engine == "tree":
+            if self.document == None:
+                self.convert_to_document()
+            return
+
+        if "problem_content_md" not in self.problem:
+            self.convert_html_to_markdown()
+
+        if latex:
+            if "problem_content_latex_base" not in self.problem:
+                self.convert_to_latex_base()
+            elif self.example_region == None and len(self.problem.get("problem_testcases", [])) > 0:
+                # The base LaTeX content of the last crawl, its old testcases are not located yet
+                self.example_region = self.util_find_example_region(self.problem["problem_content_latex_base"])
+
+    def get_quick_copy(self, name: str):
+        """Return a quick copy (QUICK_COPIES) of the converted problem, computed on first use, "" before the conversion."""
+        if not self.problem_converted:
+            return ""
+
+        if name not in self.quick_copies:
+            try:
+                self.quick_copies[name] = getattr(self, f"util_quick_copy_{name}")()
+            except Exception as e:
+                print(f"Error: {e}")
+                self.logger.log(f"[{self.problem_site_type}] Không thể tạo nội dung sao chép nhanh!")
+                return ""
+
+        return self.quick_copies[name]
+
+    def util_quick_copy_md_dmoj(self):
+        self.util_prepare_content()
+        return self.util_render_text(lambda writer: self.render_md(writer, "~"))
+
+    def util_quick_copy_latex_polygon(self):
+        # The Polygon statement without the LaTeX header, the testcases as text
+        self.util_prepare_content(latex=True)
+        safe_replace = (self.problem_site_type != "Codeforces")
+        problem_info = self.generate_problem_info()
+        return self.util_render_text(lambda writer: self.render_latex(writer, problem_info, "",
+                                                                      self.render_testcase_text(*self.util_get_testcase_args()), safe_replace))
+
+    def util_quick_copy_example_text(self):
+        return self.generate_testcase_text(*self.util_get_testcase_args())
+
+    def util_quick_copy_example_md(self):
+        return self.generate_testcase_md(*self.util_get_testcase_args())
+
+    @property
+    def result_quick_copy_md_dmoj(self):
+        return self.get_quick_copy("md_dmoj")
+
+    @property
+    def result_quick_copy_latex_polygon(self):
+        return self.get_quick_copy("latex_polygon")
+
+    @property
+    def result_quick_copy_example_text(self):
+        return self.get_quick_copy("example_text")
+
+    @property
+    def result_quick_copy_example_md(self):
+        return self.get_quick_copy("example_md")
 
     def detect_problem_site(self):
         """Detect the problem site from the URL."""
 
-        dmoj_list = DMOJ_INDICATOR_LIST.strip().strip("\n").splitlines()
-        lqdoj_list = LQDOJ_INDICATOR_LIST.strip().strip("\n").splitlines()
-
-        if "codeforces.com" in self.url:
-            self.problem_site_type = "Codeforces"
-            return "Codeforces"
-        
-        elif "csloj.ddns.net" in self.url:
-            self.problem_site_type = "CSLOJ"
-            return "CSLOJ"
-        
-        for lqdoj_indicator in lqdoj_list:
-            lqdoj_indicator = lqdoj_indicator.strip().strip("\n")
-            if lqdoj_indicator in self.url:
-                self.problem_site_type = "LQDOJ"
-                return "LQDOJ"
-        
-        for dmoj_indicator in dmoj_list:
-            dmoj_indicator = dmoj_indicator.strip().strip("\n")
-            if dmoj_indicator in self.url:
-                self.problem_site_type = "DMOJ"
-                return "DMOJ"
+        # The host is looked up in the host index of the router, then its parent domains
+        problem_site_type = get_site_type(self.url)
+        if problem_site_type != None:
+            self.problem_site_type = problem_site_type
 
-        return None
+        return problem_site_type
 
-    def main_converter(self):
-        """Main function."""
+    def start_crawl(self):
+        """Reset the progress and the state of the last crawl, start the deadline and detect the problem site."""
 
         self.logger.set_total_steps(100)
 
+        # The same Crawler may run again, nothing of its last crawl is reported for this one
+        self.problem_converted = False
+        self.quick_copies = dict()
+        self.problem_unchanged = False
+        self.content_changed = True
+        self.unchanged_outputs = set()
+
+        # Every network call of this crawl has to finish before the deadline
+        if self.deadline_seconds != None:
+            self.deadline = time.monotonic() + self.deadline_seconds
+
         if self.problem_site_type == None:
             self.detect_problem_site()
         
@@ -1307,6 +1364,9 @@ class Crawler():
 
         self.logger.log_and_status(f"[{self.problem_site_type}] Đang cào nội dung bài toán...\n", "info", False)
 
+    def get_base_problem(self):
+        """Extract the raw problem content using the parser of the detected site."""
+
         if self.problem_site_type == "Codeforces":
             # Get the raw problem content from the Codeforces site
             self.get_base_problem_codeforces()
@@ -1323,6 +1383,9 @@ class Crawler():
             # Get the raw problem content from the DMOJ site
             self.get_base_problem_dmoj()
 
+        # The rules of the site used by the next stages
+        self.site_profile = get_site_profile(self.problem_site_type, self.problem["problem_site"])
+
         self.problem_folder_name = self.problem["problem_site"] + '+' + self.problem["problem_code"]
         self.output_problem_path_dir = os.path.join(self.output_path_dir, self.problem_folder_name)
 
@@ -1330,8 +1393,38 @@ class Crawler():
 
         self.logger.log(f"=====\n\n[{self.problem_site_type}] Cào bài thành công! Toàn bộ tệp tin sẽ được lưu tại thư mục: '{self.problem_folder_name}'")
 
+        return self.problem
+
+    def prepare_problem_folder(self):
+        """Create the problem folder, return False if an incremental crawl found the problem unchanged."""
+
+        # Fingerprint the statement and the metadata to compare them with the last crawl
+        problem_meta = {key: value for key, value in self.problem.items() if key != "problem_content_raw"}
+        self.problem["problem_content_hash"] = self.util_hash_text(self.problem["problem_content_raw"])
+        self.problem["problem_meta_hash"] = self.util_hash_text(json.dumps(problem_meta, sort_keys=True, ensure_ascii=False))
+
+        self.previous_problem = None
+        if self.incremental:
+            self.previous_problem = self.util_load_previous_problem()
+
+        self.content_changed = self.previous_problem == None or self.previous_problem.get("problem_content_hash") != self.problem["problem_content_hash"]
+        meta_changed = self.previous_problem == None or self.previous_problem.get("problem_meta_hash") != self.problem["problem_meta_hash"]
+
+        # Formats whose files are up to date in the folder of the last crawl
+        previous_formats = set()
+        if self.previous_problem != None:
+            previous_formats = set(self.previous_problem.get("problem_formats", OUTPUT_FORMATS))
+
+        if not self.content_changed and not meta_changed and self.formats <= previous_formats:
+            return False
+
         # check if the output folder exists
-        if os.path.exists(self.output_problem_path_dir):
+        if self.previous_problem != None:
+            self.logger.log(f"Phát hiện thư mục cũ: '{self.problem_folder_name}', đề bài đã thay đổi, chỉ cập nhật những phần có thay đổi.")
+            if not self.content_changed:
+                # Only the LaTeX outputs show the metadata
+                self.unchanged_outputs = {file_name for name, file_name in MARKDOWN_OUTPUT_FILES.items() if name in previous_formats}
+        elif os.path.exists(self.output_problem_path_dir):
             self.logger.log(f"Phát hiện thư mục cũ: '{self.problem_folder_name}', thư mục sẽ được xóa và tạo lại.")
             import shutil
             shutil.rmtree(self.output_problem_path_dir)
@@ -1340,54 +1433,69 @@ class Crawler():
 
         self.logger.step(step=5, force_update=False)
 
-        self.logger.log_and_status(f"[{self.problem_site_type}] Đang lấy các tệp tin và ảnh...", "info", False)
-        self.get_files()
-        self.get_zip_test_files()
-        self.logger.step(step=5, force_update=False)
+        return True
+
+    def convert_problem(self):
+        """Extract the testcases, convert the problem content to every format and save the problem."""
 
         self.get_testcases()
         self.logger.step(step=5, force_update=False)
 
-        # Convert the base HTML problem content to Markdown
-        self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung HTML sang Markdown...", "info", False)
-        self.convert_html_to_markdown() 
-        self.logger.step(step=5, force_update=False)
+        if self.engine == "tree":
+            # Build the document tree of the HTML problem content once, instead of the Markdown and base LaTeX contents
+            self.logger.status(f"[{self.problem_site_type}] Đang dựng cây tài liệu từ nội dung HTML...", "info", False)
+            self.convert_to_document()
+            self.logger.step(step=10, force_update=False)
+        else:
+            # Convert the base HTML problem content to Markdown, every format is converted from it
+            if len(self.formats) > 0:
+                self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung HTML sang Markdown...", "info", False)
+                self.convert_html_to_markdown() 
+            self.logger.step(step=5, force_update=False)
 
-        # Convert the problem content to base LaTeX formats
-        self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung Markdown sang LaTeX...", "info", False)
-        self.convert_to_latex_base()
-        self.logger.step(step=5, force_update=False)
+            # Convert the problem content to base LaTeX formats, only needed by the LaTeX formats
+            if any(name.startswith("latex_") for name in self.formats):
+                self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung Markdown sang LaTeX...", "info", False)
+                self.convert_to_latex_base()
+            self.logger.step(step=5, force_update=False)
 
-        # Convert the problem content to LaTeX formats
-        self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung sang LaTeX chung...", "info", False)
-        self.convert_to_latex_general()
-        self.logger.step(step=5, force_update=False)
-        
-        self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung sang LaTeX Polygon...", "info", False)
-        self.convert_to_latex_polygon()
-        self.logger.step(step=5, force_update=False)
-        
-        self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung sang LaTeX theo mẫu...", "info", False)
-        self.convert_to_latex_template()
-        self.logger.step(step=5, force_update=False)
+        # Convert the problem content to the selected formats, the other ones are skipped
+        stages = {
+            "latex_general": self.convert_to_latex_general,
+            "latex_polygon": self.convert_to_latex_polygon,
+            "latex_template": self.convert_to_latex_template,
+            "md_general": lambda: self.convert_to_md_dmoj("$"),
+            "md_dmoj": lambda: self.convert_to_md_dmoj("~"),
+        }
+        written_formats = set(self.formats)
+        if self.render_workers > 1 and len(self.formats) > 1:
+            # The stages only read the converted content and write their own file, they run concurrently and a
+            # failed stage does not stop the other ones
+            self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung sang {len(self.formats)} định dạng cùng lúc...", "info", False)
+            selected_stages = [(name, stages[name]) for name in OUTPUT_FORMATS if name in self.formats]
+            for name, error in get_render_pool(self.render_workers).run(selected_stages):
+                if error != None:
+                    print(f"Error: {error}")
+                    self.logger.log(f"[{self.problem_site_type}] Không thể định dạng nội dung sang {OUTPUT_FORMATS[name]}!")
+                    written_formats.discard(name)
+            self.logger.step(step=5 * len(OUTPUT_FORMATS), force_update=False)
+        else:
+            for name, label in OUTPUT_FORMATS.items():
+                if name in self.formats:
+                    self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung sang {label}...", "info", False)
+                    stages[name]()
+                self.logger.step(step=5, force_update=False)
 
-        self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung sang Markdown chung...", "info", False)
-        self.convert_to_md_dmoj("$")
-        self.logger.step(step=5, force_update=False)
-        
-        self.logger.status(f"[{self.problem_site_type}] Đang định dạng nội dung sang Markdown DMOJ...", "info", False)
-        self.convert_to_md_dmoj("~")
-        self.logger.step(step=5, force_update=False)
+        # The Markdown files kept from the last crawl are still up to date
+        written_formats |= {name for name, file_name in MARKDOWN_OUTPUT_FILES.items() if file_name in self.unchanged_outputs}
+        self.problem["problem_formats"] = [name for name in OUTPUT_FORMATS if name in written_formats]
 
-        self.result_quick_copy_md_dmoj = self.result_md_dmoj
-        self.result_quick_copy_example_text = self.generate_testcase_text(self.problem.get("problem_testcases", []),
-                                                self.problem.get("problem_info_entries").get("input", "Input"), 
-                                                self.problem.get("problem_info_entries").get("output", "Output"))
-        self.result_quick_copy_example_md = self.generate_testcase_md(self.problem.get("problem_testcases", []),
-                                                self.problem.get("problem_info_entries").get("input", "Input"), 
-                                                self.problem.get("problem_info_entries").get("output", "Output"))
+        self.problem_converted = True
+        self.quick_copies = dict()
 
-        self.logger.log(f"[{self.problem_site_type}] Hoàn tất định dạng nội dung sang LaTex (chung, Polygon, theo mẫu), Markdown (chung, DMOJ)!")
+        labels = [label for name, label in OUTPUT_FORMATS.items() if name in self.formats and name in written_formats]
+        if len(labels) > 0:
+            self.logger.log(f"[{self.problem_site_type}] Hoàn tất định dạng nội dung sang {', '.join(labels)}!")
 
         # Save the problem to a JSON file
         with open(os.path.join(self.output_problem_path_dir, "problem.json"), "w", encoding="utf8") as file:
@@ -1398,6 +1506,40 @@ class Crawler():
 
         return self.problem
 
+    def main_converter(self):
+        """Main function."""
+
+        self.start_crawl()
+        self.get_base_problem()
+
+        if not self.prepare_problem_folder():
+            return self.util_reuse_previous_problem(self.previous_problem)
+
+        if self.content_changed and not self.offline:
+            self.logger.log_and_status(f"[{self.problem_site_type}] Đang lấy các tệp tin và ảnh...", "info", False)
+            self.get_files()
+            self.get_zip_test_files()
+        else:
+            self.logger.step(step=25, force_update=False)
+        self.logger.step(step=5, force_update=False)
+
+        return self.convert_problem()
+
+    def util_reuse_previous_problem(self, previous_problem: dict):
+        """Finish an incremental crawl of an unchanged problem using the outputs of the last crawl."""
+        self.logger.log_and_status(f"[{self.problem_site_type}] Đề bài không thay đổi kể từ lần cào trước, bỏ qua tải tệp tin và định dạng lại.", "info", False)
+
+        self.problem = previous_problem
+        self.problem_unchanged = True
+
+        self.problem_converted = True
+        self.quick_copies = dict()
+
+        self.logger.step(completed=True)
+        self.logger.status(f"[{self.problem_site_type}] Đã hoàn tất định dạng nội dung bài toán!", "ok")
+
+        return self.problem
+
     def crawl(self):
         """Crawl the problem content from the URL."""
 
@@ -1408,6 +1550,8 @@ class Crawler():
             self.main_converter()
         except Exception as e:
             print(f"Error: {e}")
+            if isinstance(e, DeadlineExceeded):
+                self.logger.log(f"Đã quá thời gian cho phép ({self.deadline_seconds} giây) khi cào bài.")
             if e:
                 self.problem_site_type = prev_problem_site_type
                 self.problem = dict()
@@ -0,0 +1,559 @@
+import re
+from html.parser import HTMLParser
+from typing import NamedTuple
+from mathspan import MARKDOWN_MATH_PATTERN, process_equation
+from profiles import MARKDOWN_REWRITES
+
+# The document tree of a statement, built once from the HTML content and emitted to every format.
+# Inline nodes: Text, Math, Code, Styled, Link, Image, LineBreak
+# Block nodes: Heading, Paragraph, CodeBlock, ItemList, Table, Quote, Rule, Samples
+
+class Text(NamedTuple):
+    text: str
+
+class Math(NamedTuple):
+    # The formula as written on the site, without its delimiters
+    formula: str
+    # $$...$$ instead of $...$
+    display: bool
+
+class Code(NamedTuple):
+    text: str
+
+class Styled(NamedTuple):
+    # "strong" or "em"
+    style: str
+    children: list
+
+class Link(NamedTuple):
+    href: str
+    children: list
+
+class Image(NamedTuple):
+    # Link of the image without the prefix of the site, the same as the downloaded file
+    src: str
+
+class LineBreak(NamedTuple):
+    pass
+
+class Heading(NamedTuple):
+    level: int
+    children: list
+
+class Paragraph(NamedTuple):
+    children: list
+
+class CodeBlock(NamedTuple):
+    text: str
+
+class ItemList(NamedTuple):
+    ordered: bool
+    # Every item is a list of blocks
+    items: list
+    # Number of the first item of an ordered list
+    start: int = 1
+
+class Table(NamedTuple):
+    # Every row is a list of cells, every cell is a list of inline nodes
+    rows: list
+    # The first row is the header, its cells are <th> or it is in <thead>
+    header: bool = True
+
+class Quote(NamedTuple):
+    children: list
+
+class Rule(NamedTuple):
+    pass
+
+class Samples(NamedTuple):
+    # The blocks from the first testcase indicator to the last code block, the LaTeX formats replace them with
+    # the testcases of the problem
+    children: list
+
+class Document(NamedTuple):
+    children: list
+
+class Element(NamedTuple):
+    """An HTML element, before it becomes a node of the document tree."""
+    tag: str
+    attrs: dict
+    children: list
+
+# Tags without an end tag
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Tags whose content is not part of the statement
+SKIPPED_TAGS = {"head", "iframe", "noscript", "script", "style", "template", "title"}
+
+# Tags that start a block, the other tags are inline
+BLOCK_TAGS = {"address", "article", "aside", "blockquote", "center", "dd", "details", "div", "dl", "dt", "fieldset",
+              "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+              "nav", "ol", "p", "pre", "section", "summary", "table", "ul"}
+
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+# Inline tags kept as Styled nodes, the content of the other inline tags is kept without them
+STYLE_TAGS = {"strong": "strong", "b": "strong", "em": "em", "i": "em"}
+
+# Inline tags kept as Code nodes
+CODE_TAGS = {"code", "kbd", "samp"}
+
+# Strikethrough tags, their "~~" markers are kept in the text like the markdown engine does, which does not convert
+# <strike> either
+STRIKE_TAGS = {"del", "s"}
+
+# A run of whitespace is one space, or one line break if it has one, like markdownify
+WHITESPACE_PATTERN = re.compile(r'[ \t\r\n\f]+')
+
+# Stands for an escaped dollar sign while the math of a text is split, it never reaches the outputs
+ESCAPED_DOLLAR = "\x00"
+
+class ElementParser(HTMLParser):
+    def __init__(self):
+        """Parse HTML into a tree of Element, closing the tags the page left open."""
+        super().__init__(convert_charrefs=True)
+        self.root = Element("root", {}, [])
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag: str, attrs: list):
+        element = Element(tag, dict(attrs), [])
+        self.stack[-1].children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_endtag(self, tag: str):
+        # Close the tag and the tags left open inside it, an end tag without a start tag is ignored
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data: str):
+        self.stack[-1].children.append(data)
+
+def util_iter_nodes(node):
+    """Yield the node and every node inside it, in order."""
+    yield node
+
+    if isinstance(node, ItemList):
+        children = [block for item in node.items for block in item]
+    elif isinstance(node, Table):
+        children = [inline for row in node.rows for cell in row for inline in cell]
+    else:
+        children = getattr(node, "children", [])
+
+    for child in children:
+        yield from util_iter_nodes(child)
+
+def util_plain_text(node):
+    """Return the text of the node and of the nodes inside it."""
+    texts = []
+    for child in util_iter_nodes(node):
+        if isinstance(child, (Text, Code, CodeBlock)):
+            texts.append(child.text)
+        elif isinstance(child, Math):
+            texts.append(child.formula)
+    return "".join(texts)
+
+class DocumentBuilder():
+    def __init__(self, site_profile, indicators: list):
+        """Build the document tree of a statement, with the math delimiters and image links of the site profile.
+        The samples start at the first of the testcase indicators found in the statement."""
+        self.site_profile = site_profile
+        self.indicators = indicators
+
+    def build(self, html: str):
+        parser = ElementParser()
+        parser.feed(html)
+        parser.close()
+
+        blocks = self.util_build_blocks(parser.root.children)
+        return Document(self.util_mark_samples(blocks))
+
+    def util_build_blocks(self, nodes: list):
+        """Return the blocks of the HTML nodes, the inline content between two blocks becomes a paragraph."""
+        blocks = []
+        inline = []
+        for node in nodes:
+            if isinstance(node, Element) and node.tag in SKIPPED_TAGS:
+                continue
+
+            if isinstance(node, Element) and node.tag in BLOCK_TAGS:
+                self.util_add_paragraph(blocks, inline)
+                inline = []
+                blocks += self.util_build_block(node)
+            else:
+                inline.append(node)
+
+        self.util_add_paragraph(blocks, inline)
+        return blocks
+
+    def util_add_paragraph(self, blocks: list, nodes: list):
+        children = self.util_strip_inlines(self.util_build_inlines(nodes))
+        if len(children) > 0:
+            blocks.append(Paragraph(children))
+
+    def util_build_block(self, element: Element):
+        """Return the blocks of a block element, the containers (div, section, details...) are flattened."""
+        tag = element.tag
+
+        if tag in HEADING_LEVELS:
+            children = self.util_strip_inlines(self.util_build_inlines(element.children))
+            return [Heading(HEADING_LEVELS[tag], children)] if len(children) > 0 else []
+
+        if tag == "pre":
+            return [CodeBlock(self.util_code_text(element).strip("\n"))]
+
+        if tag in ("ul", "ol"):
+            items = []
+            for child in element.children:
+                if isinstance(child, Element) and child.tag == "li":
+                    items.append(self.util_build_blocks(child.children))
+                elif isinstance(child, Element) or child.strip() != "":
+                    # Content outside of the items, kept as an item of its own
+                    item = self.util_build_blocks([child])
+                    if len(item) > 0:
+                        items.append(item)
+            start = element.attrs.get("start")
+            start = int(start) if tag == "ol" and start and start.isnumeric() else 1
+            return [ItemList(tag == "ol", items, start)] if len(items) > 0 else []
+
+        if tag == "table":
+            rows = []
+            header = None
+            for row, in_head in self.util_find_rows(element):
+                cells = [cell for cell in row.children if isinstance(cell, Element) and cell.tag in ("td", "th")]
+                if len(cells) == 0:
+                    continue
+                if header == None:
+                    header = in_head or all(cell.tag == "th" for cell in cells)
+                rows.append([self.util_strip_inlines(self.util_build_inlines(cell.children)) for cell in cells])
+            return [Table(rows, header)] if len(rows) > 0 else []
+
+        if tag == "blockquote":
+            return [Quote(self.util_build_blocks(element.children))]
+
+        if tag == "hr":
+            return [Rule()]
+
+        return self.util_build_blocks(element.children)
+
+    def util_find_rows(self, element: Element, in_head = False):
+        """Return the rows of a table, in its head, body and foot, without the rows of the tables inside it.
+        Every row is (row, whether it is in the head)."""
+        rows = []
+        for child in element.children:
+            if not isinstance(child, Element) or child.tag == "table":
+                continue
+            if child.tag == "tr":
+                rows.append((child, in_head))
+            else:
+                rows += self.util_find_rows(child, in_head or child.tag == "thead")
+        return rows
+
+    def util_code_text(self, element: Element):
+        """Return the text of a code element as it is shown, the blocks inside it and <br> are line breaks."""
+        pieces = []
+        for child in element.children:
+            if isinstance(child, str):
+                pieces.append(child)
+            elif child.tag == "br":
+                pieces.append("\n")
+            elif child.tag not in SKIPPED_TAGS:
+                text = self.util_code_text(child)
+                # Codeforces writes every line of its samples in a <div>, the blocks are between blank lines like
+                # the markdown engine writes them
+                if child.tag in BLOCK_TAGS:
+                    text = f"\n\n{text.strip()}\n\n" if text.strip() != "" else ""
+                pieces.append(text)
+        return "".join(pieces)
+
+    def util_build_inlines(self, nodes: list):
+        """Return the inline nodes of the HTML nodes, the math of their text split from it."""
+        inlines = []
+        self.util_collect_inlines(nodes, inlines)
+
+        # The texts next to each other are joined before looking for math, a formula may be split between them
+        result = []
+        texts = []
+        for inline in inlines + [None]:
+            if isinstance(inline, str):
+                texts.append(inline)
+                continue
+
+            if len(texts) > 0:
+                result += self.util_split_math("".join(texts))
+                texts = []
+            if inline != None:
+                result.append(inline)
+
+        return result
+
+    def util_collect_inlines(self, nodes: list, inlines: list):
+        for node in nodes:
+            if isinstance(node, str):
+                inlines.append(node)
+            elif node.tag in SKIPPED_TAGS:
+                continue
+            elif node.tag == "br":
+                inlines.append(LineBreak())
+            elif node.tag == "img":
+                src = node.attrs.get("src") or ""
+                # The images of the math rendered by Mathoid are dropped, the formula is in the text
+                if src != "" and "mathoid" not in src:
+                    inlines.append(Image(self.site_profile.rewrite_image_link(src)))
+            elif node.tag in CODE_TAGS:
+                text = WHITESPACE_PATTERN.sub(" ", self.util_code_text(node))
+                if text.strip() != "":
+                    inlines.append(Code(text))
+            elif node.tag in STRIKE_TAGS:
+                # The markers are rewritten with the text, "~~" becomes "$$" on the sites that write math between "~"
+                children = []
+                self.util_collect_inlines(node.children, children)
+                if any(not isinstance(child, str) or child.strip() != "" for child in children):
+                    # The spaces at the edges of the text go outside of the markers
+                    prefix = suffix = ""
+                    if isinstance(children[0], str):
+                        prefix = children[0][:len(children[0]) - len(children[0].lstrip())]
+                        children[0] = children[0].lstrip()
+                    if isinstance(children[-1], str):
+                        suffix = children[-1][len(children[-1].rstrip()):]
+                        children[-1] = children[-1].rstrip()
+                    inlines += [prefix, "~~"] + children + ["~~", suffix]
+            elif node.tag in STYLE_TAGS:
+                children = self.util_strip_inlines(self.util_build_inlines(node.children))
+                if len(children) > 0:
+                    inlines.append(Styled(STYLE_TAGS[node.tag], children))
+            elif node.tag == "a" and node.attrs.get("href"):
+                children = self.util_strip_inlines(self.util_build_inlines(node.children))
+                inlines.append(Link(node.attrs["href"], children))
+            else:
+                self.util_collect_inlines(node.children, inlines)
+
+    def util_split_math(self, text: str):
+        """Split the math of the site out of a text, as Math nodes with the formula between the delimiters."""
+        text = WHITESPACE_PATTERN.sub(lambda match: "\n" if "\n" in match.group() else " ", text)
+
+        # The escaped dollar signs are not delimiters, then the delimiters of the site become $ and $$
+        text = text.replace("\\$", ESCAPED_DOLLAR)
+        for delimiter, replacement in self.site_profile.math_delimiters:
+            text = text.replace(delimiter, replacement)
+
+        nodes = []
+        last = 0
+        for match in MARKDOWN_MATH_PATTERN.finditer(text):
+            if match.start() > last:
+                nodes.append(Text(text[last:match.start()].replace(ESCAPED_DOLLAR, "$")))
+
+            delimiter, formula = match.groups()
+            for rewrite, replacement in MARKDOWN_REWRITES.items():
+                formula = formula.replace(rewrite, replacement)
+            nodes.append(Math(formula.replace(ESCAPED_DOLLAR, "\\$"), len(delimiter) == 2))
+            last = match.end()
+
+        if last < len(text):
+            nodes.append(Text(text[last:].replace(ESCAPED_DOLLAR, "$")))
+
+        return nodes
+
+    def util_strip_inlines(self, inlines: list):
+        """Remove the whitespace at the start and the end of the inline nodes of a block."""
+        while len(inlines) > 0 and isinstance(inlines[0], (Text, LineBreak)) and getattr(inlines[0], "text", "").strip() == "":
+            inlines = inlines[1:]
+        while len(inlines) > 0 and isinstance(inlines[-1], (Text, LineBreak)) and getattr(inlines[-1], "text", "").strip() == "":
+            inlines = inlines[:-1]
+
+        if len(inlines) > 0 and isinstance(inlines[0], Text):
+            inlines = [Text(inlines[0].text.lstrip())] + inlines[1:]
+        if len(inlines) > 0 and isinstance(inlines[-1], Text):
+            inlines = inlines[:-1] + [Text(inlines[-1].text.rstrip())]
+
+        return inlines
+
+    def util_mark_samples(self, blocks: list):
+        """Group the blocks from the first testcase indicator to the last code block after it into Samples.
+
+        Without a code block after the indicator, an empty Samples is put before the block of the indicator."""
+        for indicator in self.indicators:
+            start = next((index for index, block in enumerate(blocks) if indicator in util_plain_text(block)), None)
+            if start != None:
+                break
+        else:
+            return blocks
+
+        end = start
+        for index in range(start, len(blocks)):
+            if any(isinstance(node, CodeBlock) for node in util_iter_nodes(blocks[index])):
+                end = index + 1
+
+        return blocks[:start] + [Samples(blocks[start:end])] + blocks[end:]
+
+def build_document(html: str, site_profile, indicators: list):
+    """Return the document tree of the HTML content of a statement."""
+    return DocumentBuilder(site_profile, indicators).build(html)
+
+# Special characters of the LaTeX text, replaced in one pass so that the replacements are not escaped again
+LATEX_ESCAPES = str.maketrans({
+    "\\": "\\textbackslash{}",
+    "{": "\\{",
+    "}": "\\}",
+    "$": "\\$",
+    "&": "\\&",
+    "#": "\\#",
+    "%": "\\%",
+    "_": "\\_",
+    "^": "\\textasciicircum{}",
+    "~": "\\textasciitilde{}",
+})
+
+LATEX_SECTIONS = {1: "section", 2: "section", 3: "subsection"}
+
+class LatexEmitter():
+    def __init__(self, testcase_chunks = None, safe_replace = True):
+        """Emit the LaTeX content of a document tree, in one walk.
+
+        The samples are replaced by the testcase chunks if given, the blocks around their code blocks are kept
+        after them if safe_replace."""
+        self.testcase_chunks = testcase_chunks
+        self.safe_replace = safe_replace
+
+    def emit(self, document: Document, writer):
+        for chunk in self.util_emit_blocks(document.children):
+            writer.write(chunk)
+
+    def util_emit_blocks(self, blocks: list):
+        for block in blocks:
+            yield from self.util_emit_block(block)
+
+    def util_emit_block(self, block):
+        if isinstance(block, Paragraph):
+            yield f"\n{self.util_emit_inlines(block.children)}\n"
+        elif isinstance(block, Heading):
+            yield f"\n\\{LATEX_SECTIONS.get(block.level, "subsubsection")}*{{{self.util_emit_inlines(block.children)}}}\n"
+        elif isinstance(block, CodeBlock):
+            yield f"\n\\begin{{lstlisting}}\n{block.text}\n\\end{{lstlisting}}\n"
+        elif isinstance(block, ItemList):
+            environment = "enumerate" if block.ordered else "itemize"
+            yield f"\n\\begin{{{environment}}}"
+            for item in block.items:
+                yield "\n\\item "
+                yield from self.util_emit_blocks(item)
+            yield f"\n\\end{{{environment}}}\n"
+        elif isinstance(block, Table):
+            columns = max(len(row) for row in block.rows)
+            yield "\n\\begin{center}\\begin{tabular}{" + "|c" * columns + "|}\n"
+            for row in block.rows:
+                yield "\\hline\n" + " & ".join(self.util_emit_inlines(cell) for cell in row) + " \\\\\n"
+            yield "\\hline\n\\end{tabular}\\end{center}\n"
+        elif isinstance(block, Quote):
+            yield "\n\\begin{quotation}"
+            yield from self.util_emit_blocks(block.children)
+            yield "\\end{quotation}\n"
+        elif isinstance(block, Rule):
+            yield "\n\\noindent\\rule{\\linewidth}{0.4pt}\n"
+        elif isinstance(block, Samples):
+            if self.testcase_chunks == None:
+                yield from self.util_emit_blocks(block.children)
+                return
+
+            yield "\n\n\\subsubsection*{Example}\n\n"
+            yield from self.testcase_chunks
+            if self.safe_replace:
+                # Keep the text around the old testcases
+                yield "\n\n"
+                yield from self.util_emit_blocks([child for child in block.children if not isinstance(child, CodeBlock)])
+
+    def util_emit_inlines(self, inlines: list):
+        return "".join(self.util_emit_inline(inline) for inline in inlines)
+
+    def util_emit_inline(self, inline):
+        if isinstance(inline, Text):
+            return inline.text.translate(LATEX_ESCAPES)
+        if isinstance(inline, Math):
+            delimiter = "$$" if inline.display else "$"
+            return delimiter + process_equation(inline.formula) + delimiter
+        if isinstance(inline, Code):
+            return "\\texttt{" + inline.text.translate(LATEX_ESCAPES) + "}"
+        if isinstance(inline, Styled):
+            command = "textbf" if inline.style == "strong" else "emph"
+            return f"\\{command}{{{self.util_emit_inlines(inline.children)}}}"
+        if isinstance(inline, Link):
+            href = inline.href.replace("%", "\\%").replace("#", "\\#")
+            return f"\\href{{{href}}}{{{self.util_emit_inlines(inline.children)}}}"
+        if isinstance(inline, Image):
+            return f"\n\\includegraphics{{{inline.src}}}\n\n"
+        if isinstance(inline, LineBreak):
+            return "\n"
+        return ""
+
+class MarkdownEmitter():
+    def __init__(self, math_delimiter = "$"):
+        """Emit the Markdown content of a document tree in one walk, with "$" or "~" around the math."""
+        self.math_delimiter = math_delimiter
+
+    def emit(self, document: Document, writer):
+        for chunk in self.util_emit_blocks(document.children):
+            writer.write(chunk)
+
+    def util_emit_blocks(self, blocks: list):
+        # The samples are written as they are in the statement
+        blocks = [child for block in blocks for child in (block.children if isinstance(block, Samples) else [block])]
+
+        for index, block in enumerate(blocks):
+            if index > 0:
+                yield "\n\n"
+            yield self.util_emit_block(block)
+
+    def util_emit_block(self, block):
+        if isinstance(block, Paragraph):
+            return self.util_emit_inlines(block.children)
+        if isinstance(block, Heading):
+            return "#" * block.level + " " + self.util_emit_inlines(block.children)
+        if isinstance(block, CodeBlock):
+            return f"```\n{block.text}\n```"
+        if isinstance(block, ItemList):
+            items = []
+            for index, item in enumerate(block.items):
+                bullet = f"{block.start + index}. " if block.ordered else "* "
+                # The blocks of an item are not separated by blank lines, like markdownify
+                content = "\n".join(self.util_emit_block(block) for block in item)
+                items.append(bullet + content.replace("\n", "\n" + " " * len(bullet)))
+            return "\n".join(items)
+        if isinstance(block, Table):
+            rows = ["| " + " | ".join(self.util_emit_inlines(cell).replace("\n", " ").replace("|", "\\|") for cell in row) + " |"
+                    for row in block.rows]
+            if not block.header:
+                # An empty header, like the markdown engine writes a table without one
+                rows.insert(0, "| " + " | ".join([""] * len(block.rows[0])) + " |")
+            rows.insert(1, "| " + " | ".join(["---"] * len(block.rows[0])) + " |")
+            return "\n".join(rows)
+        if isinstance(block, Quote):
+            content = "".join(self.util_emit_blocks(block.children))
+            return "\n".join("> " + line if line != "" else ">" for line in content.split("\n"))
+        if isinstance(block, Rule):
+            return "---"
+        return ""
+
+    def util_emit_inlines(self, inlines: list):
+        return "".join(self.util_emit_inline(inline) for inline in inlines)
+
+    def util_emit_inline(self, inline):
+        if isinstance(inline, Text):
+            return inline.text.replace("*", "\\*").replace("$", "\\$")
+        if isinstance(inline, Math):
+            delimiter = self.math_delimiter * (2 if inline.display else 1)
+            return delimiter + process_equation(inline.formula) + delimiter
+        if isinstance(inline, Code):
+            return f"`{inline.text}`"
+        if isinstance(inline, Styled):
+            marker = "**" if inline.style == "strong" else "*"
+            return marker + self.util_emit_inlines(inline.children) + marker
+        if isinstance(inline, Link):
+            if all(isinstance(child, Text) for child in inline.children) and util_plain_text(inline) == inline.href:
+                return f"<{inline.href}>"
+            return f"[{self.util_emit_inlines(inline.children)}]({inline.href})"
+        if isinstance(inline, Image):
+            return f"\n![]({inline.src})\n"
+        if isinstance(inline, LineBreak):
+            return "  \n"
+        return ""
@@ -1,7 +1,7 @@
 from datetime import datetime
 import os
 import zipfile
-from gui import Logger
+from logger import Logger
 
 VERSION = "3.0.0"
 
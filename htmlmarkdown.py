@@ -0,0 +1,538 @@
+import re
+from html.parser import HTMLParser
+
+# Built-in HTML to Markdown converter for the tags of the statements. It writes the Markdown of
+# markdownify(heading_style="ATX", bullets="*") followed by the rewrites of Crawler.convert_html_to_markdown,
+# in one walk of the page: the rewrites of the site are applied to every text as it is converted, the images and
+# the code blocks are written as their placeholders.
+
+# Tags without an end tag, the same as BeautifulSoup
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem", "meta", "param",
+             "source", "track", "wbr", "basefont", "bgsound", "command", "frame", "image", "isindex", "nextid", "spacer"}
+
+# Tags whose whitespace-only texts are kept as they are by the parser
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+
+# Block tags, the whitespace inside them and around them is removed
+BLOCK_TAGS = {"p", "blockquote", "article", "div", "section", "ol", "ul", "li", "dl", "dt", "dd",
+              "table", "thead", "tbody", "tfoot", "tr", "td", "th"}
+
+HEADING_PATTERN = re.compile(r'h(\d+)')
+
+# What an element tells the elements inside it
+INLINE = 1 # inside a heading or a table cell
+NOFORMAT = 2 # inside a code element, the text is not escaped
+PRE = 4 # inside a <pre>, the whitespace is kept
+ITEM = 8 # inside a list item
+
+NEWLINE_WHITESPACE_PATTERN = re.compile(r'[\t \r\n]*[\r\n][\t \r\n]*')
+WHITESPACE_PATTERN = re.compile(r'[\t ]+')
+ALL_WHITESPACE_PATTERN = re.compile(r'[\t \r\n]+')
+LINE_PATTERN = re.compile(r'^(.*)', flags=re.MULTILINE)
+BACKTICKS_PATTERN = re.compile(r'`+')
+PRE_LSTRIP_PATTERN = re.compile(r'^[ \n]*\n')
+PRE_RSTRIP_PATTERN = re.compile(r'[ \n]*$')
+
+# Private use characters standing for the placeholders while the content is converted, they are not whitespace so
+# the Markdown is laid out as if the image or the code fence was still there
+IMAGE_START = "\ue000"
+IMAGE_END = "\ue001"
+CODE_START = "\ue002"
+CODE_END = "\ue003"
+REMOVED_IMAGE = "\ue004"
+
+PLACEHOLDERS = str.maketrans({
+    IMAGE_START: "\n!!FileImage!!",
+    IMAGE_END: "!!EndFileImage!!\n",
+    CODE_START: "\n!!Codeblock!!",
+    CODE_END: "!!EndCodeblock!!\n",
+    REMOVED_IMAGE: "",
+})
+
+class HtmlComment(str):
+    """A comment or a declaration, never converted but still a sibling of the other nodes."""
+
+class HtmlElement():
+    __slots__ = ("tag", "attrs", "children", "parent", "previous_element", "item_index", "item_count",
+                 "block", "outside_block", "child_flags")
+
+    def __init__(self, tag: str, attrs: dict, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+        # The element before it among its siblings, the texts are skipped
+        self.previous_element = None
+        # Number of <li> before it among its siblings, and inside it
+        self.item_index = 0
+        self.item_count = 0
+
+        heading = HEADING_PATTERN.match(tag) != None
+        self.block = tag in BLOCK_TAGS or heading
+        self.outside_block = self.block or tag == "pre"
+
+        self.child_flags = 0
+        if heading or tag in ("td", "th"):
+            self.child_flags |= INLINE
+        if tag in ("pre", "code", "kbd", "samp"):
+            self.child_flags |= NOFORMAT
+        if tag == "pre":
+            self.child_flags |= PRE
+        if tag == "li":
+            self.child_flags |= ITEM
+
+class HtmlTreeParser(HTMLParser):
+    def __init__(self):
+        """Parse HTML into a tree of HtmlElement like the html.parser builder of BeautifulSoup."""
+        super().__init__(convert_charrefs=True)
+        self.root = HtmlElement("[document]", {}, None)
+        self.stack = [self.root]
+        self.texts = []
+        self.preserve_depth = 0
+
+    def util_end_text(self):
+        """Add the text read since the last node, a whitespace-only text is one space or one line break."""
+        if len(self.texts) == 0:
+            return
+
+        text = "".join(self.texts)
+        self.texts = []
+        if self.preserve_depth == 0 and text.strip(" \n\t\f\r") == "":
+            text = "\n" if "\n" in text else " "
+        self.stack[-1].children.append(text)
+
+    def util_add_element(self, element: HtmlElement):
+        parent = self.stack[-1]
+        for child in reversed(parent.children):
+            if isinstance(child, HtmlElement):
+                element.previous_element = child
+                break
+        if element.tag == "li":
+            element.item_index = parent.item_count
+            parent.item_count += 1
+        parent.children.append(element)
+
+    def handle_starttag(self, tag: str, attrs: list):
+        self.util_end_text()
+        element = HtmlElement(tag, {name: value if value != None else "" for name, value in attrs}, self.stack[-1])
+        self.util_add_element(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+            if tag in PRESERVE_WHITESPACE_TAGS:
+                self.preserve_depth += 1
+
+    def handle_endtag(self, tag: str):
+        self.util_end_text()
+        # Close the tag and the tags left open inside it, an end tag without a start tag is ignored
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                for element in self.stack[index:]:
+                    if element.tag in PRESERVE_WHITESPACE_TAGS:
+                        self.preserve_depth -= 1
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data: str):
+        self.texts.append(data)
+
+    def handle_comment(self, data: str):
+        self.util_end_text()
+        self.stack[-1].children.append(HtmlComment(data))
+
+    handle_decl = handle_comment
+    handle_pi = handle_comment
+    unknown_decl = handle_comment
+
+    def close(self):
+        super().close()
+        self.util_end_text()
+
+def util_remove_outside(node):
+    """Whether the whitespace next to the node is removed, the node is a block or a <pre>."""
+    return isinstance(node, HtmlElement) and node.outside_block
+
+def util_chomp(text: str):
+    """Move a space at the start and the end of the text of an inline tag outside of it."""
+    prefix = " " if text and text[0] == " " else ""
+    suffix = " " if text and text[-1] == " " else ""
+    return prefix, suffix, text.strip()
+
+def util_find_all(element: HtmlElement, tags: tuple):
+    """Return the elements with these tags inside the element, in order."""
+    found = []
+    for child in element.children:
+        if isinstance(child, HtmlElement):
+            if child.tag in tags:
+                found.append(child)
+            found += util_find_all(child, tags)
+    return found
+
+def util_colspan(cell: HtmlElement):
+    colspan = cell.attrs.get("colspan")
+    if colspan != None and colspan.isdigit():
+        return max(1, min(1000, int(colspan)))
+    return 1
+
+class HtmlMarkdownConverter():
+    def __init__(self, site_profile):
+        """Convert the statements of a site, with the math delimiters and image links of its profile."""
+        self.site_profile = site_profile
+        # Off while the text of a link is compared with its address as written on the page
+        self.rewrite = True
+        self.converters = {
+            "a": self.convert_a,
+            "b": self.convert_strong, "strong": self.convert_strong,
+            "em": self.convert_em, "i": self.convert_em,
+            "del": self.convert_del, "s": self.convert_del,
+            "sub": self.convert_plain, "sup": self.convert_plain,
+            "code": self.convert_code, "kbd": self.convert_code, "samp": self.convert_code,
+            "div": self.convert_div, "article": self.convert_div, "section": self.convert_div, "dl": self.convert_div,
+            "blockquote": self.convert_blockquote,
+            "br": self.convert_br,
+            "dd": self.convert_dd,
+            "dt": self.convert_dt,
+            "hr": self.convert_hr,
+            "img": self.convert_img,
+            "video": self.convert_video,
+            "ul": self.convert_list, "ol": self.convert_list, "list": self.convert_list,
+            "li": self.convert_li,
+            "p": self.convert_p,
+            "pre": self.convert_pre,
+            "q": self.convert_q,
+            "script": self.convert_empty, "style": self.convert_empty,
+            "table": self.convert_table,
+            "caption": self.convert_caption,
+            "figcaption": self.convert_figcaption,
+            "td": self.convert_cell, "th": self.convert_cell,
+            "tr": self.convert_tr,
+        }
+
+    def convert(self, html: str):
+        parser = HtmlTreeParser()
+        parser.feed(html)
+        parser.close()
+
+        text = self.util_convert_children(parser.root, 0).strip("\n")
+        return text.translate(PLACEHOLDERS).strip()
+
+    def util_rewrite(self, text: str):
+        """Rewrite the math delimiters, the LaTeX brackets and the image links of the site in a text."""
+        if not self.rewrite or text == "":
+            return text
+        return self.site_profile.rewrite_markdown(text)
+
+    def util_rewrite_raw(self, text: str):
+        """Rewrite a text that is not escaped: code, links and images. The escaped underscores are undone."""
+        return self.util_rewrite(text).replace("\\_", "_")
+
+    def util_convert_element(self, element: HtmlElement, flags: int, siblings: list, index: int):
+        tag = element.tag
+        if tag in ("script", "style"):
+            return ""
+
+        if HEADING_PATTERN.match(tag) != None:
+            return self.convert_heading(element, self.util_convert_children(element, flags), flags)
+
+        converter = self.converters.get(tag)
+        text = self.util_convert_children(element, flags)
+        if converter == None:
+            return text
+        return converter(element, text, flags, siblings, index)
+
+    def util_convert_children(self, element: HtmlElement, flags: int):
+        """Convert the children of an element, then join them with the line breaks between them collapsed."""
+        child_flags = flags | element.child_flags
+        children = element.children
+        last = len(children) - 1
+        strings = []
+        for index, child in enumerate(children):
+            child_type = type(child)
+            if child_type is HtmlElement:
+                text = self.util_convert_element(child, child_flags, children, index)
+            elif child_type is str:
+                previous_sibling = children[index - 1] if index > 0 else None
+                next_sibling = children[index + 1] if index < last else None
+                if child.strip() == "":
+                    # The whitespace at the edges of a block and next to a block is dropped
+                    if element.block and (not previous_sibling or not next_sibling):
+                        continue
+                    if util_remove_outside(previous_sibling) or util_remove_outside(next_sibling):
+                        continue
+                text = self.util_convert_text(child, element, previous_sibling, next_sibling, child_flags)
+            else:
+                continue
+
+            if text:
+                strings.append(text)
+
+        if len(strings) == 0:
+            return ""
+
+        if child_flags & PRE:
+            return "".join(strings)
+
+        # At most two line breaks between two children
+        pieces = [""]
+        for string in strings:
+            if string[0] != "\n" and string[-1] != "\n":
+                pieces += ["", string, ""]
+                continue
+
+            content = string.lstrip("\n")
+            leading = len(string) - len(content)
+            trimmed = content.rstrip("\n")
+            trailing = len(content) - len(trimmed)
+            if pieces[-1] and leading:
+                leading = min(2, max(len(pieces.pop()), leading))
+            pieces += ["\n" * leading, trimmed, "\n" * trailing]
+
+        return "".join(pieces)
+
+    def util_convert_text(self, text: str, parent: HtmlElement, previous_sibling, next_sibling, flags: int):
+        if not flags & PRE:
+            if "\n" in text or "\r" in text:
+                text = NEWLINE_WHITESPACE_PATTERN.sub("\n", text)
+            text = WHITESPACE_PATTERN.sub(" ", text)
+
+        if flags & NOFORMAT:
+            rewrite = self.util_rewrite_raw
+        else:
+            # The underscores escaped by markdownify are undone by convert_html_to_markdown, only * stays escaped
+            text = text.replace("*", "\\*")
+            rewrite = self.util_rewrite
+
+        if util_remove_outside(previous_sibling) or (parent.block and not previous_sibling):
+            text = text.lstrip(" \t\r\n")
+        if util_remove_outside(next_sibling) or (parent.block and not next_sibling):
+            text = text.rstrip()
+
+        return rewrite(text)
+
+    def util_inline(self, text: str, markup: str, flags: int):
+        if flags & NOFORMAT:
+            return text
+        prefix, suffix, text = util_chomp(text)
+        if not text:
+            return ""
+        return prefix + markup + text + markup + suffix
+
+    def convert_strong(self, element, text, flags, siblings, index):
+        return self.util_inline(text, "**", flags)
+
+    def convert_em(self, element, text, flags, siblings, index):
+        return self.util_inline(text, "*", flags)
+
+    def convert_del(self, element, text, flags, siblings, index):
+        # The strikethrough is rewritten with the texts, "~~" becomes "$$" on the sites that write math between "~"
+        return self.util_inline(text, self.util_rewrite("~~"), flags)
+
+    def convert_plain(self, element, text, flags, siblings, index):
+        return self.util_inline(text, "", flags)
+
+    def convert_empty(self, element, text, flags, siblings, index):
+        return ""
+
+    def convert_a(self, element, text, flags, siblings, index):
+        if flags & NOFORMAT:
+            return text
+        prefix, suffix, text = util_chomp(text)
+        if not text:
+            return ""
+
+        href = element.attrs.get("href")
+        title = element.attrs.get("title")
+        if not href:
+            return text
+
+        link = self.util_rewrite_raw(href)
+        if text == link and not title:
+            # The text and the address are compared as written on the page, before the rewrites
+            self.rewrite = False
+            written = self.util_convert_children(element, flags | element.child_flags).strip()
+            self.rewrite = True
+            if written == href:
+                return f"<{link}>"
+
+        title_part = self.util_rewrite_raw(' "%s"' % title.replace('"', '\\"')) if title else ""
+        return f"{prefix}[{text}]({link}{title_part}){suffix}"
+
+    def convert_code(self, element, text, flags, siblings, index):
+        if flags & NOFORMAT:
+            return text
+        prefix, suffix, text = util_chomp(text)
+        if not text:
+            return ""
+
+        backticks = max((len(run) for run in BACKTICKS_PATTERN.findall(text)), default=0)
+        if backticks > 0:
+            text = " " + text + " "
+        markup = "`" * (backticks + 1)
+        return prefix + markup + text + markup + suffix
+
+    def convert_div(self, element, text, flags, siblings, index):
+        if flags & INLINE:
+            return " " + text.strip() + " "
+        text = text.strip()
+        return f"\n\n{text}\n\n" if text else ""
+
+    def convert_blockquote(self, element, text, flags, siblings, index):
+        text = text.strip(" \t\r\n")
+        if flags & INLINE:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        text = LINE_PATTERN.sub(lambda match: "> " + match.group(1) if match.group(1) else ">", text)
+        return "\n" + text + "\n\n"
+
+    def convert_br(self, element, text, flags, siblings, index):
+        if flags & INLINE:
+            return text + " " if text else " "
+        return "  \n" + text
+
+    def convert_dd(self, element, text, flags, siblings, index):
+        text = text.strip()
+        if flags & INLINE:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        text = LINE_PATTERN.sub(lambda match: "    " + match.group(1) if match.group(1) else "", text)
+        return ":" + text[1:] + "\n"
+
+    def convert_dt(self, element, text, flags, siblings, index):
+        text = ALL_WHITESPACE_PATTERN.sub(" ", text.strip())
+        if flags & INLINE:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        return f"\n\n{text}\n"
+
+    def convert_heading(self, element, text, flags):
+        if flags & INLINE:
+            return text
+        level = max(1, min(6, int(HEADING_PATTERN.match(element.tag).group(1))))
+        text = ALL_WHITESPACE_PATTERN.sub(" ", text.strip())
+        return f"\n\n{'#' * level} {text}\n\n"
+
+    def convert_hr(self, element, text, flags, siblings, index):
+        return "\n\n---\n\n"
+
+    def util_image(self, source: str):
+        """Write the placeholder of an image, the images of the math rendered by Mathoid are removed."""
+        source = self.util_rewrite_raw(source)
+        if "mathoid" in source:
+            return REMOVED_IMAGE
+        # The placeholder ends at the first parenthesis, like the Markdown link it replaces
+        end = source.find(")")
+        if end != -1:
+            return IMAGE_START + source[:end] + IMAGE_END + source[end + 1:] + ")"
+        return IMAGE_START + source + IMAGE_END
+
+    def convert_img(self, element, text, flags, siblings, index):
+        alt = element.attrs.get("alt") or ""
+        if flags & INLINE:
+            return self.util_rewrite_raw(alt)
+
+        src = element.attrs.get("src") or ""
+        title = element.attrs.get("title") or ""
+        title_part = ' "%s"' % title.replace('"', '\\"') if title else ""
+        return self.util_image(src + title_part)
+
+    def convert_video(self, element, text, flags, siblings, index):
+        if flags & INLINE:
+            return text
+        src = element.attrs.get("src") or ""
+        if not src:
+            sources = [source for source in util_find_all(element, ("source",)) if "src" in source.attrs]
+            if len(sources) > 0:
+                src = sources[0].attrs["src"] or ""
+        poster = element.attrs.get("poster") or ""
+        if src and poster:
+            return f"[{self.util_image(poster)}]({self.util_rewrite_raw(src)})"
+        if src:
+            return f"[{text}]({self.util_rewrite_raw(src)})"
+        if poster:
+            return self.util_image(poster)
+        return text
+
+    def convert_list(self, element, text, flags, siblings, index):
+        # The next block that is an element or a text with content
+        before_paragraph = False
+        for sibling in siblings[index + 1:]:
+            if isinstance(sibling, HtmlElement):
+                before_paragraph = sibling.tag not in ("ul", "ol")
+                break
+            if type(sibling) is str and sibling.strip() != "":
+                before_paragraph = True
+                break
+
+        if flags & ITEM:
+            return "\n" + text.rstrip()
+        return "\n\n" + text + ("\n" if before_paragraph else "")
+
+    def convert_li(self, element, text, flags, siblings, index):
+        text = text.strip()
+        if not text:
+            return "\n"
+
+        parent = element.parent
+        if parent != None and parent.tag == "ol":
+            start = parent.attrs.get("start")
+            start = int(start) if start and start.isnumeric() else 1
+            bullet = f"{start + element.item_index}. "
+        else:
+            bullet = "* "
+
+        indent = " " * len(bullet)
+        text = LINE_PATTERN.sub(lambda match: indent + match.group(1) if match.group(1) else "", text)
+        return bullet + text[len(bullet):] + "\n"
+
+    def convert_p(self, element, text, flags, siblings, index):
+        if flags & INLINE:
+            return " " + text.strip(" \t\r\n") + " "
+        text = text.strip(" \t\r\n")
+        return f"\n\n{text}\n\n" if text else ""
+
+    def convert_pre(self, element, text, flags, siblings, index):
+        if not text:
+            return ""
+        text = PRE_RSTRIP_PATTERN.sub("", PRE_LSTRIP_PATTERN.sub("", text))
+        return f"\n\n{CODE_START}\n{text}\n{CODE_END}\n\n"
+
+    def convert_q(self, element, text, flags, siblings, index):
+        return '"' + text + '"'
+
+    def convert_table(self, element, text, flags, siblings, index):
+        return "\n\n" + text.strip() + "\n\n"
+
+    def convert_caption(self, element, text, flags, siblings, index):
+        return text.strip() + "\n\n"
+
+    def convert_figcaption(self, element, text, flags, siblings, index):
+        return "\n\n" + text.strip() + "\n\n"
+
+    def convert_cell(self, element, text, flags, siblings, index):
+        return " " + text.strip().replace("\n", " ") + " |" * util_colspan(element)
+
+    def convert_tr(self, element, text, flags, siblings, index):
+        cells = util_find_all(element, ("td", "th"))
+        parent = element.parent
+        is_first_row = element.previous_element == None
+        is_head_row = (all(cell.tag == "th" for cell in cells)
+                       or (parent.tag == "thead" and len(util_find_all(parent, ("tr",))) == 1))
+        is_head_row_missing = (is_first_row and (parent.tag != "tbody"
+                                                 or len(util_find_all(parent.parent, ("thead",))) < 1))
+        colspan = sum(util_colspan(cell) for cell in cells)
+
+        overline = ""
+        underline = ""
+        if is_head_row and is_first_row:
+            underline = "| " + " | ".join(["---"] * colspan) + " |\n"
+        elif is_head_row_missing or (is_first_row and (parent.tag == "table"
+                                                        or (parent.tag == "tbody" and parent.previous_element == None))):
+            overline = "| " + " | ".join([""] * colspan) + " |\n"
+            overline += "| " + " | ".join(["---"] * colspan) + " |\n"
+        return overline + "|" + text + "\n" + underline
+
+def html_to_markdown(html: str, site_profile):
+    """Convert the HTML content of a statement to the Markdown content of Crawler.convert_html_to_markdown."""
+    return HtmlMarkdownConverter(site_profile).convert(html)
@@ -0,0 +1,126 @@
+class Logger():
+    def __init__(self, textbox = None, progbar_status = None, statusbar = None, percentage = None):
+        """Log to the widgets of the GUI (customtkinter textbox, progress bar and labels), or print to the console
+        without them. The widgets are only called through their methods, this module never imports Tk."""
+        self.textbox = textbox
+        self.progbar_status = progbar_status
+        self.statusbar = statusbar
+        self.percentage = percentage
+        self.current_done_step = 0
+        self.total_steps = 1
+
+    def log(self, log_text: str):
+        if self.textbox == None:
+            print(f"LOG: {log_text}")
+            return
+
+        self.textbox.configure(state="normal")
+        self.textbox.insert("end", log_text + '\n')
+        self.textbox.configure(state="disabled")
+
+        # scroll to the bottom
+        self.textbox.see("end")
+
+    def clear_log(self):
+        if self.textbox == None:
+            print("LOG: Cleared log")
+            return
+
+        self.textbox.configure(state="normal")
+        self.textbox.delete(1.0, "end")
+        self.textbox.configure(state="disabled")
+
+    queued_status_text = ""
+    queued_status_info = ""
+    queued_update_ui = False
+
+    def status(self, status_text: str, type="info", force_update=True, resolve_queue=False):
+        # if this call is for resolving the queue, update the status with the queued status
+        status_text = status_text.strip().strip('\n')
+        if resolve_queue:
+            if len(self.queued_status_info) == 0:
+                return
+            status_text = self.queued_status_text
+            type = self.queued_status_info
+
+        if self.statusbar == None:
+            print(f"STATUS {type}: {status_text}")
+            return
+        
+        # if the status is not important, and there is a queued status, update the status with the queued status
+        if force_update == False:
+            self.queued_status_text = status_text
+            self.queued_status_info = type
+            if self.queued_update_ui == False: # if there has not been a queued update, queue one
+                self.queued_update_ui = True
+                if self.statusbar != None:
+                    self.statusbar.after(200, lambda: self.status("", "", force_update=True, resolve_queue=True))
+            else:
+                return
+        else: # this is an important status, clear the queue
+            self.queued_status_text = ""
+            self.queued_status_info = ""
+            self.queued_update_ui = False
+
+        self.statusbar.configure(text=f"Trạng thái: {status_text}")
+        if type == "info":
+            self.statusbar.configure(text_color=("gray25", "gray70"))
+        elif type == "ok":
+            self.statusbar.configure(text_color=("darkgreen", "lightgreen"))
+        elif type == "err":
+            self.statusbar.configure(text_color=("darkred", "red"))
+    
+    def log_and_status(self, log_text: str, type="info", force_update=True):
+        self.log(log_text)
+        self.status(log_text, type, force_update)
+    
+    def set_total_steps(self, total_steps: int):
+        self.total_steps = total_steps
+        self.current_done_step = 0
+
+        if self.progbar_status == None:
+            print(f"PROGBAR: Total steps set to {total_steps}, reset current step to 0")
+            return
+        
+        self.progbar_status.set(0)
+        self.percentage.configure(text="")
+
+    queued_step = 0
+    queued_update_ui_progbar = False
+
+    def step(self, step = 1, force_update=True, resolve_queue=False, completed=False):
+        new_step = step
+        # if this call is for resolving the queue, update the status with the queued status
+        if resolve_queue:
+            new_step = 0
+        
+        # if the status is not important, and there is a queued status, update the status with the queued status
+        if force_update == False:
+            if self.queued_update_ui_progbar == False: # if there has not been a queued update, queue one
+                self.queued_update_ui_progbar = True
+                if self.progbar_status != None:
+                    self.progbar_status.after(200, lambda: self.step(force_update=True, resolve_queue=True))
+            else:
+                self.queued_step += step
+                if self.progbar_status != None:
+                    return
+        else: # this is an important status, clear the queue
+            new_step += self.queued_step
+            self.queued_step = 0
+            self.queued_update_ui_progbar = False
+        
+        if new_step == 0:
+            return
+
+        self.current_done_step += new_step
+        if completed:
+            self.current_done_step = self.total_steps
+
+        perc = min(1,self.current_done_step / self.total_steps)
+
+        if self.progbar_status == None:
+            print(f"PROGBAR: Added {new_step}, total {self.current_done_step}/{self.total_steps}, percentage {perc}")
+            return
+
+        self.progbar_status.set(perc)
+        self.percentage.configure(text=f"{int(perc * 100)}%")
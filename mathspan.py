@@ -0,0 +1,94 @@
+import functools
+import re
+
+# Math of the Markdown content: $...$ or $$...$$
+# First group is the delimiter, second group is the formula
+MARKDOWN_MATH_PATTERN = re.compile(r'(\${1,2})((?:(?!\1)[\s\S])*)\1', re.DOTALL)
+
+# Codeforces statements also write display math as $$$...$$$
+CODEFORCES_MATH_PATTERN = re.compile(r'(\${1,3})((?:(?!\1)[\s\S])*)\1', re.DOTALL)
+
+# Math written by the LaTeX extension of Markdown: \(...\) or \[...\]
+# First group is the entire math function, second group is the formula
+LATEX_MATH_PATTERN = re.compile(r'(\\[\(|\[]((?:.|\n)*?)\\[\)|\]])', re.DOTALL)
+
+# Rewrites of a formula to LaTeX, in the order they are applied
+EQUATION_REPLACEMENTS = [
+    # Re-escape some special characters
+    ("\\%", "%"),
+    ("%", "\\%"),
+    # Fix some special characters cases
+    ("\\*", "\\times "),
+    ("*", "\\times "),
+    ("×", "\\times "),
+    ("...", "\\dots "),
+    ("…", "\\dots "),
+    ("≤", "\\le "),
+    ("≥", "\\ge "),
+    ("−", "-"),
+    ("\u2009", ""), # thin space
+    ("’", "'"),
+    ("⇔", "\\Leftrightarrow "),
+    ("≠", "\\neq "),
+    ("δ", "\\delta "),
+    ("Δ", "\\Delta "),
+    ("∑", "\\sum "),
+    ("∏", "\\prod "),
+    ("√", "\\sqrt "),
+    ("∈", "\\in "),
+    ("∉", "\\notin "),
+    ("∞", "\\infty "),
+    ("∀", "\\forall "),
+    # Replace dollar sign
+    ("!!Dollar!!", "\\$"),
+]
+
+# Every replacement is ASCII, so an ASCII formula stays ASCII and only needs the ASCII rewrites
+ASCII_EQUATION_REPLACEMENTS = [(text, replacement) for text, replacement in EQUATION_REPLACEMENTS if text.isascii()]
+
+# Number of processed formulas kept, the same small formulas come back in every statement
+EQUATION_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=EQUATION_CACHE_SIZE)
+def process_equation(func_str: str):
+    """Convert a formula of a statement to LaTeX, memoized by the raw formula."""
+    # On formulas this short, a chain of str.replace is faster than str.translate or a combined regex
+    replacements = ASCII_EQUATION_REPLACEMENTS if func_str.isascii() else EQUATION_REPLACEMENTS
+    for text, replacement in replacements:
+        func_str = func_str.replace(text, replacement)
+    return func_str
+
+def get_equation_cache_stats():
+    """Return the hits, misses, size and hit rate of the formula memo since the start or the last clear."""
+    info = process_equation.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups > 0 else 0.0,
+    }
+
+def find_math_spans(text: str, pattern = MARKDOWN_MATH_PATTERN):
+    """Return the groups of every math span of the text, in order."""
+    return pattern.findall(text)
+
+def rewrite_math_spans(text: str, callback, pattern = MARKDOWN_MATH_PATTERN):
+    """Walk the text once and replace every math span in place with callback(index, match).
+
+    Each span is rewritten where it was found, so the cost is linear in the size of the text, and a formula
+    that also appears earlier in the text is never replaced at the wrong place.
+    """
+    pieces = []
+    last = 0
+    for index, match in enumerate(pattern.finditer(text)):
+        pieces.append(text[last:match.start()])
+        pieces.append(callback(index, match))
+        last = match.end()
+
+    if last == 0:
+        return text
+
+    pieces.append(text[last:])
+    return "".join(pieces)
@@ -0,0 +1,30 @@
+import threading
+import markdown
+import markdown2latex.mdx_latex as MDXLatex
+
+# Markdown to LaTeX converter of each thread, built on first use and reset between documents
+LOCAL_CONVERTERS = threading.local()
+
+def create_latex_converter():
+    """Build a Markdown converter with the LaTeX extension, this builds every processor and pattern table."""
+    md = markdown.Markdown()
+    latex_mdx = MDXLatex.LaTeXExtension()
+    latex_mdx.extendMarkdown(md)
+    # Registered so that md.reset() also resets the extension
+    md.registerExtension(latex_mdx)
+    return md
+
+def get_latex_converter():
+    """Return the converter of the current thread, a converter is never used by two threads at once."""
+    md = getattr(LOCAL_CONVERTERS, "md", None)
+    if md == None:
+        md = create_latex_converter()
+        LOCAL_CONVERTERS.md = md
+    return md
+
+def markdown_to_latex(markdown_content: str):
+    """Convert Markdown content to LaTeX with the converter of the thread."""
+    md = get_latex_converter()
+    # Forget the stashed HTML and the references of the last document, also after a failed conversion
+    md.reset()
+    return md.convert(markdown_content)
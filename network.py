@@ -0,0 +1,703 @@
+import atexit
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Number of distinct host pools kept alive inside one session (redirects may hop to a CDN)
+DEFAULT_POOL_CONNECTIONS = 4
+
+# Number of keep-alive connections kept per host
+DEFAULT_POOL_MAXSIZE = 16
+
+# Number of files downloaded at the same time, in total and per host
+DEFAULT_DOWNLOAD_WORKERS = 8
+DEFAULT_DOWNLOAD_PER_HOST = 4
+
+# Timeouts of a single request, in seconds
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+
+# Idempotent GETs are retried this many times, waiting a random time up to backoff * 2^attempt seconds
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# Errors after which a GET is worth sending again
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.exceptions.Timeout)
+
+# Size of the chunks written to disk by streamed downloads, in bytes
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Number of times an interrupted download is resumed before giving up
+DEFAULT_MAX_RESUMES = 5
+
+# Size budget of the on-disk HTTP cache, in bytes
+DEFAULT_CACHE_MAX_SIZE = 512 * 1024 * 1024
+
+# Response headers kept in the cache, the others are not needed to rebuild the response
+CACHE_KEPT_HEADERS = ["Content-Type", "ETag", "Last-Modified"]
+
+# Seconds between two writes of the cache index while storing, the rest is written when the cache is closed
+CACHE_INDEX_SAVE_INTERVAL = 1.0
+
+# Seconds between two writes of the fixture index while recording, the rest is written when the store is closed
+FIXTURE_INDEX_SAVE_INTERVAL = 1.0
+
+class DeadlineExceeded(Exception):
+    """Raised when a request cannot finish before the deadline of its crawl."""
+    pass
+
+class FixtureStore():
+    def __init__(self, fixture_dir: str, mode = "replay"):
+        """`mode` is "record" to save every exchange, or "replay" to serve them back without network access."""
+        self.fixture_dir = fixture_dir
+        self.mode = mode
+        self.bodies_dir = os.path.join(fixture_dir, "bodies")
+        self.index_path = os.path.join(fixture_dir, "index.json")
+
+        self.missing = []
+        self.lock = threading.Lock()
+        # Orders the index writes, held while writing so the recordings only wait on self.lock for the copy
+        self.save_lock = threading.Lock()
+        # The exchanges recorded since the index was last written
+        self.dirty = False
+        self.last_save = 0
+
+        if mode == "record":
+            os.makedirs(self.bodies_dir, exist_ok=True)
+
+        # URL -> {status_code, headers, body}
+        self.exchanges = {}
+        try:
+            with open(self.index_path, "r", encoding="utf8") as file:
+                self.exchanges = json.load(file)
+        except FileNotFoundError:
+            if mode == "replay":
+                raise
+
+        # The last exchanges are written at exit if the store was not closed
+        atexit.register(self.close)
+
+    def util_save_index(self, throttle = False):
+        """Write the index to disk if it changed, at most once per FIXTURE_INDEX_SAVE_INTERVAL when throttled.
+        The lock must not be held by the caller."""
+        with self.save_lock:
+            # Copied under the lock, serialized outside of it
+            with self.lock:
+                if not self.dirty:
+                    return
+                if throttle and time.monotonic() - self.last_save < FIXTURE_INDEX_SAVE_INTERVAL:
+                    return
+                exchanges = {url: dict(exchange) for url, exchange in self.exchanges.items()}
+                self.dirty = False
+
+            temp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf8") as file:
+                json.dump(exchanges, file, indent=4, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+            self.last_save = time.monotonic()
+
+    def record(self, url: str, response: requests.Response):
+        """Save the exchange of the URL, return a response that can still be read by the caller."""
+        # Partial and not-modified answers cannot be replayed on their own
+        if response.status_code in [206, 304]:
+            return response
+
+        content = response.content
+        body_name = hashlib.sha256(url.encode("utf8")).hexdigest()
+
+        with self.lock:
+            with open(os.path.join(self.bodies_dir, body_name), "wb") as file:
+                file.write(content)
+
+            self.exchanges[url] = {
+                "status_code": response.status_code,
+                "headers": {name: value for name, value in response.headers.items() if name.lower() not in ["content-length", "content-encoding", "transfer-encoding"]},
+                "body": body_name,
+            }
+            self.dirty = True
+
+        self.util_save_index(throttle=True)
+        return response
+
+    def replay(self, url: str):
+        """Rebuild the recorded response of the URL, a 404 if it was never recorded."""
+        response = requests.Response()
+        response.url = url
+        response._content_consumed = True
+
+        with self.lock:
+            exchange = self.exchanges.get(url)
+            if exchange == None:
+                self.missing.append(url)
+                response.status_code = 404
+                response._content = b""
+                return response
+
+        with open(os.path.join(self.bodies_dir, exchange["body"]), "rb") as file:
+            content = file.read()
+
+        response.status_code = exchange["status_code"]
+        response.headers = CaseInsensitiveDict(exchange["headers"])
+        response.headers["Content-Length"] = str(len(content))
+        # The charset of Content-Type, as requests sets it on a fetched response, otherwise .text guesses it
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = content
+        return response
+
+    def close(self):
+        """Write the exchanges recorded since the last write of the index."""
+        self.util_save_index()
+
+class HttpCache():
+    def __init__(self, cache_dir = os.path.join(os.getcwd(), "output", "cache", "http"), max_size = DEFAULT_CACHE_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.index_path = os.path.join(cache_dir, "index.json")
+
+        self.hits = 0
+        self.stored = 0
+        self.lock = threading.Lock()
+        # Orders the index writes, held while writing so the downloads only wait on self.lock for the copy
+        self.save_lock = threading.Lock()
+        # The entries changed since the index was last written, the last use of a cache hit is only kept in memory
+        self.dirty = False
+        self.last_save = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # key -> {url, headers, size, last_used}
+        self.entries = {}
+        try:
+            with open(self.index_path, "r", encoding="utf8") as file:
+                self.entries = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+        # The budget may have been lowered since the last run
+        with self.lock:
+            self.util_evict()
+        self.util_save_index()
+
+        # The last uses of the cache hits are written at exit if the cache was not closed
+        atexit.register(self.close)
+
+    def util_get_key(self, url: str):
+        """Return the file name of the cached body of the URL."""
+        return hashlib.sha256(url.encode("utf8")).hexdigest()
+
+    def util_save_index(self, throttle = False):
+        """Write the index to disk if it changed, at most once per CACHE_INDEX_SAVE_INTERVAL when throttled.
+        The lock must not be held by the caller."""
+        with self.save_lock:
+            # Copied under the lock, serialized outside of it
+            with self.lock:
+                if not self.dirty:
+                    return
+                if throttle and time.monotonic() - self.last_save < CACHE_INDEX_SAVE_INTERVAL:
+                    return
+                entries = {key: dict(entry) for key, entry in self.entries.items()}
+                self.dirty = False
+
+            temp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf8") as file:
+                json.dump(entries, file)
+            os.replace(temp_path, self.index_path)
+            self.last_save = time.monotonic()
+
+    def get_validators(self, url: str):
+        """Return the conditional request headers of the cached URL, empty if it is not cached."""
+        with self.lock:
+            entry = self.entries.get(self.util_get_key(url))
+            if entry == None:
+                return {}
+
+            headers = CaseInsensitiveDict(entry["headers"])
+            validators = {}
+            if "ETag" in headers:
+                validators["If-None-Match"] = headers["ETag"]
+            if "Last-Modified" in headers:
+                validators["If-Modified-Since"] = headers["Last-Modified"]
+            return validators
+
+    def load(self, url: str):
+        """Rebuild the cached response of the URL, return None if the body is gone."""
+        key = self.util_get_key(url)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry == None:
+                return None
+
+            try:
+                with open(os.path.join(self.cache_dir, key), "rb") as file:
+                    content = file.read()
+            except FileNotFoundError:
+                del self.entries[key]
+                self.dirty = True
+                return None
+
+            entry["last_used"] = time.time()
+            self.hits += 1
+            self.dirty = True
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        # The charset of Content-Type, as requests sets it on a fetched response, otherwise .text guesses it
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = content
+        return response
+
+    def copy_to(self, url: str, dest_path: str):
+        """Copy the cached body of the URL to dest_path, return False if the body is gone."""
+        key = self.util_get_key(url)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry == None:
+                return False
+
+            try:
+                shutil.copyfile(os.path.join(self.cache_dir, key), dest_path)
+            except FileNotFoundError:
+                del self.entries[key]
+                self.dirty = True
+                return False
+
+            entry["last_used"] = time.time()
+            self.hits += 1
+            self.dirty = True
+
+        return True
+
+    def util_is_cacheable(self, response: requests.Response):
+        """Only 200 responses that can be revalidated later are worth caching."""
+        if response.status_code != 200:
+            return False
+        return "ETag" in response.headers or "Last-Modified" in response.headers
+
+    def util_add_entry(self, key: str, url: str, headers, size: int):
+        """Register a body that has just been written, the lock must be held by the caller."""
+        self.stored += 1
+        self.entries[key] = {
+            "url": url,
+            "headers": {name: headers[name] for name in CACHE_KEPT_HEADERS if name in headers},
+            "size": size,
+            "last_used": time.time(),
+        }
+        self.dirty = True
+
+        self.util_evict()
+
+    def store(self, url: str, response: requests.Response):
+        """Store a 200 response that carries an ETag or Last-Modified header."""
+        if not self.util_is_cacheable(response):
+            return
+
+        key = self.util_get_key(url)
+        content = response.content
+
+        with self.lock:
+            temp_path = os.path.join(self.cache_dir, f"{key}.{threading.get_ident()}.tmp")
+            with open(temp_path, "wb") as file:
+                file.write(content)
+            os.replace(temp_path, os.path.join(self.cache_dir, key))
+
+            self.util_add_entry(key, url, response.headers, len(content))
+
+        self.util_save_index(throttle=True)
+
+    def store_file(self, url: str, response: requests.Response, file_path: str):
+        """Store a streamed 200 response whose body has already been written to file_path."""
+        if not self.util_is_cacheable(response):
+            return
+
+        key = self.util_get_key(url)
+
+        with self.lock:
+            temp_path = os.path.join(self.cache_dir, f"{key}.{threading.get_ident()}.tmp")
+            shutil.copyfile(file_path, temp_path)
+            os.replace(temp_path, os.path.join(self.cache_dir, key))
+
+            self.util_add_entry(key, url, response.headers, os.path.getsize(file_path))
+
+        self.util_save_index(throttle=True)
+
+    def util_evict(self):
+        """Remove the least recently used bodies until the cache fits the size budget, the lock must be held by the caller."""
+        total_size = sum(entry["size"] for entry in self.entries.values())
+        if total_size <= self.max_size:
+            return
+
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.remove(os.path.join(self.cache_dir, key))
+            except FileNotFoundError:
+                pass
+
+            total_size -= entry["size"]
+            del self.entries[key]
+            self.dirty = True
+
+    def stats(self):
+        """Return the number of cached entries, their total size, and the hit/store counters."""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "size": sum(entry["size"] for entry in self.entries.values()),
+                "hits": self.hits,
+                "stored": self.stored,
+            }
+
+    def clear(self):
+        """Remove every cached body and the index."""
+        with self.lock:
+            for key in self.entries:
+                try:
+                    os.remove(os.path.join(self.cache_dir, key))
+                except FileNotFoundError:
+                    pass
+            self.entries = {}
+            self.dirty = True
+        self.util_save_index()
+
+    def close(self):
+        """Write the entries stored and the last uses of the cache hits since the last write of the index."""
+        self.util_save_index()
+
+class SessionPool():
+    def __init__(self, pool_connections = DEFAULT_POOL_CONNECTIONS, pool_maxsize = DEFAULT_POOL_MAXSIZE,
+                 cache: HttpCache = None,
+                 connect_timeout = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout = DEFAULT_READ_TIMEOUT,
+                 retries = DEFAULT_RETRIES,
+                 retry_backoff = DEFAULT_RETRY_BACKOFF,
+                 fixtures: FixtureStore = None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.cache = cache
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.fixtures = fixtures
+
+        self.sessions = {}
+        self.request_counts = {}
+        self.lock = threading.Lock()
+
+    def util_get_host(self, url: str):
+        """Return the host part of the URL, used as the key of the session."""
+        return urlsplit(url).netloc.lower()
+
+    def get_session(self, url: str):
+        """Return the keep-alive session of the host of the URL, create one if it does not exist."""
+        host = self.util_get_host(url)
+
+        with self.lock:
+            session = self.sessions.get(host)
+            if session == None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.sessions[host] = session
+                self.request_counts[host] = 0
+
+            self.request_counts[host] += 1
+
+        return session
+
+    def util_get_timeout(self, deadline: float):
+        """Return the (connect, read) timeouts of the next request, shortened to fit the deadline if any."""
+        if deadline == None:
+            return (self.connect_timeout, self.read_timeout)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("The deadline of the crawl has passed")
+
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+    def get(self, url: str, deadline: float = None, **kwargs):
+        """Send a GET request with timeouts, retrying failures and 429/5xx answers with a jittered exponential backoff.
+
+        `deadline` is a time.monotonic() value after which DeadlineExceeded is raised instead of trying again.
+        """
+        attempt = 0
+        while True:
+            kwargs["timeout"] = self.util_get_timeout(deadline)
+
+            try:
+                response = self.util_get_once(url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    return response
+                response.close()
+            except RETRY_EXCEPTIONS:
+                if attempt >= self.retries:
+                    raise
+
+            delay = random.uniform(0, self.retry_backoff * (2 ** attempt))
+            if deadline != None and time.monotonic() + delay >= deadline:
+                raise DeadlineExceeded(f"No time left to retry {url}")
+
+            time.sleep(delay)
+            attempt += 1
+
+    def util_get_once(self, url: str, **kwargs):
+        """Send a single GET request, or serve it from the recorded fixtures when replaying."""
+        if self.fixtures != None and self.fixtures.mode == "replay":
+            return self.fixtures.replay(url)
+
+        response = self.util_get_network(url, **kwargs)
+
+        if self.fixtures != None and self.fixtures.mode == "record":
+            response = self.fixtures.record(url, response)
+
+        return response
+
+    def util_get_network(self, url: str, **kwargs):
+        """Send a single GET request through the pooled session of the host, revalidating the cached copy if any."""
+        session = self.get_session(url)
+
+        # Streamed and partial downloads bypass the cache
+        if self.cache == None or kwargs.get("stream") or "Range" in kwargs.get("headers", {}):
+            return session.get(url, **kwargs)
+
+        validators = self.cache.get_validators(url)
+        if len(validators) > 0:
+            headers = dict(kwargs.pop("headers", {}))
+            headers.update(validators)
+            response = session.get(url, headers=headers, **kwargs)
+
+            if response.status_code == 304:
+                cached_response = self.cache.load(url)
+                if cached_response != None:
+                    return cached_response
+
+                # The cached body is gone, fetch it again without the validators
+                headers = {name: value for name, value in headers.items() if name not in validators}
+                response = session.get(url, headers=headers, **kwargs)
+        else:
+            response = session.get(url, **kwargs)
+
+        self.cache.store(url, response)
+        return response
+
+    def download(self, url: str, file_path: str, on_progress = None, deadline: float = None,
+                 chunk_size = DEFAULT_CHUNK_SIZE, max_resumes = DEFAULT_MAX_RESUMES):
+        """Stream the URL to file_path in chunks, resuming an interrupted download with a Range request.
+
+        The data is written to `file_path + ".part"` and only renamed to file_path once complete, so a
+        later call resumes from the bytes already on disk. `on_progress(done_bytes, total_bytes)` is called
+        after every chunk, total_bytes is None when the server does not tell the size. Returns the status code.
+        """
+        part_path = file_path + ".part"
+        resumes = 0
+        # Off once the cached body is found gone after a 304
+        use_validators = True
+
+        while True:
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+            headers = {}
+            if offset > 0:
+                headers["Range"] = f"bytes={offset}-"
+            elif self.cache != None and use_validators:
+                headers.update(self.cache.get_validators(url))
+
+            try:
+                with self.get(url, deadline, stream=True, headers=headers) as response:
+                    if response.status_code == 304 and self.cache != None:
+                        if self.cache.copy_to(url, file_path):
+                            return 200
+
+                        # The cached body is gone (evicted or deleted), fetch it again without the validators
+                        use_validators = False
+                        continue
+
+                    if response.status_code == 416 and offset > 0:
+                        # The partial file does not match the remote file anymore, start over
+                        os.remove(part_path)
+                        continue
+
+                    if response.status_code == 206:
+                        mode = "ab"
+                    elif response.status_code == 200:
+                        # The server ignored the Range header, start over
+                        mode = "wb"
+                        offset = 0
+                    else:
+                        return response.status_code
+
+                    total = None
+                    if "Content-Length" in response.headers:
+                        total = offset + int(response.headers["Content-Length"])
+
+                    with open(part_path, mode) as file:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            if deadline != None and time.monotonic() >= deadline:
+                                raise DeadlineExceeded(f"The deadline passed while downloading {url}")
+                            file.write(chunk)
+                            offset += len(chunk)
+                            if on_progress != None:
+                                on_progress(offset, total)
+
+                    if total != None and offset < total:
+                        raise requests.exceptions.ChunkedEncodingError(f"Connection closed after {offset}/{total} bytes")
+
+                    os.replace(part_path, file_path)
+
+                    if self.cache != None and response.status_code == 200:
+                        self.cache.store_file(url, response, file_path)
+
+                    return 200
+
+            except RETRY_EXCEPTIONS:
+                resumes += 1
+                if resumes > max_resumes:
+                    raise
+
+    def stats(self):
+        """Return the number of requests, opened connections and reused connections of every host."""
+        result = {}
+
+        with self.lock:
+            for host, session in self.sessions.items():
+                num_connections = 0
+                num_requests = 0
+
+                # Every mounted adapter is the same object, only count it once
+                for adapter in set(session.adapters.values()):
+                    pools = adapter.poolmanager.pools
+                    for key in pools.keys():
+                        pool = pools.get(key)
+                        if pool == None:
+                            continue
+                        num_connections += pool.num_connections
+                        num_requests += pool.num_requests
+
+                result[host] = {
+                    "requests": self.request_counts[host],
+                    "connections": num_connections,
+                    "reused": max(0, num_requests - num_connections),
+                }
+
+        return result
+
+    def close(self):
+        """Close every session and drop the kept-alive connections."""
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+            self.request_counts = {}
+
+class DownloadPool():
+    def __init__(self, max_workers = DEFAULT_DOWNLOAD_WORKERS, max_per_host = DEFAULT_DOWNLOAD_PER_HOST):
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+
+        self.executor = None
+        # host -> number of downloads submitted to the workers, and the downloads waiting for one of them to finish
+        self.host_active = {}
+        self.host_queues = {}
+        self.lock = threading.Lock()
+        # Notified when the last download of every host is done
+        self.idle = threading.Condition(self.lock)
+
+    def util_schedule(self, host: str, task: tuple):
+        """Submit the download if its host has a free slot, otherwise queue it behind the downloads of the host.
+        A worker only ever runs a download that holds a slot, so the other hosts are never waiting on a busy one."""
+        with self.lock:
+            if self.executor == None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download")
+
+            active = self.host_active.get(host, 0)
+            if active >= self.max_per_host:
+                self.host_queues.setdefault(host, deque()).append(task)
+                return
+            self.host_active[host] = active + 1
+            self.executor.submit(self.util_run_job, host, *task)
+
+    def util_release(self, host: str):
+        """Hand the slot of a finished download to the next download of its host, or free it."""
+        with self.lock:
+            queue = self.host_queues.get(host)
+            while queue:
+                task = queue.popleft()
+                # Cancelled when the caller stopped early
+                if not task[2].cancelled():
+                    # Submitted behind the downloads of the other hosts that are already waiting for a worker
+                    self.executor.submit(self.util_run_job, host, *task)
+                    return
+            self.host_queues.pop(host, None)
+
+            self.host_active[host] -= 1
+            if self.host_active[host] == 0:
+                del self.host_active[host]
+                if len(self.host_active) == 0:
+                    self.idle.notify_all()
+
+    def util_run_job(self, host: str, fetch, job, future: Future):
+        """Run a single download in the slot of its host, then pass the slot on."""
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fetch(job))
+            except BaseException as e:
+                future.set_exception(e)
+        finally:
+            self.util_release(host)
+
+    def run(self, jobs: list, fetch, get_url):
+        """Download every job concurrently, yield (job, result) in the order they finish.
+
+        `fetch(job)` does the download and `get_url(job)` returns the URL used to pick the host slot.
+        Exceptions raised by `fetch` are re-raised when their job is yielded.
+        """
+        if len(jobs) == 0:
+            return
+
+        futures = {}
+        for job in jobs:
+            future = Future()
+            futures[future] = job
+            self.util_schedule(urlsplit(get_url(job)).netloc.lower(), (fetch, job, future))
+
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Do not leave queued downloads behind if the caller stopped early
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        """Stop the worker threads once the queued downloads are done."""
+        with self.idle:
+            self.idle.wait_for(lambda: len(self.host_active) == 0)
+            executor = self.executor
+            self.executor = None
+        if executor != None:
+            executor.shutdown(wait=True)
+
+# Shared by every Crawler that does not bring its own pool
+SESSION_POOL = SessionPool()
+DOWNLOAD_POOL = DownloadPool()
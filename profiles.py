@@ -0,0 +1,199 @@
+import re
+
+# What changes from one site to another in get_files, convert_html_to_markdown and get_testcases.
+# Adding a site means adding an entry here, the stages only read the compiled profile of the crawl.
+SITE_PROFILES = {
+    "DMOJ": {
+        # Regex of the files embedded in the page, the group is the file path
+        "asset_pattern": r'\/martor(.+?)"',
+        # Where the files are downloaded from, {site} is the problem site
+        "asset_url": "https://{site}/martor/{file}",
+        # Math delimiters written by the site and the Markdown ones they become
+        "delimiters": {"~": "$"},
+        # Prefix removed from the image links, so that they point to the downloaded files
+        "image_prefix": "/martor/",
+        # Regex of a prefix removed from the image links, when it is not the same for every image
+        "image_prefix_pattern": None,
+        # Tags around the samples of the statement
+        "sample_begin": "<code>",
+        "sample_end": "</code></pre>",
+        # Regexes of the other tags of the samples and what they are replaced with, in order
+        "sample_tag_rules": [(r'<[^>]*>', "\n")],
+    },
+    "LQDOJ": {
+        "asset_pattern": r'\/media/pagedown-uploads(.+?)"',
+        "asset_url": "https://{site}/media/pagedown-uploads/{file}",
+        "delimiters": {"\\(": "$", "\\)": "$", "\\[": "$$", "\\]": "$$"},
+        "image_prefix": "/media/pagedown-uploads/",
+        "image_prefix_pattern": None,
+        "sample_begin": "<code>",
+        "sample_end": "</code></pre>",
+        "sample_tag_rules": [(r'<[^>]*>', "\n")],
+    },
+    "CSLOJ": {
+        "asset_pattern": r'\/images/problems(.+?)"',
+        "asset_url": "http://{site}/images/problems/{file}",
+        "delimiters": {"\\(": "$", "\\)": "$", "\\[": "$$", "\\]": "$$"},
+        "image_prefix": None,
+        "image_prefix_pattern": r'/images/problems/(?:.+?)/',
+        "sample_begin": "<code>",
+        "sample_end": "</code></pre>",
+        "sample_tag_rules": [(r'<[^>]*>', "\n")],
+    },
+    "Codeforces": {
+        "asset_pattern": r'\/espresso.codeforces.com(.+?)"',
+        "asset_url": "https://espresso.codeforces.com/{file}",
+        "delimiters": {"$$$": "$"},
+        "image_prefix": "https://{site}/espresso/",
+        "image_prefix_pattern": None,
+        "sample_begin": "</div><pre>",
+        "sample_end": "</pre></div>",
+        # Codeforces uses <div> to differentiate the smaller testcases in a bigger one, only the end tags are
+        # line breaks, some old problems use <br /> instead of <div>, the other tags are removed
+        "sample_tag_rules": [(r'</[^>]*>', "\n"), (r'<br />', "\n"), (r'<[^>]*>', "")],
+    },
+    "CodeforcesCD": {
+        "asset_pattern": r'\/espresso(.+?)"',
+        "asset_url": "https://{site}/espresso/{file}",
+        "delimiters": {},
+        "image_prefix": None,
+        "image_prefix_pattern": None,
+        "sample_begin": "</div><pre>",
+        "sample_end": "</pre></div>",
+        "sample_tag_rules": [(r'</[^>]*>', "\n"), (r'<br />', "\n"), (r'<[^>]*>', "")],
+    },
+}
+
+# SPECIAL CASES: sites that do not follow their engine, applied on top of the profile of their site type
+HOST_PROFILES = {
+    "oj.lequydon.net": {
+        "asset_url": "https://{site}/media/martor/{file}",
+        "image_prefix": "/media/martor/",
+    },
+    "lqdoj.edu.vn": {
+        "image_prefix": "https://cdn.lqdoj.edu.vn/media/pagedown-uploads/",
+    },
+    "laptrinhonline.club": {
+        "delimiters": {"\\(": "$", "\\)": "$", "\\[": "$$", "\\]": "$$"},
+    },
+    "laptrinh.ictu.edu.vn": {
+        "delimiters": {"\\(": "$", "\\)": "$", "\\[": "$$", "\\]": "$$"},
+    },
+}
+
+# Replace dollar sign to prevent the math functions from being replaced, before the math delimiters
+MARKDOWN_ESCAPES = {
+    "\\$": "!!Dollar!!",
+}
+
+# Replace some special cases, on every site after the math delimiters
+MARKDOWN_REWRITES = {
+    "\\left(": "\\ (",
+    "\\right)": ")",
+    "\\left[": "\\ [",
+    "\\right]": "]",
+    "\\left{": "\\ {",
+    "\\right}": "}",
+    "\\left|": "|",
+    "\\right|": "|",
+}
+
+# Imgur files are downloaded on every site
+EXTERNAL_ASSET_PATTERN = r'\/i.imgur.com(.+?)"'
+EXTERNAL_ASSET_URL = "https://i.imgur.com{file}"
+
+class SiteProfile():
+    # Compiled profile of every site type and problem site, built on first use
+    compiled = {}
+
+    def __init__(self, problem_site_type: str, problem_site: str):
+        """Resolve and compile the profile of a site once, the stages then only run its rules."""
+        self.problem_site_type = problem_site_type
+        self.problem_site = problem_site
+
+        profile = dict(SITE_PROFILES[problem_site_type])
+        # Codeforces pages are the same on every host
+        if not problem_site_type.startswith("Codeforces"):
+            for host, overrides in HOST_PROFILES.items():
+                if host in problem_site:
+                    profile.update(overrides)
+
+        # The site files and the Imgur files are found by the same regex, each alternative has its own group
+        self.asset_pattern = re.compile(f"{profile['asset_pattern']}|{EXTERNAL_ASSET_PATTERN}")
+        self.asset_url = profile["asset_url"]
+
+        # The document tree (document.py) rewrites the math delimiters of the text and the image links on their own
+        self.math_delimiters = list(profile["delimiters"].items())
+        self.image_prefix = None
+        if profile["image_prefix"] != None:
+            self.image_prefix = profile["image_prefix"].format(site=problem_site)
+
+        # The rewrites of the Markdown content, in the order they are applied
+        self.markdown_rewrites = list(MARKDOWN_ESCAPES.items()) + self.math_delimiters + list(MARKDOWN_REWRITES.items())
+        if self.image_prefix != None:
+            self.markdown_rewrites.append((self.image_prefix, ""))
+
+        self.image_prefix_pattern = None
+        if profile["image_prefix_pattern"] != None:
+            self.image_prefix_pattern = re.compile(profile["image_prefix_pattern"], flags=re.DOTALL)
+
+        self.sample_begin = profile["sample_begin"]
+        self.sample_end = profile["sample_end"]
+        self.sample_tag_rules = [(re.compile(pattern), replacement) for pattern, replacement in profile["sample_tag_rules"]]
+
+    def find_assets(self, html: str):
+        """Return the site files and the Imgur files linked by the HTML content, without duplicates."""
+        files = {}
+        external_files = {}
+        for file, external_file in self.asset_pattern.findall(html):
+            if file != "":
+                files[file] = True
+            elif external_file != "":
+                external_files[external_file] = True
+        return list(files), list(external_files)
+
+    def get_asset_url(self, file: str):
+        return self.asset_url.format(site=self.problem_site, file=file)
+
+    def get_external_asset_url(self, file: str):
+        return EXTERNAL_ASSET_URL.format(file=file)
+
+    def rewrite_markdown(self, markdown: str):
+        """Rewrite the math delimiters, the LaTeX brackets and the image links of the site."""
+        # The rewrites are literal texts, str.replace is faster than joining them into a regex with a callback
+        for text, replacement in self.markdown_rewrites:
+            markdown = markdown.replace(text, replacement)
+
+        if self.image_prefix_pattern != None:
+            markdown = self.image_prefix_pattern.sub('', markdown)
+
+        return markdown
+
+    def rewrite_image_link(self, link: str):
+        """Remove the prefix of the site from an image link, so that it points to the downloaded file."""
+        if self.image_prefix != None:
+            link = link.replace(self.image_prefix, "")
+
+        if self.image_prefix_pattern != None:
+            link = self.image_prefix_pattern.sub('', link)
+
+        return link
+
+    def mark_samples(self, html: str):
+        """Replace the sample tags with "||begin||" and "||end||", drop the content after the last sample and the other tags."""
+        html = html.replace(self.sample_begin, '||begin||').replace(self.sample_end, '||end||')
+
+        # Remove the content after the last testcase
+        html = html[:html.rfind('||end||') + len('||end||')]
+
+        for pattern, replacement in self.sample_tag_rules:
+            html = pattern.sub(replacement, html)
+
+        return html
+
+def get_site_profile(problem_site_type: str, problem_site: str):
+    """Return the compiled profile of the site, compiled once per site."""
+    key = (problem_site_type, problem_site)
+    if key not in SiteProfile.compiled:
+        SiteProfile.compiled[key] = SiteProfile(problem_site_type, problem_site)
+    return SiteProfile.compiled[key]
@@ -0,0 +1,124 @@
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+# Characters replaced in every output after the conversion, in order
+POST_CONVERT_REPLACEMENTS = [
+    ("\u00a0", " "), # no-break space
+    ("—", "--"),
+    ("–", "--"),
+]
+
+# The content is written and post-converted by blocks of this many characters, bounding the memory of a write
+BLOCK_SIZE = 1 << 16
+
+# Number of outputs of a problem rendered at the same time, one per output format
+DEFAULT_RENDER_WORKERS = 5
+
+def post_convert(text: str):
+    """Replace the special characters of an output and normalize its Unicode characters."""
+    for character, replacement in POST_CONVERT_REPLACEMENTS:
+        text = text.replace(character, replacement)
+    return unicodedata.normalize("NFC", text)
+
+class OutputWriter():
+    def __init__(self, writer):
+        """Post-convert the chunks of a document and pass them to a writer: a file, a StringIO, a socket file..."""
+        self.writer = writer
+        # End of the last chunk, not written yet because the next chunk may compose with it
+        self.pending = ""
+
+    def write(self, chunk: str):
+        # A chunk smaller than a block is not copied
+        for offset in range(0, len(chunk), BLOCK_SIZE):
+            self.util_write_block(chunk[offset:offset + BLOCK_SIZE])
+
+    def util_write_block(self, chunk: str):
+        text = self.pending + chunk if self.pending != "" else chunk
+
+        # Normalize up to the last ASCII character: it never composes with the characters before it, and the
+        # characters after it are normalized with the next chunk
+        cut = len(text) - 1
+        while cut >= 0 and ord(text[cut]) >= 128:
+            cut -= 1
+
+        if cut <= 0:
+            self.pending = text
+            return
+
+        self.pending = text[cut:]
+        self.writer.write(post_convert(text[:cut]))
+
+    def close(self):
+        """Write the end of the document, the writer itself is left open."""
+        self.writer.write(post_convert(self.pending))
+        self.pending = ""
+
+def util_write_slice(writer, content: str, start: int, end: int):
+    """Write content[start:end] by blocks, without copying the whole slice."""
+    for offset in range(start, end, BLOCK_SIZE):
+        writer.write(content[offset:min(offset + BLOCK_SIZE, end)])
+
+def render_spliced(writer, content: str, edits: list):
+    """Write the content with every edit (start, end, chunks) replacing content[start:end] by its chunks.
+
+    The edits are sorted by their start, an edit overlapping the previous one is skipped. Only one slice of
+    the content is copied at a time, the edited document is never built in memory.
+    """
+    position = 0
+    for start, end, chunks in sorted(edits, key=lambda edit: edit[0]):
+        if start < position:
+            continue
+
+        util_write_slice(writer, content, position, start)
+        for chunk in chunks:
+            writer.write(chunk)
+        position = end
+
+    util_write_slice(writer, content, position, len(content))
+
+class RenderPool():
+    # Pools shared by the crawlers, one per number of workers, created on first use
+    shared = {}
+    shared_lock = threading.Lock()
+
+    def __init__(self, max_workers = DEFAULT_RENDER_WORKERS):
+        self.max_workers = max_workers
+
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def run(self, stages: list):
+        """Run every stage (name, render) concurrently, return (name, error) in the order of the stages.
+
+        The error is None if the stage succeeded, a failed stage does not stop the other ones.
+        """
+        with self.lock:
+            if self.executor == None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="render")
+            executor = self.executor
+
+        futures = [(name, executor.submit(render)) for name, render in stages]
+
+        results = []
+        for name, future in futures:
+            try:
+                future.result()
+                results.append((name, None))
+            except Exception as e:
+                results.append((name, e))
+        return results
+
+    def close(self):
+        """Stop the worker threads once the queued stages are done."""
+        with self.lock:
+            if self.executor != None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+
+def get_render_pool(max_workers = DEFAULT_RENDER_WORKERS):
+    """Return the render pool shared by the crawlers with this number of workers."""
+    with RenderPool.shared_lock:
+        if max_workers not in RenderPool.shared:
+            RenderPool.shared[max_workers] = RenderPool(max_workers)
+        return RenderPool.shared[max_workers]
@@ -0,0 +1,133 @@
+import functools
+import re
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+DMOJ_INDICATOR_LIST = """
+dmoj.ca
+cyboj.ddns.net
+oj.qnoi.info
+oj.vnoi.info
+tinhoctre.vn
+coder.husc.edu.vn
+oj.chuyenhalong.edu.vn
+dmoj.ctu.edu.vn
+hnoj.edu.vn
+chvoj.edu.vn
+oj.giftedbat.edu.vn
+claoj.edu.vn
+laptrinhonline.club
+ptnkoj.com
+laptrinh.ictu.edu.vn
+oj.lequydon.net
+oj.thptchuyenhatinh.edu.vn
+sqrtoj.edu.vn
+oj.vku.udn.vn
+oj.eiu.edu.vn
+"""
+
+LQDOJ_INDICATOR_LIST = """
+lqdoj.edu.vn
+tleoj.edu.vn
+nbk.homes
+ltoj.edu.vn
+quangtrioj.edu.vn
+"""
+
+def util_build_host_index():
+    """Return the site type of every known host, a host also matches its subdomains."""
+    hosts = {}
+    for host in DMOJ_INDICATOR_LIST.split():
+        hosts[host] = "DMOJ"
+    for host in LQDOJ_INDICATOR_LIST.split():
+        hosts[host] = "LQDOJ"
+    hosts["csloj.ddns.net"] = "CSLOJ"
+    hosts["codeforces.com"] = "Codeforces"
+    return hosts
+
+SITE_HOSTS = util_build_host_index()
+
+# Number of parsed URLs kept, a batch crawl parses each of its URLs once
+ROUTE_CACHE_SIZE = 4096
+
+class ProblemRoute(NamedTuple):
+    """Everything the crawler reads from the URL of a problem."""
+    # The URL to crawl, Codeforces problemset URLs are rewritten to their contest URL
+    url: str
+    host: str
+    # The parser used for the page: DMOJ, LQDOJ, CSLOJ or Codeforces
+    site_type: str
+    # The site type saved with the problem, CodeforcesCD for the *.contest.codeforces.com sites
+    problem_site_type: str
+    # The site name used for the output folder and the file links, DMOJ sites may be under a path
+    problem_site: str
+    problem_code: str
+    # Codeforces only: the contest or gym ID, the problem index in it, and "contest" or "gym"
+    contest_id: str = None
+    order_id: str = None
+    url_type: str = None
+
+def get_site_type(url: str):
+    """Return the site type of the host of the URL, looking up the host then its parent domains. None if unknown."""
+    host = urlsplit(url).hostname
+    while host:
+        site_type = SITE_HOSTS.get(host)
+        if site_type != None:
+            return site_type
+        host = host.partition(".")[2]
+    return None
+
+def util_split_problem_path(url: str, path: str):
+    """Return the part of the path before and after "/problem/"."""
+    parts = path.split("/problem/")
+    if len(parts) < 2:
+        raise Exception(f"Cannot find the problem in the URL {url}")
+    return parts[0], parts[1]
+
+def util_route_codeforces(url: str):
+    # https://codeforces.com/problemset/problem/75/C -> https://codeforces.com/contest/75/problem/C
+    if "/problemset/problem/" in url:
+        normalized_url = re.sub(r'\/problemset\/problem\/(\d+)(\/[A-Z0-9]+)', r'/contest/\1/problem\2', url)
+        if normalized_url != url:
+            return route_url(normalized_url, "Codeforces")
+
+    parts = urlsplit(url)
+    problem_site_type = "Codeforces"
+
+    # URL type classification
+    if ".contest.codeforces.com" in parts.netloc:
+        url_type = "contest"
+        problem_site_type = "CodeforcesCD"
+    elif "/gym/" in parts.path:
+        url_type = "gym"
+    else:
+        url_type = "contest"
+
+    contest_path, order_id = util_split_problem_path(url, parts.path)
+    contest_id = contest_path.split(f"/{url_type}/")[-1]
+    order_id = order_id.replace("/", "")
+
+    # Problem code = Contest ID + Problem Order ID
+    problem_code = (contest_id + order_id).replace("/", "")
+
+    return ProblemRoute(url, parts.hostname, "Codeforces", problem_site_type, parts.netloc, problem_code,
+                        contest_id, order_id, url_type)
+
+@functools.lru_cache(maxsize=ROUTE_CACHE_SIZE)
+def route_url(url: str, problem_site_type: str = None):
+    """Parse the URL of a problem once, with the parser of the given site type, detected from the host if None.
+
+    Unknown sites are parsed like DMOJ sites, which is also the parser the crawler falls back to.
+    """
+    if problem_site_type == None:
+        return route_url(url, get_site_type(url) or "DMOJ")
+
+    if problem_site_type == "Codeforces":
+        return util_route_codeforces(url)
+
+    # DMOJ-themed sites: https://<site>/problem/<code>, the site may be under a path
+    parts = urlsplit(url)
+    site_path, problem_code = util_split_problem_path(url, parts.path)
+    problem_code = problem_code.replace("/", "")
+
+    return ProblemRoute(url, parts.hostname, problem_site_type, problem_site_type, parts.netloc + site_path, problem_code)